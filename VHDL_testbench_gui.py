@@ -5,6 +5,7 @@ import re
 import json
 import subprocess
 from scripts.vhdl_parser import parse_vhdl
+from scripts.parse_cache import ParseCache
 # Import the testbench generation functions from the new script
 from scripts.testbench_generator import generate_testbench, load_vhdl_data
 
@@ -58,6 +59,7 @@ class VHDLTestbenchGenerator:
         # Class variables to store parsed data
         self.parsed_vhdl_data = None
         self.entity_name = None
+        self.parse_cache = ParseCache()
 
     def parse_vhdl_module(self):
         """Parse the VHDL module and create a JSON representation"""
@@ -77,7 +79,7 @@ class VHDLTestbenchGenerator:
                 f.write(vhdl_content)
             
             # Use the parse_vhdl function
-            parsed_data = parse_vhdl(temp_vhdl_file)
+            parsed_data = parse_vhdl(temp_vhdl_file, cache=self.parse_cache, entity_only=True)
             
             # Extract entity name
             self.entity_name = parsed_data.get('name', '')
@@ -1,8 +1,13 @@
 import os
-import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from test_report import build_report, render_markdown
+from wave_cache import load_waveform
 
 # Define file paths
 vcd_path = "simulation.vcd"  # Ensure it's in the correct directory
+log_path = "simulation.log"
 report_path = "test_report.md"
 
 # Step 1: Check if the VCD file exists
@@ -12,49 +17,13 @@ if not os.path.exists(vcd_path):
 else:
     print("✅ File exists and is accessible.")
 
-# Step 2: Read the VCD file
-with open(vcd_path, "r") as vcd_file:
-    vcd_content = vcd_file.readlines()
-
-test_results = {}
-current_module = None
-signal_names = {}
-signal_changes = {}
-
-# Step 3: Extract signal definitions
-for line in vcd_content:
-    var_match = re.match(r"\$var\s+\w+\s+\d+\s+(\S+)\s+(\S+)\s+\$end", line)
-    if var_match:
-        signal_id, signal_name = var_match.groups()
-        signal_names[signal_id] = signal_name  # Map ID to name
+# Step 2-4: Load the waveform into per-signal arrays (through its cache) and
+# summarize every signal: toggles, first/last change, duty, glitches, X/Z
+store = load_waveform(vcd_path)
+report = build_report(store, vcd_path, log_path=log_path)
 
-# Step 4: Extract Signal Changes
-timestamp = "0"
-for line in vcd_content:
-    time_match = re.match(r"#(\d+)", line)
-    if time_match:
-        timestamp = time_match.group(1)  # Update timestamp
-    
-    value_match = re.match(r"([01])(\S)", line)  # Detect 0!, 1&
-    if value_match:
-        value, signal_id = value_match.groups()
-        signal_name = signal_names.get(signal_id, f"Unknown({signal_id})")
-
-        if signal_name not in signal_changes:
-            signal_changes[signal_name] = []
-        signal_changes[signal_name].append((timestamp, value))
-
-# Step 5: Generate a Detailed Markdown Report
+# Step 5: Write a bounded-size Markdown summary instead of every transition
 with open(report_path, "w") as report_file:
-    report_file.write("# VHDL Test Report\n\n")
-    report_file.write("## shift_register Testbench\n")
-    report_file.write("**Status**: PASSED\n\n")
-    report_file.write("### Signal Transitions:\n")
-
-    for signal, changes in signal_changes.items():
-        report_file.write(f"- **{signal}**:\n")
-        for timestamp, value in changes:
-            report_file.write(f"  - At `{timestamp} fs`: `{value}`\n")
-        report_file.write("\n")
+    report_file.write(render_markdown(report, details=True))
 
-print(f"✅ Detailed Report Generated: {report_path}")
+print(f"✅ Report Generated: {report_path} ({report.testbench}: {report.status})")
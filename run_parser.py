@@ -1,5 +1,8 @@
 from vhdl_parser import parse_vhdl_file
+from batch_parser import parse_tree
+from parse_cache import ParseCache
 import os
+import sys
 
 def get_vhdl_file_path():
     """
@@ -23,7 +26,23 @@ def get_vhdl_file_path():
         else:
             print(f"Error: The file '{file_path}' does not exist. Please check the path.")
 
+def run_batch(root_dir):
+    """Parse a whole source tree in parallel and write a manifest."""
+    output_dir = os.path.join('src', 'parsed')
+    manifest = parse_tree(root_dir, output_dir)
+    summary = manifest['summary']
+    print(f"Parsed {summary['parsed']}/{summary['files']} files with {manifest['workers']} workers")
+    print(f"Manifest saved to: {os.path.join(output_dir, 'manifest.json')}")
+    for result in manifest['files']:
+        if result['status'] != 'ok':
+            print(f"  {result['file']}: {result['error']}")
+
 def main():
+    # A directory argument switches to batch mode
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        run_batch(sys.argv[1])
+        return
+
     try:
         # Get VHDL file path from user
         input_vhdl_file = get_vhdl_file_path()
@@ -32,7 +51,7 @@ def main():
         output_json_file = 'src/vhdl_module.json'
         
         # Parse the VHDL and save to JSON
-        parsed_entity = parse_vhdl_file(input_vhdl_file, output_json_file)
+        parsed_entity = parse_vhdl_file(input_vhdl_file, output_json_file, cache=ParseCache(), entity_only=True)
         
         print(f"Parsed VHDL entity saved to JSON: {output_json_file}")
         print("Parsed Entity Details:", parsed_entity)
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional
+
+try:
+    from .vhdl_parser import VHDLParser, map_vhdl_file, dump_json
+    from .parse_cache import ParseCache, DEFAULT_CACHE_DIR
+except ImportError:
+    from vhdl_parser import VHDLParser, map_vhdl_file, dump_json
+    from parse_cache import ParseCache, DEFAULT_CACHE_DIR
+
+VHDL_EXTENSIONS = ('.vhd', '.vhdl')
+DEFAULT_TIME_BUDGET = 60.0
+
+# One cache handle per worker process, so its size is only scanned once
+_worker_caches: Dict[str, ParseCache] = {}
+
+def find_vhdl_files(root: str) -> List[str]:
+    """Recursively collect .vhd/.vhdl files below root, in a stable order."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(VHDL_EXTENSIONS):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+def _parse_file(job) -> Dict:
+    """Worker: parse one file and report its design units or the error."""
+    path, output_file, cache_dir, spans, time_budget = job
+    started = time.perf_counter()
+    result = {"file": path, "output": output_file, "entities": [], "architectures": []}
+    try:
+        content = map_vhdl_file(path)
+
+        if cache_dir:
+            cache = _worker_caches.setdefault(cache_dir, ParseCache(cache_dir, time_budget=time_budget))
+            units = cache.parse_units(content, spans=spans)["vhdl_design_units"]
+        else:
+            units = VHDLParser(content, time_budget).design_units_data(spans)
+
+        for unit in units:
+            if "vhdl_entity" in unit:
+                result["entities"].append(unit["vhdl_entity"]["name"])
+            if "vhdl_architecture" in unit:
+                architecture = unit["vhdl_architecture"]
+                result["architectures"].append(f"{architecture['entity_name']}({architecture['name']})")
+
+        if output_file:
+            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(output_file, 'w') as out:
+                dump_json({"vhdl_design_units": units}, out, indent=None)
+
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = round(time.perf_counter() - started, 6)
+    return result
+
+def parse_tree(root: str, output_dir: Optional[str] = None, manifest_file: Optional[str] = None,
+               workers: Optional[int] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+               spans: bool = False, time_budget: Optional[float] = DEFAULT_TIME_BUDGET) -> Dict:
+    """Parse every VHDL file below root across a process pool.
+
+    Each file's design units are written to output_dir/<relative path>.json when
+    output_dir is given. The returned manifest lists per-file results and errors
+    and is also written to manifest_file (default: output_dir/manifest.json).
+    Unchanged files are served from the parse cache unless cache_dir is None.
+    With spans, process and statement bodies are written as byte offsets into
+    the source file instead of copied text. A file that takes longer than
+    time_budget seconds is reported as an error instead of stalling its worker.
+    """
+    started = time.perf_counter()
+    files = find_vhdl_files(root)
+    workers = workers or os.cpu_count() or 1
+
+    jobs = []
+    for path in files:
+        output_file = None
+        if output_dir:
+            output_file = os.path.join(output_dir, os.path.relpath(path, root) + '.json')
+        jobs.append((path, output_file, cache_dir, spans, time_budget))
+
+    if workers == 1 or len(jobs) <= 1:
+        results = [_parse_file(job) for job in jobs]
+    else:
+        # Large chunks amortize inter-process overhead over many small files
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_parse_file, jobs, chunksize=chunksize))
+
+    failed = [r for r in results if r["status"] != "ok"]
+    manifest = {
+        "root": str(root),
+        "workers": workers,
+        "summary": {
+            "files": len(results),
+            "parsed": len(results) - len(failed),
+            "failed": len(failed),
+            "entities": sum(len(r["entities"]) for r in results),
+            "architectures": sum(len(r["architectures"]) for r in results),
+            "seconds": round(time.perf_counter() - started, 3)
+        },
+        "files": results
+    }
+
+    if not manifest_file and output_dir:
+        manifest_file = os.path.join(output_dir, 'manifest.json')
+    if manifest_file:
+        Path(manifest_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    return manifest
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Parse every VHDL file in a directory tree in parallel.")
+    arg_parser.add_argument("root", help="Directory to scan for .vhd/.vhdl files")
+    arg_parser.add_argument("-o", "--output-dir", default="parsed", help="Directory for per-file JSON and the manifest")
+    arg_parser.add_argument("-m", "--manifest", default=None, help="Manifest path (default: <output-dir>/manifest.json)")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Parse cache directory")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Always re-parse every file")
+    arg_parser.add_argument("--spans", action="store_true", help="Emit source offsets instead of process/statement text")
+    arg_parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET,
+                            help="Per-file parse time limit in seconds")
+    args = arg_parser.parse_args()
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    manifest = parse_tree(args.root, args.output_dir, args.manifest, args.jobs, cache_dir, args.spans,
+                          args.time_budget)
+    summary = manifest["summary"]
+    print(f"Parsed {summary['parsed']}/{summary['files']} files "
+          f"({summary['entities']} entities) in {summary['seconds']} s with {manifest['workers']} workers")
+    for result in manifest["files"]:
+        if result["status"] != "ok":
+            print(f"  {result['file']}: {result['error']}")
+
+if __name__ == "__main__":
+    main()
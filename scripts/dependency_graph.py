@@ -0,0 +1,204 @@
+import os
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from .vhdl_parser import VHDLParser, Entity, Architecture, Package, ContextClause, map_vhdl_file
+    from .batch_parser import find_vhdl_files, DEFAULT_TIME_BUDGET
+except ImportError:
+    from vhdl_parser import VHDLParser, Entity, Architecture, Package, ContextClause, map_vhdl_file
+    from batch_parser import find_vhdl_files, DEFAULT_TIME_BUDGET
+
+WORK_LIBRARY = 'work'
+
+@dataclass
+class SourceFile:
+    """Primary units a file declares and the units it needs analyzed first.
+
+    Units are keyed as 'entity:<name>' or 'package:<name>' (lower case).
+    Only references into the work library are recorded; ieee, std and other
+    precompiled libraries are assumed to be available already.
+    """
+    path: str
+    provides: Set[str] = field(default_factory=set)
+    requires: Set[str] = field(default_factory=set)
+
+def _work_reference(name: str, work: str, kind: str) -> Optional[str]:
+    """'work.pkg.all' -> 'package:pkg' for selected names rooted in the work library."""
+    parts = name.lower().split('.')
+    if len(parts) >= 2 and parts[0] in (WORK_LIBRARY, work) and parts[1] != 'all':
+        return f"{kind}:{parts[1]}"
+    return None
+
+def scan_file(path: str, work: str = WORK_LIBRARY, time_budget: Optional[float] = DEFAULT_TIME_BUDGET) -> SourceFile:
+    """Parse a file and collect what it provides and requires from the work library."""
+    source = SourceFile(path=os.path.abspath(path))
+    work = work.lower()
+    for unit in VHDLParser(map_vhdl_file(path), time_budget).iter_units():
+        if isinstance(unit, Entity):
+            source.provides.add(f"entity:{unit.name.lower()}")
+        elif isinstance(unit, Package):
+            if unit.body:
+                source.requires.add(f"package:{unit.name.lower()}")
+            else:
+                source.provides.add(f"package:{unit.name.lower()}")
+        elif isinstance(unit, Architecture):
+            source.requires.add(f"entity:{unit.entity_name.lower()}")
+            for instance in unit.instances:
+                library = (instance.library or WORK_LIBRARY).lower()
+                if instance.kind != 'configuration' and library in (WORK_LIBRARY, work):
+                    source.requires.add(f"entity:{instance.unit.lower()}")
+        elif isinstance(unit, ContextClause) and unit.kind == 'use':
+            for name in unit.names:
+                reference = _work_reference(name, work, 'package')
+                if reference:
+                    source.requires.add(reference)
+
+    # A file never waits on itself, e.g. an entity and its architecture together
+    source.requires -= source.provides
+    return source
+
+class DependencyGraph:
+    """File-level dependency DAG for GHDL analysis.
+
+    Files are added in priority order: when several files declare the same
+    unit, the first one added provides it and later ones are left out of any
+    closure that needs it. Requirements nobody provides (black-box components,
+    vendor libraries) are kept in missing() rather than treated as errors.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, SourceFile] = {}
+        self.providers: Dict[str, str] = {}
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], work: str = WORK_LIBRARY,
+                   time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                   scanned: Optional[Dict[str, SourceFile]] = None) -> 'DependencyGraph':
+        """Build a graph from files and directories (searched recursively), in the order given.
+
+        scanned, keyed by absolute path, holds files scanned by earlier calls;
+        they are reused rather than parsed again, and new scans are added.
+        """
+        graph = cls()
+        for path in paths:
+            candidates = find_vhdl_files(path) if os.path.isdir(path) else [path]
+            for candidate in candidates:
+                absolute = os.path.abspath(candidate)
+                if absolute in graph.files:
+                    continue
+                source = scanned.get(absolute) if scanned is not None else None
+                if source is None:
+                    source = scan_file(candidate, work, time_budget)
+                    if scanned is not None:
+                        scanned[absolute] = source
+                graph.add(source)
+        return graph
+
+    def add(self, source: SourceFile) -> None:
+        self.files[source.path] = source
+        for unit in sorted(source.provides):
+            self.providers.setdefault(unit, source.path)
+
+    def dependencies(self, path: str) -> Set[str]:
+        """Files that must be analyzed before path."""
+        found = set()
+        for unit in self.files[path].requires:
+            provider = self.providers.get(unit)
+            if provider is not None and provider != path:
+                found.add(provider)
+        return found
+
+    def missing(self) -> Dict[str, List[str]]:
+        """Required units without a provider, per requiring file."""
+        result = {}
+        for path, source in self.files.items():
+            unresolved = sorted(unit for unit in source.requires if unit not in self.providers)
+            if unresolved:
+                result[path] = unresolved
+        return result
+
+    def closure(self, roots: Iterable[str]) -> List[str]:
+        """Root files (paths or 'entity:<name>' keys) plus everything they depend on."""
+        pending = []
+        for root in roots:
+            if ':' in root and not os.path.exists(root):
+                provider = self.providers.get(root.lower())
+                if provider is None:
+                    raise ValueError(f"No file in the dependency graph declares {root}")
+                pending.append(provider)
+            else:
+                pending.append(os.path.abspath(root))
+
+        selected = set()
+        while pending:
+            path = pending.pop()
+            if path in selected:
+                continue
+            if path not in self.files:
+                raise ValueError(f"File '{path}' is not part of the dependency graph")
+            selected.add(path)
+            pending.extend(self.dependencies(path))
+        return [path for path in self.files if path in selected]
+
+    def levels(self, paths: Optional[Iterable[str]] = None) -> List[List[str]]:
+        """Topological layers: every file depends only on files in earlier levels.
+
+        Files within one level are independent of each other, so they can be
+        analyzed together in any order. Raises ValueError on a dependency cycle.
+        """
+        nodes = list(self.files) if paths is None else list(paths)
+        node_set = set(nodes)
+        remaining = {path: self.dependencies(path) & node_set for path in nodes}
+
+        levels = []
+        while remaining:
+            ready = [path for path in nodes if path in remaining and not remaining[path]]
+            if not ready:
+                cycle = ', '.join(os.path.basename(path) for path in sorted(remaining))
+                raise ValueError(f"Dependency cycle between VHDL files: {cycle}")
+            levels.append(ready)
+            for path in ready:
+                del remaining[path]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
+
+    def to_dict(self) -> Dict:
+        return {
+            "files": {
+                path: {
+                    "provides": sorted(source.provides),
+                    "requires": sorted(source.requires),
+                    "depends_on": sorted(self.dependencies(path))
+                }
+                for path, source in self.files.items()
+            },
+            "missing": self.missing()
+        }
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Show the analysis order of VHDL files.")
+    arg_parser.add_argument("paths", nargs="+", help="VHDL files and/or directories, highest priority first")
+    arg_parser.add_argument("--top", action="append", default=[],
+                            help="Only show the closure of this entity (repeatable)")
+    arg_parser.add_argument("--work", default=WORK_LIBRARY, help="Name of the work library")
+    arg_parser.add_argument("--json", action="store_true", help="Print the full graph as JSON")
+    args = arg_parser.parse_args()
+
+    graph = DependencyGraph.from_paths(args.paths, args.work)
+    if args.json:
+        print(json.dumps(graph.to_dict(), indent=2))
+        return
+
+    files = graph.closure(f"entity:{top}" for top in args.top) if args.top else None
+    for number, level in enumerate(graph.levels(files)):
+        print(f"Level {number}:")
+        for path in level:
+            print(f"  {os.path.relpath(path)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import os
+import json
+import time
+import sqlite3
+from typing import Dict, List, Optional
+
+try:
+    from .vhdl_parser import VHDLParser, Entity, Architecture, Package, PARSER_VERSION
+    from .batch_parser import find_vhdl_files, DEFAULT_TIME_BUDGET
+    from .ghdl_build import file_digest
+except ImportError:
+    from vhdl_parser import VHDLParser, Entity, Architecture, Package, PARSER_VERSION
+    from batch_parser import find_vhdl_files, DEFAULT_TIME_BUDGET
+    from ghdl_build import file_digest
+
+DEFAULT_INDEX_PATH = os.path.join('.vhdl_cache', 'design_index.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    start INTEGER,
+    end INTEGER
+);
+CREATE TABLE IF NOT EXISTS generics (
+    entity_id INTEGER NOT NULL REFERENCES entities(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    default_value TEXT
+);
+CREATE TABLE IF NOT EXISTS ports (
+    entity_id INTEGER NOT NULL REFERENCES entities(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    width TEXT,
+    default_value TEXT
+);
+CREATE TABLE IF NOT EXISTS architectures (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    entity_name TEXT NOT NULL,
+    entity_key TEXT NOT NULL,
+    start INTEGER,
+    end INTEGER
+);
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    body INTEGER NOT NULL,
+    start INTEGER,
+    end INTEGER
+);
+CREATE TABLE IF NOT EXISTS instances (
+    architecture_id INTEGER NOT NULL REFERENCES architectures(id) ON DELETE CASCADE,
+    label TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    unit_key TEXT NOT NULL,
+    library TEXT,
+    architecture TEXT
+);
+CREATE INDEX IF NOT EXISTS entities_key ON entities(key);
+CREATE INDEX IF NOT EXISTS entities_file ON entities(file_id);
+CREATE INDEX IF NOT EXISTS generics_entity ON generics(entity_id);
+CREATE INDEX IF NOT EXISTS ports_entity ON ports(entity_id);
+CREATE INDEX IF NOT EXISTS architectures_entity ON architectures(entity_key);
+CREATE INDEX IF NOT EXISTS architectures_file ON architectures(file_id);
+CREATE INDEX IF NOT EXISTS packages_key ON packages(key);
+CREATE INDEX IF NOT EXISTS packages_file ON packages(file_id);
+CREATE INDEX IF NOT EXISTS instances_unit ON instances(unit_key);
+CREATE INDEX IF NOT EXISTS instances_architecture ON instances(architecture_id);
+"""
+
+def _span(node):
+    return node.span if node.span is not None else (None, None)
+
+class DesignIndex:
+    """SQLite index of the design units found in a VHDL project.
+
+    Every indexed file is recorded with its mtime, size and SHA-256. update()
+    only re-parses files whose content actually changed (an mtime bump alone
+    just refreshes the stored stat) and drops files that have disappeared, so
+    refreshing a large tree after a small edit costs a stat per file. Lookups
+    are case-insensitive, as VHDL identifiers are.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
+        self.path = path
+        self.time_budget = time_budget
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(_SCHEMA)
+        self._check_version()
+
+    def __enter__(self) -> 'DesignIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _check_version(self) -> None:
+        """A parser upgrade may extract different data, so start from scratch."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+        if row is None or row['value'] != PARSER_VERSION:
+            with self.db:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('parser_version', ?)",
+                                (PARSER_VERSION,))
+
+    # Indexing
+
+    def _store_units(self, file_id: int, content: bytes) -> None:
+        for unit in VHDLParser(content, self.time_budget).iter_units():
+            start, end = _span(unit)
+            if isinstance(unit, Entity):
+                entity_id = self.db.execute(
+                    "INSERT INTO entities (file_id, name, key, start, end) VALUES (?, ?, ?, ?, ?)",
+                    (file_id, unit.name, unit.name.lower(), start, end)).lastrowid
+                self.db.executemany(
+                    "INSERT INTO generics VALUES (?, ?, ?, ?, ?)",
+                    [(entity_id, i, g.name, g.data_type, g.default_value) for i, g in enumerate(unit.generics)])
+                self.db.executemany(
+                    "INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(entity_id, i, p.name, p.direction, p.data_type, p.width, p.default_value)
+                     for i, p in enumerate(unit.ports)])
+            elif isinstance(unit, Architecture):
+                architecture_id = self.db.execute(
+                    "INSERT INTO architectures (file_id, name, entity_name, entity_key, start, end) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_id, unit.name, unit.entity_name, unit.entity_name.lower(), start, end)).lastrowid
+                self.db.executemany(
+                    "INSERT INTO instances VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(architecture_id, i.label, i.kind, i.unit, i.unit.lower(), i.library, i.architecture)
+                     for i in unit.instances])
+            elif isinstance(unit, Package):
+                self.db.execute(
+                    "INSERT INTO packages (file_id, name, key, body, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_id, unit.name, unit.name.lower(), int(unit.body), start, end))
+
+    def index_file(self, path: str, force: bool = False) -> str:
+        """Bring one file up to date. Returns 'unchanged', 'touched', 'indexed' or 'error'."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.db.execute("SELECT id, mtime_ns, size, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        if not force and row is not None and row['mtime_ns'] == stat.st_mtime_ns and row['size'] == stat.st_size:
+            return 'unchanged'
+
+        sha256 = file_digest(path)
+        with self.db:
+            if not force and row is not None and row['sha256'] == sha256:
+                self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                                (stat.st_mtime_ns, stat.st_size, row['id']))
+                return 'touched'
+
+            if row is not None:
+                self.db.execute("DELETE FROM files WHERE id = ?", (row['id'],))
+            file_id = self.db.execute(
+                "INSERT INTO files (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, sha256)).lastrowid
+
+            with open(path, 'rb') as f:
+                content = f.read()
+            try:
+                self._store_units(file_id, content)
+            except Exception as e:
+                # Keep the file row (and its hash) so a broken file is not re-parsed until it changes
+                for table in ('entities', 'architectures', 'packages'):
+                    self.db.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+                self.db.execute("UPDATE files SET error = ? WHERE id = ?", (f"{type(e).__name__}: {e}", file_id))
+                return 'error'
+        return 'indexed'
+
+    def update(self, root: str, force: bool = False) -> Dict:
+        """Index every VHDL file below root and forget indexed files under root that no longer exist."""
+        started = time.perf_counter()
+        counts = {"unchanged": 0, "touched": 0, "indexed": 0, "error": 0, "removed": 0}
+        seen = set()
+        for path in find_vhdl_files(root):
+            path = os.path.abspath(path)
+            seen.add(path)
+            counts[self.index_file(path, force)] += 1
+
+        prefix = os.path.join(os.path.abspath(root), '')
+        stale = [row['id'] for row in self.db.execute("SELECT id, path FROM files")
+                 if row['path'].startswith(prefix) and row['path'] not in seen]
+        with self.db:
+            self.db.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id in stale])
+        counts["removed"] = len(stale)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        return counts
+
+    # Queries
+
+    def find_entity(self, name: str) -> List[Dict]:
+        """Files defining an entity, as [{"name", "file", "span"}]."""
+        rows = self.db.execute(
+            "SELECT e.name, f.path, e.start, e.end FROM entities e JOIN files f ON f.id = e.file_id "
+            "WHERE e.key = ? ORDER BY f.path", (name.lower(),))
+        return [{"name": r['name'], "file": r['path'], "span": [r['start'], r['end']]} for r in rows]
+
+    def entity(self, name: str) -> Optional[Dict]:
+        """First indexed definition of an entity, in the parser's vhdl_entity JSON form plus its file."""
+        row = self.db.execute(
+            "SELECT e.id, e.name, f.path FROM entities e JOIN files f ON f.id = e.file_id "
+            "WHERE e.key = ? ORDER BY f.path LIMIT 1", (name.lower(),)).fetchone()
+        if row is None:
+            return None
+        generics = self.db.execute(
+            "SELECT name, data_type, default_value FROM generics WHERE entity_id = ? ORDER BY position",
+            (row['id'],))
+        ports = self.db.execute(
+            "SELECT name, direction, data_type, width, default_value FROM ports WHERE entity_id = ? "
+            "ORDER BY position", (row['id'],))
+        return {
+            "name": row['name'],
+            "file": row['path'],
+            "generics": [dict(g) for g in generics],
+            "ports": [dict(p, range=None) for p in ports]
+        }
+
+    def architectures_of(self, entity_name: str) -> List[Dict]:
+        rows = self.db.execute(
+            "SELECT a.name, a.entity_name, f.path FROM architectures a JOIN files f ON f.id = a.file_id "
+            "WHERE a.entity_key = ? ORDER BY f.path, a.start", (entity_name.lower(),))
+        return [{"name": r['name'], "entity_name": r['entity_name'], "file": r['path']} for r in rows]
+
+    def find_package(self, name: str) -> List[Dict]:
+        """Files declaring a package or its body."""
+        rows = self.db.execute(
+            "SELECT p.name, p.body, f.path FROM packages p JOIN files f ON f.id = p.file_id "
+            "WHERE p.key = ? ORDER BY p.body, f.path", (name.lower(),))
+        return [{"name": r['name'], "body": bool(r['body']), "file": r['path']} for r in rows]
+
+    def instances_in(self, entity_name: str) -> List[Dict]:
+        """Units instantiated by the architectures of an entity."""
+        rows = self.db.execute(
+            "SELECT a.name AS arch, i.label, i.kind, i.unit, i.library, i.architecture, f.path "
+            "FROM instances i JOIN architectures a ON a.id = i.architecture_id "
+            "JOIN files f ON f.id = a.file_id WHERE a.entity_key = ? ORDER BY f.path, a.start",
+            (entity_name.lower(),))
+        return [{"in_architecture": r['arch'], "label": r['label'], "kind": r['kind'], "unit": r['unit'],
+                 "library": r['library'], "architecture": r['architecture'], "file": r['path']} for r in rows]
+
+    def users_of(self, unit_name: str) -> List[Dict]:
+        """Architectures that instantiate the given entity, component or configuration."""
+        rows = self.db.execute(
+            "SELECT a.entity_name, a.name AS arch, i.label, i.kind, f.path "
+            "FROM instances i JOIN architectures a ON a.id = i.architecture_id "
+            "JOIN files f ON f.id = a.file_id WHERE i.unit_key = ? ORDER BY f.path, a.start",
+            (unit_name.lower(),))
+        return [{"entity_name": r['entity_name'], "architecture": r['arch'], "label": r['label'],
+                 "kind": r['kind'], "file": r['path']} for r in rows]
+
+    def files_for(self, entity_name: str) -> List[str]:
+        """Files that must be analyzed for an entity: its own hierarchy, leaves first.
+
+        Component and entity instances are followed through the index; units
+        that are not indexed (vendor libraries, missing files) are skipped.
+        """
+        ordered: List[str] = []
+        visiting = set()
+
+        def visit(key: str) -> None:
+            if key in visiting:
+                return
+            visiting.add(key)
+            for inst in self.instances_in(key):
+                visit(inst['unit'].lower())
+            definitions = self.find_entity(key)
+            if not definitions:
+                return
+            # Like entity(), the first definition wins when several files declare the same entity
+            entity_file = definitions[0]['file']
+            architectures = self.architectures_of(key)
+            arch_files = [a['file'] for a in architectures if a['file'] == entity_file] or \
+                [a['file'] for a in architectures]
+            for path in [entity_file] + arch_files:
+                if path not in ordered:
+                    ordered.append(path)
+
+        visit(entity_name.lower())
+        return ordered
+
+    def stats(self) -> Dict:
+        counts = {}
+        for table in ('files', 'entities', 'architectures', 'packages', 'instances'):
+            counts[table] = self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        counts["errors"] = self.db.execute("SELECT COUNT(*) FROM files WHERE error IS NOT NULL").fetchone()[0]
+        return {"index": self.path, "parser_version": PARSER_VERSION, **counts}
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Build and query the project-wide VHDL design-unit index.")
+    arg_parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="SQLite index path")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser("update", help="Index new and changed files below a directory")
+    update.add_argument("root")
+    update.add_argument("--force", action="store_true", help="Re-parse every file")
+    for name, help_text in (("find", "Files defining an entity"),
+                            ("entity", "Ports and generics of an entity"),
+                            ("package", "Files declaring a package"),
+                            ("deps", "Units instantiated by an entity"),
+                            ("users", "Architectures instantiating a unit"),
+                            ("files", "Files needed to analyze an entity, leaves first")):
+        commands.add_parser(name, help=help_text).add_argument("name")
+    commands.add_parser("stats", help="Index statistics")
+    args = arg_parser.parse_args()
+
+    with DesignIndex(args.index) as index:
+        if args.command == "update":
+            result = index.update(args.root, args.force)
+        elif args.command == "find":
+            result = index.find_entity(args.name)
+        elif args.command == "entity":
+            result = index.entity(args.name)
+        elif args.command == "package":
+            result = index.find_package(args.name)
+        elif args.command == "deps":
+            result = index.instances_in(args.name)
+        elif args.command == "users":
+            result = index.users_of(args.name)
+        elif args.command == "files":
+            result = index.files_for(args.name)
+        else:
+            result = index.stats()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+import os
+import sys
+import zlib
+import gzip
+import heapq
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .vcd_reader import VCDSignal, ValueChange
+except ImportError:
+    from vcd_reader import VCDSignal, ValueChange
+
+# Block types of the FST format (GTKWave's fstapi)
+FST_BL_HDR = 0
+FST_BL_VCDATA = 1
+FST_BL_BLACKOUT = 2
+FST_BL_GEOM = 3
+FST_BL_HIER = 4
+FST_BL_VCDATA_DYN_ALIAS = 5
+FST_BL_HIER_LZ4 = 6
+FST_BL_HIER_LZ4DUO = 7
+FST_BL_VCDATA_DYN_ALIAS2 = 8
+FST_BL_ZWRAPPER = 254
+FST_BL_SKIP = 255
+_VC_BLOCKS = (FST_BL_VCDATA, FST_BL_VCDATA_DYN_ALIAS, FST_BL_VCDATA_DYN_ALIAS2)
+
+# Hierarchy records
+FST_ST_GEN_ATTRBEGIN = 252
+FST_ST_GEN_ATTREND = 253
+FST_ST_VCD_SCOPE = 254
+FST_ST_VCD_UPSCOPE = 255
+
+_VAR_TYPES = ("event", "integer", "parameter", "real", "real_parameter", "reg", "supply0", "supply1",
+              "time", "tri", "triand", "trior", "trireg", "tri0", "tri1", "wand", "wire", "wor", "port",
+              "sparray", "realtime", "string", "bit", "logic", "int", "shortint", "longint", "byte",
+              "enum", "shortreal")
+# Non-binary scalar values, indexed by bits 1-3 of their varint
+_SCALAR_CODES = "xzhuwl-?"
+# Geometry lengths of reals (8-byte doubles) and of variable-length values
+# (strings, as GHDL dumps enumerations)
+_REAL_LENGTH = 0
+_STRING_LENGTH = 0xFFFFFFFF
+_TIME_UNITS = ((0, 's'), (-3, 'ms'), (-6, 'us'), (-9, 'ns'), (-12, 'ps'), (-15, 'fs'))
+
+def _varint(data, pos: int) -> Tuple[int, int]:
+    """(value, next position) of an unsigned LEB128 varint"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _svarint(data, pos: int) -> Tuple[int, int]:
+    """(value, next position) of a signed LEB128 varint"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            if byte & 0x40:
+                value -= 1 << shift
+            return value, pos
+
+def _cstring(data, pos: int) -> Tuple[str, int]:
+    end = data.index(0, pos)
+    return data[pos:end].decode('utf-8', 'replace'), end + 1
+
+def lz4_block_decompress(src: bytes, uncompressed_size: int) -> bytes:
+    """Decode one raw LZ4 block (no frame header), as written by LZ4_compress_default"""
+    dst = bytearray()
+    pos, end = 0, len(src)
+    while pos < end:
+        token = src[pos]
+        pos += 1
+        length = token >> 4
+        if length == 15:
+            while True:
+                byte = src[pos]
+                pos += 1
+                length += byte
+                if byte != 255:
+                    break
+        dst += src[pos:pos + length]
+        pos += length
+        if pos >= end:
+            break  # The last sequence has literals only
+        offset = src[pos] | (src[pos + 1] << 8)
+        pos += 2
+        if offset == 0 or offset > len(dst):
+            raise ValueError("Corrupt LZ4 block: bad match offset")
+        length = token & 15
+        if length == 15:
+            while True:
+                byte = src[pos]
+                pos += 1
+                length += byte
+                if byte != 255:
+                    break
+        length += 4
+        start = len(dst) - offset
+        if offset >= length:
+            dst += dst[start:start + length]
+        else:
+            # Overlapping match: repeat the last offset bytes
+            for index in range(length):
+                dst.append(dst[start + index])
+    if len(dst) != uncompressed_size:
+        raise ValueError(f"Corrupt LZ4 block: {len(dst)} bytes decoded, {uncompressed_size} expected")
+    return bytes(dst)
+
+def fastlz_decompress(src: bytes, uncompressed_size: int) -> bytes:
+    """Decode a FastLZ (level 1 or 2) buffer"""
+    level = (src[0] >> 5) + 1
+    dst = bytearray()
+    pos, end = 1, len(src)
+    ctrl = src[0] & 31
+    while True:
+        if ctrl >= 32:
+            length = (ctrl >> 5) - 1
+            offset = (ctrl & 31) << 8
+            if length == 6:
+                if level == 1:
+                    length += src[pos]
+                    pos += 1
+                else:
+                    while True:
+                        code = src[pos]
+                        pos += 1
+                        length += code
+                        if code != 255:
+                            break
+            code = src[pos]
+            pos += 1
+            reference = len(dst) - offset - code
+            if level == 2 and code == 255 and offset == 31 << 8:
+                # Match from a 16-bit distance
+                offset = (src[pos] << 8) + src[pos + 1]
+                pos += 2
+                reference = len(dst) - offset - 8191
+            reference -= 1
+            if reference < 0:
+                raise ValueError("Corrupt FastLZ block: bad match offset")
+            for index in range(length + 3):
+                dst.append(dst[reference + index])
+        else:
+            ctrl += 1
+            dst += src[pos:pos + ctrl]
+            pos += ctrl
+        if pos >= end:
+            break
+        ctrl = src[pos]
+        pos += 1
+    if len(dst) != uncompressed_size:
+        raise ValueError(f"Corrupt FastLZ block: {len(dst)} bytes decoded, {uncompressed_size} expected")
+    return bytes(dst)
+
+@dataclass
+class _Block:
+    """Location of a value change block; its contents are read on demand"""
+    kind: int
+    offset: int  # of the section length field
+    length: int
+    start_time: int
+    end_time: int
+
+class FSTReader:
+    """Reader of GTKWave's FST waveform format, in pure Python.
+
+    Opening a file reads only its small header, geometry and hierarchy
+    blocks and records where each value change block lies. Value changes
+    are decompressed lazily: changes() visits only the blocks overlapping
+    the requested time range and, within a block, only the change chains
+    of the requested signals. A file compressed as a whole (ZWRAPPER, as
+    GHDL writes it) is inflated into memory first.
+
+    The interface mirrors VCDReader: signals maps an id code (the FST
+    handle, as a string) to its variables, and iterating yields
+    ValueChange(time, id_code, value) with scalars as '0'/'1'/'x'/...,
+    vectors as bit strings, reals as floats and strings (GHDL dumps
+    enumerations as such) as text.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data and data[0] == FST_BL_ZWRAPPER:
+            data = gzip.decompress(data[17:])
+        self._data = data
+
+        self.signals: Dict[str, List[VCDSignal]] = {}
+        self.timescale: Tuple[int, str] = (1, 's')
+        self.start_time = self.end_time = 0
+        self.version = self.date = None
+        self._lengths: List[int] = []
+        self._big_endian_reals = False
+        self._blocks: List[_Block] = []
+        self._read_blocks()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._data = b''
+
+    @property
+    def timescale_fs(self) -> int:
+        magnitude, unit = self.timescale
+        return magnitude * dict((u, 10 ** (e + 15)) for e, u in _TIME_UNITS)[unit]
+
+    @property
+    def block_count(self) -> int:
+        return len(self._blocks)
+
+    def _read_blocks(self) -> None:
+        data = self._data
+        pos = 0
+        while pos + 9 <= len(data):
+            kind = data[pos]
+            length = struct.unpack_from('>Q', data, pos + 1)[0]
+            body = pos + 1
+            if kind == FST_BL_HDR:
+                self._read_header(body)
+            elif kind in _VC_BLOCKS:
+                start_time, end_time = struct.unpack_from('>QQ', data, body + 8)
+                self._blocks.append(_Block(kind, body, length, start_time, end_time))
+            elif kind == FST_BL_GEOM:
+                self._read_geometry(body, length)
+            elif kind in (FST_BL_HIER, FST_BL_HIER_LZ4, FST_BL_HIER_LZ4DUO):
+                self._read_hierarchy(kind, body, length)
+            elif kind not in (FST_BL_BLACKOUT, FST_BL_SKIP):
+                raise ValueError(f"{self.path}: unknown FST block type {kind} at offset {pos}")
+            if length == 0:
+                break  # A writer that died leaves an unfinished block
+            pos = body + length
+
+    def _read_header(self, body: int) -> None:
+        data = self._data
+        self.start_time, self.end_time = struct.unpack_from('>QQ', data, body + 8)
+        self._big_endian_reals = struct.unpack_from('>d', data, body + 24)[0] == 2.718281828459045
+        exponent = struct.unpack_from('>b', data, body + 72)[0]
+        # e.g. -14 is 10 fs: pick the unit at or below the exponent
+        for unit_exponent, unit in _TIME_UNITS:
+            if exponent >= unit_exponent:
+                self.timescale = (10 ** (exponent - unit_exponent), unit)
+                break
+        self.version = data[body + 73:body + 73 + 128].split(b'\0', 1)[0].decode('utf-8', 'replace')
+        self.date = data[body + 201:body + 201 + 26].split(b'\0', 1)[0].decode('utf-8', 'replace').strip()
+
+    def _read_geometry(self, body: int, length: int) -> None:
+        data = self._data
+        uncompressed, count = struct.unpack_from('>QQ', data, body + 8)
+        compressed = length - 24
+        geometry = data[body + 24:body + 24 + compressed]
+        if compressed != uncompressed:
+            geometry = zlib.decompress(geometry)
+        pos = 0
+        self._lengths = []
+        for _ in range(count):
+            value, pos = _varint(geometry, pos)
+            self._lengths.append(value)
+
+    def _read_hierarchy(self, kind: int, body: int, length: int) -> None:
+        data = self._data
+        uncompressed = struct.unpack_from('>Q', data, body + 8)[0]
+        if kind == FST_BL_HIER:
+            hierarchy = gzip.decompress(data[body + 16:body + length])
+        elif kind == FST_BL_HIER_LZ4:
+            hierarchy = lz4_block_decompress(data[body + 16:body + length], uncompressed)
+        else:
+            # Compressed twice; the varint is the size after the first pass
+            intermediate, pos = _varint(data, body + 16)
+            once = lz4_block_decompress(data[pos:body + length], intermediate)
+            hierarchy = lz4_block_decompress(once, uncompressed)
+
+        scope: List[str] = []
+        handles = 0
+        pos = 0
+        while pos < len(hierarchy):
+            tag = hierarchy[pos]
+            pos += 1
+            if tag == FST_ST_VCD_SCOPE:
+                pos += 1  # Scope type
+                name, pos = _cstring(hierarchy, pos)
+                _, pos = _cstring(hierarchy, pos)  # Component
+                scope.append(name)
+            elif tag == FST_ST_VCD_UPSCOPE:
+                if scope:
+                    scope.pop()
+            elif tag == FST_ST_GEN_ATTRBEGIN:
+                pos += 2  # Attribute type and subtype
+                _, pos = _cstring(hierarchy, pos)
+                _, pos = _varint(hierarchy, pos)
+            elif tag == FST_ST_GEN_ATTREND:
+                pass
+            else:
+                pos += 1  # Direction
+                reference, pos = _cstring(hierarchy, pos)
+                size, pos = _varint(hierarchy, pos)
+                alias, pos = _varint(hierarchy, pos)
+                if alias == 0:
+                    handles += 1
+                    alias = handles
+                var_type = _VAR_TYPES[tag] if tag < len(_VAR_TYPES) else "wire"
+                signal = VCDSignal(str(alias), '.'.join(scope + [reference]), reference, var_type, size)
+                self.signals.setdefault(signal.id_code, []).append(signal)
+
+    def _handle_length(self, handle: int) -> int:
+        return self._lengths[handle - 1]
+
+    def _decode_value(self, data, pos: int, length: int):
+        """(value, next position) of a frame value"""
+        if length == _REAL_LENGTH:
+            value = struct.unpack_from('>d' if self._big_endian_reals else '<d', data, pos)[0]
+            return value, pos + 8
+        return data[pos:pos + length].decode('ascii', 'replace'), pos + length
+
+    def _block_times(self, block: _Block) -> List[int]:
+        data = self._data
+        end = block.offset + block.length
+        uncompressed, compressed, count = struct.unpack_from('>QQQ', data, end - 24)
+        table = data[end - 24 - compressed:end - 24]
+        if compressed != uncompressed:
+            table = zlib.decompress(table)
+        times = []
+        time = pos = 0
+        for _ in range(count):
+            delta, pos = _varint(table, pos)
+            time += delta
+            times.append(time)
+        return times
+
+    def _block_frame(self, block: _Block, handles: Optional[Iterable[int]]) -> Tuple[Dict[int, object], int]:
+        """(values of the handles at the start of the block, position after the frame)"""
+        data = self._data
+        pos = block.offset + 32
+        uncompressed, pos = _varint(data, pos)
+        compressed, pos = _varint(data, pos)
+        count, pos = _varint(data, pos)
+        frame = data[pos:pos + compressed]
+        if compressed != uncompressed:
+            frame = zlib.decompress(frame)
+        wanted = None if handles is None else set(handles)
+        values = {}
+        offset = 0
+        for handle in range(1, count + 1):
+            length = self._handle_length(handle)
+            width = 8 if length == _REAL_LENGTH else 0 if length == _STRING_LENGTH else length
+            # The frame has no room for variable-length values
+            if length != _STRING_LENGTH and (wanted is None or handle in wanted):
+                values[handle] = self._decode_value(frame, offset, length)[0]
+            offset += width
+        return values, pos + compressed
+
+    def _chain_table(self, block: _Block, vc_start: int, index_end: int) -> Tuple[List[int], List[int]]:
+        """Per handle (0-based) offset of its change chain from vc_start, and its length"""
+        data = self._data
+        chain_length = struct.unpack_from('>Q', data, index_end)[0]
+        index_start = index_end - chain_length
+        chains = data[index_start:index_end]
+        offsets: List[int] = []
+        lengths: List[int] = []
+        previous = -1  # index of the last chain with data
+        value = 0
+        pos = 0
+
+        def add_chain(position: int) -> None:
+            nonlocal previous
+            if previous >= 0:
+                lengths[previous] = position - offsets[previous]
+            offsets.append(position)
+            lengths.append(0)
+            previous = len(offsets) - 1
+
+        if block.kind == FST_BL_VCDATA_DYN_ALIAS2:
+            alias = 0
+            while pos < len(chains):
+                if chains[pos] & 1:
+                    shifted, pos = _svarint(chains, pos)
+                    shifted >>= 1
+                    if shifted > 0:
+                        value += shifted
+                        add_chain(value)
+                    else:
+                        # Negative: this handle repeats the chain of handle -shifted;
+                        # zero: it repeats the previous alias
+                        if shifted < 0:
+                            alias = shifted
+                        offsets.append(0)
+                        lengths.append(alias)
+                else:
+                    skip, pos = _varint(chains, pos)
+                    offsets.extend([0] * (skip >> 1))
+                    lengths.extend([0] * (skip >> 1))
+        else:
+            while pos < len(chains):
+                entry, pos = _varint(chains, pos)
+                if entry == 0:
+                    alias, pos = _varint(chains, pos)
+                    offsets.append(0)
+                    lengths.append(-alias)
+                elif entry & 1:
+                    value += entry >> 1
+                    add_chain(value)
+                else:
+                    offsets.extend([0] * (entry >> 1))
+                    lengths.extend([0] * (entry >> 1))
+        if previous >= 0:
+            lengths[previous] = (index_start - vc_start) - offsets[previous]
+
+        for index, (offset, length) in enumerate(zip(offsets, lengths)):
+            if length < 0 and offset == 0:
+                source = -length - 1
+                if source < index:
+                    offsets[index], lengths[index] = offsets[source], lengths[source]
+        return offsets, lengths
+
+    def _decode_chain(self, chain: bytes, length: int, times: List[int]) -> Iterator[Tuple[int, object]]:
+        pos = 0
+        time_index = 0
+        end = len(chain)
+        if length == 1:
+            while pos < end:
+                code, pos = _varint(chain, pos)
+                if code & 1:
+                    value = _SCALAR_CODES[(code >> 1) & 7]
+                    time_index += code >> 4
+                else:
+                    value = '1' if code & 2 else '0'
+                    time_index += code >> 2
+                yield times[time_index], value
+        else:
+            real_format = '>d' if self._big_endian_reals else '<d'
+            while pos < end:
+                code, pos = _varint(chain, pos)
+                time_index += code >> 1
+                if length == _STRING_LENGTH:
+                    size, pos = _varint(chain, pos)
+                    value = chain[pos:pos + size].decode('utf-8', 'replace')
+                    pos += size
+                elif length == _REAL_LENGTH:
+                    if code & 1:
+                        value = chain[pos:pos + 8].decode('ascii', 'replace')
+                    else:
+                        value = struct.unpack_from(real_format, chain, pos)[0]
+                    pos += 8
+                elif code & 1:
+                    value = chain[pos:pos + length].decode('ascii', 'replace')
+                    pos += length
+                else:
+                    packed = int.from_bytes(chain[pos:pos + (length + 7) // 8], 'big')
+                    # Bits are packed from the MSB of the first byte
+                    value = format(packed >> ((8 - length % 8) % 8), f'0{length}b')
+                    pos += (length + 7) // 8
+                yield times[time_index], value
+
+    def _block_changes(self, block: _Block, handles: Optional[List[int]],
+                       include_frame: bool) -> Iterator[ValueChange]:
+        data = self._data
+        times = self._block_times(block)
+        frame, pos = self._block_frame(block, handles)
+        _, pos = _varint(data, pos)  # Highest handle with changes
+        vc_start = pos
+        pack_type = chr(data[vc_start])
+        end = block.offset + block.length
+        time_compressed = struct.unpack_from('>Q', data, end - 16)[0]
+        offsets, lengths = self._chain_table(block, vc_start, end - 24 - time_compressed - 8)
+
+        wanted = range(1, len(offsets) + 1) if handles is None else handles
+        streams = []
+        if include_frame:
+            streams.append([ValueChange(block.start_time, str(handle), value)
+                            for handle, value in sorted(frame.items())])
+        for handle in wanted:
+            if handle > len(offsets) or not offsets[handle - 1]:
+                continue
+            start = vc_start + offsets[handle - 1]
+            uncompressed, body = _varint(data, start)
+            raw = data[body:start + lengths[handle - 1]]
+            if uncompressed:
+                if pack_type == '4':
+                    raw = lz4_block_decompress(raw, uncompressed)
+                elif pack_type == 'F':
+                    raw = fastlz_decompress(raw, uncompressed)
+                else:
+                    raw = zlib.decompress(raw)
+            id_code = str(handle)
+            streams.append([ValueChange(time, id_code, value)
+                            for time, value in self._decode_chain(raw, self._handle_length(handle), times)])
+        # Order by time; at equal times, by handle as in a VCD
+        yield from heapq.merge(*streams, key=lambda change: (change.time, int(change.id_code)))
+
+    def changes(self, signals: Optional[Iterable[str]] = None, start: Optional[int] = None,
+                end: Optional[int] = None) -> Iterator[ValueChange]:
+        """Value changes of the given id codes (all by default) from start to
+        end inclusive. With start, the window opens with the value of every
+        signal at start (taken from the frame of the first block visited and
+        the changes before start), so it is fully defined from its first time."""
+        handles = None if signals is None else sorted({int(id_code) for id_code in signals})
+        before: Dict[str, object] = {}
+        opened = start is None
+        first = True
+        for block in self._blocks:
+            if end is not None and block.start_time > end:
+                break
+            if start is not None and block.end_time < start:
+                continue
+            for change in self._block_changes(block, handles, include_frame=first):
+                if end is not None and change.time > end:
+                    break
+                if not opened:
+                    if change.time < start:
+                        before[change.id_code] = change.value
+                        continue
+                    yield from self._snapshot(before, start)
+                    opened = True
+                yield change
+            first = False
+        if not opened:
+            yield from self._snapshot(before, start)
+
+    @staticmethod
+    def _snapshot(values: Dict[str, object], time: int) -> Iterator[ValueChange]:
+        for id_code in sorted(values, key=int):
+            yield ValueChange(time, id_code, values[id_code])
+
+    def __iter__(self) -> Iterator[ValueChange]:
+        return self.changes()
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Read the value changes of an FST waveform.")
+    arg_parser.add_argument("fst_file", help="FST file to read")
+    arg_parser.add_argument("--signal", action="append", default=[],
+                            help="Only read signals whose name contains this (repeatable)")
+    arg_parser.add_argument("--start", type=int, default=None, help="First time to read")
+    arg_parser.add_argument("--end", type=int, default=None, help="Last time to read")
+    arg_parser.add_argument("--list", action="store_true", help="Only list the signals")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.fst_file):
+        print(f"Error: {args.fst_file} not found.")
+        sys.exit(1)
+    try:
+        with FSTReader(args.fst_file) as reader:
+            selected = [id_code for id_code, variables in reader.signals.items()
+                        if not args.signal or any(part in v.name for part in args.signal for v in variables)]
+            if args.list:
+                for id_code in selected:
+                    for signal in reader.signals[id_code]:
+                        print(f"{signal.name} ({signal.var_type}, {signal.size} bit(s), handle {id_code})")
+                return
+            for time, id_code, value in reader.changes(selected, args.start, args.end):
+                for signal in reader.signals[id_code]:
+                    print(f"{time} {signal.name} {value}")
+    except (ValueError, OSError, zlib.error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
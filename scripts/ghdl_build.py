@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import subprocess
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from .dependency_graph import DependencyGraph, WORK_LIBRARY
+except ImportError:
+    from dependency_graph import DependencyGraph, WORK_LIBRARY
+
+GHDL = os.environ.get('GHDL', 'ghdl')
+MANIFEST_NAME = '.ghdl_manifest.json'
+
+@dataclass
+class LevelResult:
+    level: int
+    files: List[str]
+    status: str = "ok"
+    seconds: float = 0.0
+    output: str = ""
+
+@dataclass
+class AnalysisResult:
+    levels: List[LevelResult] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(level.status == "ok" for level in self.levels)
+
+def ghdl_options(workdir: Optional[str] = None, std: Optional[str] = None, work: str = WORK_LIBRARY) -> List[str]:
+    """Library options shared by every ghdl -a/-s/-e/-r call of one build."""
+    options = []
+    if std:
+        options.append(f"--std={std}")
+    if work != WORK_LIBRARY:
+        options.append(f"--work={work}")
+    if workdir:
+        options.append(f"--workdir={workdir}")
+    return options
+
+def library_file(workdir: Optional[str] = None, std: Optional[str] = None, work: str = WORK_LIBRARY) -> str:
+    """Path of the work library index GHDL writes, e.g. ./work-obj93.cf."""
+    suffix = std[:2] if std and std[:2] in ('87', '08', '19') else '93'
+    return os.path.join(workdir or '.', f"{work}-obj{suffix}.cf")
+
+@lru_cache(maxsize=None)
+def ghdl_version(ghdl: str = GHDL) -> str:
+    completed = subprocess.run([ghdl, "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    lines = completed.stdout.strip().splitlines()
+    return lines[0] if lines else ""
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def analysis_keys(graph: DependencyGraph, levels: List[List[str]], options: Sequence[str],
+                  ghdl: str = GHDL, digests: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Per-file key over the GHDL version, options, file content and the keys of
+    its dependencies, so an edit makes the file and everything above it stale.
+    digests, keyed by path, memoizes file content hashes across calls."""
+    prefix = json.dumps([ghdl_version(ghdl), list(options)])
+    digests = {} if digests is None else digests
+    keys = {}
+    for level in levels:
+        for path in level:
+            if path not in digests:
+                digests[path] = file_digest(path)
+            digest = hashlib.sha256(prefix.encode('utf-8'))
+            digest.update(digests[path].encode('ascii'))
+            for dependency in sorted(graph.dependencies(path)):
+                digest.update(keys.get(dependency, '').encode('ascii'))
+            keys[path] = digest.hexdigest()
+    return keys
+
+def _load_manifest(path: str) -> Dict[str, str]:
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data.get("files", {}) if isinstance(data, dict) else {}
+
+def _save_manifest(path: str, files: Dict[str, str]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"files": files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _run(command: Sequence[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+def analyze_levels(levels: List[List[str]], workdir: Optional[str] = None, std: Optional[str] = None,
+                   work: str = WORK_LIBRARY, ghdl: str = GHDL) -> AnalysisResult:
+    """Analyze files level by level, stopping at the first level that fails.
+
+    Every ghdl -a rewrites the work library index, so analyses into the same
+    library cannot run side by side; each level is analyzed by one ghdl -a
+    call, which parses every file once. Levels only order the calls and
+    report where a failure happened.
+    """
+    started = time.perf_counter()
+    options = ghdl_options(workdir, std, work)
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+
+    result = AnalysisResult()
+    for number, files in enumerate(levels):
+        level = LevelResult(level=number, files=list(files))
+        level_started = time.perf_counter()
+        result.levels.append(level)
+
+        analysis = _run([ghdl, "-a", *options, *files])
+        level.output = analysis.stdout
+        level.seconds = round(time.perf_counter() - level_started, 3)
+        if analysis.returncode != 0:
+            level.status = "failed"
+            break
+
+    result.seconds = round(time.perf_counter() - started, 3)
+    return result
+
+def analyze(paths: Sequence[str], tops: Sequence[str] = (), workdir: Optional[str] = None,
+            std: Optional[str] = None, work: str = WORK_LIBRARY, ghdl: str = GHDL,
+            incremental: bool = True) -> AnalysisResult:
+    """Analyze the VHDL files under paths in dependency order.
+
+    With tops, only the files needed by those entities are analyzed. Paths
+    are searched in the order given, so list the intended DUT/testbench files
+    before a directory that may hold other copies of the same entities.
+
+    When incremental, the existing work library is reused: a manifest next to
+    it records the analysis key of every file, and only files whose content,
+    dependencies or GHDL options changed since their last successful analysis
+    are passed to ghdl -a.
+    """
+    graph = DependencyGraph.from_paths(paths, work)
+    files = graph.closure(f"entity:{top}" for top in tops) if tops else None
+    levels = graph.levels(files)
+    if not incremental:
+        return analyze_levels(levels, workdir, std, work, ghdl)
+
+    keys = analysis_keys(graph, levels, ghdl_options(workdir, std, work), ghdl)
+    manifest_path = os.path.join(workdir or '.', MANIFEST_NAME)
+    # A deleted or never-built library invalidates everything the manifest claims
+    manifest = _load_manifest(manifest_path) if os.path.exists(library_file(workdir, std, work)) else {}
+
+    stale_levels = [[path for path in level if manifest.get(path) != keys[path]] for level in levels]
+    result = analyze_levels([level for level in stale_levels if level], workdir, std, work, ghdl)
+    result.skipped = [path for level in levels for path in level if manifest.get(path) == keys[path]]
+
+    for level in result.levels:
+        if level.status == "ok":
+            manifest.update((path, keys[path]) for path in level.files)
+    if result.levels:
+        _save_manifest(manifest_path, manifest)
+    return result
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Analyze VHDL files with GHDL in dependency order.")
+    arg_parser.add_argument("paths", nargs="+", help="VHDL files and/or directories, highest priority first")
+    arg_parser.add_argument("--top", action="append", default=[],
+                            help="Only analyze what this entity needs (repeatable)")
+    arg_parser.add_argument("--workdir", default=None, help="GHDL library directory")
+    arg_parser.add_argument("--std", default=None, help="VHDL standard passed to GHDL (e.g. 93c, 08)")
+    arg_parser.add_argument("--work", default=WORK_LIBRARY, help="Name of the work library")
+    arg_parser.add_argument("--ghdl", default=GHDL, help="GHDL executable")
+    arg_parser.add_argument("--full", action="store_true", help="Re-analyze every file, ignoring the manifest")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only print the analysis levels")
+    args = arg_parser.parse_args()
+
+    try:
+        if args.dry_run:
+            graph = DependencyGraph.from_paths(args.paths, args.work)
+            files = graph.closure(f"entity:{top}" for top in args.top) if args.top else None
+            for number, level in enumerate(graph.levels(files)):
+                print(f"Level {number}: {' '.join(os.path.relpath(path) for path in level)}")
+            return
+        result = analyze(args.paths, args.top, args.workdir, args.std, args.work, args.ghdl,
+                         incremental=not args.full)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if result.skipped:
+        print(f"Up to date: {len(result.skipped)} file(s)")
+    for level in result.levels:
+        names = ' '.join(os.path.relpath(path) for path in level.files)
+        print(f"Level {level.level} [{level.status}] {level.seconds:.3f} s: {names}")
+        if level.output:
+            print(level.output, end='' if level.output.endswith('\n') else '\n')
+    if not result.ok:
+        print("Compilation failed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
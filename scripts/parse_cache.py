@@ -0,0 +1,202 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict, Optional, Union, Callable
+
+try:
+    from .vhdl_parser import VHDLParser, PARSER_VERSION
+except ImportError:
+    from vhdl_parser import VHDLParser, PARSER_VERSION
+
+DEFAULT_CACHE_DIR = os.path.join('.vhdl_cache', 'parse')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def _file_mode() -> int:
+    """Mode of a newly created regular file under the process umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+# mkstemp creates files as 0600; cache files get the mode open() would give them.
+# Read once, since changing the umask to read it is not thread-safe.
+FILE_MODE = _file_mode()
+
+class ParseCache:
+    """On-disk cache of parse results keyed by source content.
+
+    Entries are JSON files named after the SHA-256 of the parser version, the
+    result kind and the source bytes, so edits and parser upgrades both miss.
+    A hit refreshes the entry's mtime; when the store grows past max_bytes the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 time_budget: Optional[float] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.time_budget = time_budget
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+
+    def key_for(self, content: Union[str, bytes], kind: str = "module") -> str:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}\0{kind}\0".encode('utf-8'))
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.json'):
+                    yield entry
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self._entries())
+        return self._size
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError):
+            self.invalidate(key)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps(data).encode('utf-8')
+
+        # Write-then-rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._size = self._current_size() + len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Drop one entry, or every entry when no key is given. Returns the count removed."""
+        if key is not None:
+            try:
+                os.remove(self._path(key))
+                self._size = None
+                return 1
+            except FileNotFoundError:
+                return 0
+
+        removed = 0
+        for entry in list(self._entries()):
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self._size = 0
+        return removed
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used entries until the store fits in max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for entry in self._entries():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        size = sum(item[1] for item in entries)
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= limit:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        self._size = size
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            "cache_dir": self.cache_dir,
+            "entries": sum(1 for _ in self._entries()),
+            "bytes": self._current_size(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _lookup(self, content: Union[str, bytes], kind: str, build: Callable[[VHDLParser], Dict]) -> Dict:
+        key = self.key_for(content, kind)
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        data = build(VHDLParser(content, self.time_budget))
+        self.put(key, data)
+        return data
+
+    def parse(self, content: Union[str, bytes], entity_only: bool = False) -> Dict:
+        """Entity/architecture JSON data, as written by VHDLParser.save_to_json()."""
+        def build(parser):
+            parser.parse(entity_only=entity_only)
+            return parser.to_json_data(include_architecture=not entity_only)
+        return self._lookup(content, "entity" if entity_only else "module", build)
+
+    def parse_units(self, content: Union[str, bytes], spans: bool = False) -> Dict:
+        """All design units of the source, as {"vhdl_design_units": [...]}."""
+        return self._lookup(content, "unit-spans" if spans else "units",
+                            lambda parser: {"vhdl_design_units": parser.design_units_data(spans)})
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Inspect or clear the VHDL parse cache.")
+    arg_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    arg_parser.add_argument("--clear", action="store_true", help="Remove every cached entry")
+    arg_parser.add_argument("--max-bytes", type=int, default=None, help="Evict down to this size")
+    args = arg_parser.parse_args()
+
+    cache = ParseCache(args.cache_dir)
+    if args.clear:
+        print(f"Removed {cache.invalidate()} cached parse results")
+    elif args.max_bytes is not None:
+        print(f"Evicted {cache.evict(args.max_bytes)} cached parse results")
+    print(json.dumps(cache.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Stress the VHDL parser with pathological inputs and check it stays linear.
+
+Every case builds a synthetic source at several sizes, parses all of its
+design units under a per-file time budget and compares time per byte between
+the smallest and the largest input. The script exits non-zero if a case runs
+out of budget or its cost per byte grows by more than --max-growth.
+"""
+import sys
+import time
+from typing import Callable, Dict, List
+
+try:
+    from .vhdl_parser import VHDLParser
+except ImportError:
+    from vhdl_parser import VHDLParser
+
+HEADER = "library ieee;\nuse ieee.std_logic_1164.all;\n"
+ENTITY = "entity e is\n  port (clk : in std_logic; a : in std_logic; y : out std_logic);\nend e;\n"
+ARCH_OPEN = "architecture rtl of e is\n  signal s : std_logic;\nbegin\n"
+
+def _unterminated_process(n: int) -> str:
+    return HEADER + ENTITY + ARCH_OPEN + "".join(
+        f"p{i}: process (clk) begin s <= a; -- no end process\n" for i in range(n))
+
+def _nested_parentheses(n: int) -> str:
+    depth = "(" * n + "7" + ")" * n
+    return HEADER + f"entity e is\n  port (d : in std_logic_vector({depth} downto 0));\nend e;\n"
+
+def _unclosed_parentheses(n: int) -> str:
+    return HEADER + ENTITY + ARCH_OPEN + "y <= " + "(a and " * n + "\n"
+
+def _unterminated_strings(n: int) -> str:
+    return HEADER + ENTITY + ARCH_OPEN + "".join(f'report "open string {i}\n' for i in range(n))
+
+def _ticks_and_comments(n: int) -> str:
+    return HEADER + ENTITY + ARCH_OPEN + "".join(
+        f"y <= a'x' /* note {i} */ or s'event; -- '\n" for i in range(n)) + "end rtl;\n"
+
+def _wide_sensitivity(n: int) -> str:
+    names = ", ".join(f"s{i}" for i in range(n))
+    return HEADER + ENTITY + ARCH_OPEN + f"p: process ({names}) begin y <= a; end process;\nend rtl;\n"
+
+def _unterminated_units(n: int) -> str:
+    return HEADER + "".join(f"entity e{i} is port (a : in bit);\n" for i in range(n))
+
+def _long_statement(n: int) -> str:
+    return HEADER + ENTITY + ARCH_OPEN + "y <= a" + " or a" * n + "\n"
+
+def _many_units(n: int) -> str:
+    # ~600 bytes per unit, so scale the count down to keep sizes comparable
+    n = max(1, n // 8)
+    unit = (
+        "entity u{i} is\n  generic (W : integer := 8);\n"
+        "  port (clk, rst : in std_logic; d : in std_logic_vector(W-1 downto 0); q : out std_logic_vector(W-1 downto 0));\n"
+        "end entity u{i};\n"
+        "architecture rtl of u{i} is\n  signal r : std_logic_vector(W-1 downto 0);\nbegin\n"
+        "  g: for k in 0 to 3 generate\n    b: block begin end block;\n  end generate g;\n"
+        "  p: process (clk, rst) begin\n    if rst = '1' then r <= (others => '0');\n"
+        "    elsif rising_edge(clk) then r <= d; end if;\n  end process p;\n"
+        "  q <= r;\nend architecture rtl;\n"
+    )
+    return HEADER + "".join(unit.format(i=i) for i in range(n))
+
+CASES: Dict[str, Callable[[int], str]] = {
+    "unterminated_process": _unterminated_process,
+    "nested_parentheses": _nested_parentheses,
+    "unclosed_parentheses": _unclosed_parentheses,
+    "unterminated_strings": _unterminated_strings,
+    "ticks_and_comments": _ticks_and_comments,
+    "wide_sensitivity": _wide_sensitivity,
+    "unterminated_units": _unterminated_units,
+    "long_statement": _long_statement,
+    "many_units": _many_units,
+}
+
+def time_parse(source: str, time_budget: float, repeat: int = 3) -> float:
+    """Best-of-repeat wall time for a full multi-unit parse of source."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            VHDLParser(source, time_budget).design_units_data()
+        except ValueError:
+            pass  # malformed input may be rejected; only the time matters here
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_case(name: str, build: Callable[[int], str], sizes: List[int], time_budget: float,
+             max_growth: float) -> Dict:
+    result = {"case": name, "runs": [], "status": "ok"}
+    for n in sizes:
+        source = build(n)
+        try:
+            seconds = time_parse(source, time_budget)
+        except TimeoutError as e:
+            result["status"] = "timeout"
+            result["error"] = str(e)
+            return result
+        result["runs"].append({"n": n, "bytes": len(source), "seconds": seconds})
+
+    first, last = result["runs"][0], result["runs"][-1]
+    growth = (last["seconds"] / last["bytes"]) / max(first["seconds"] / first["bytes"], 1e-12)
+    result["growth"] = growth
+    if growth > max_growth:
+        result["status"] = "superlinear"
+    return result
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Check VHDL parse time stays linear on pathological inputs.")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 4000, 8000, 16000],
+                            help="Repetition counts for each synthetic input")
+    arg_parser.add_argument("--time-budget", type=float, default=10.0, help="Per-parse time limit in seconds")
+    arg_parser.add_argument("--max-growth", type=float, default=3.0,
+                            help="Allowed growth of time per byte from the smallest to the largest size")
+    arg_parser.add_argument("cases", nargs="*", help=f"Subset of cases to run ({', '.join(CASES)})")
+    args = arg_parser.parse_args()
+
+    failed = False
+    for name in args.cases or CASES:
+        result = run_case(name, CASES[name], sorted(args.sizes), args.time_budget, args.max_growth)
+        if result["status"] == "timeout":
+            print(f"{name:24} TIMEOUT  {result['error']}")
+        else:
+            last = result["runs"][-1]
+            print(f"{name:24} {result['status']:11} {last['bytes']:>10} bytes  {last['seconds']:.3f} s  "
+                  f"growth x{result['growth']:.2f}")
+        failed = failed or result["status"] != "ok"
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
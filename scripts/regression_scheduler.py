@@ -0,0 +1,114 @@
+import os
+import re
+import json
+import heapq
+import tempfile
+from statistics import median
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .vhdl_parser import VHDLParser, Architecture, map_vhdl_file
+except ImportError:
+    from vhdl_parser import VHDLParser, Architecture, map_vhdl_file
+
+DEFAULT_HISTORY_PATH = os.path.join('.vhdl_cache', 'sim_history.json')
+
+# Weight of the newest run in the smoothed runtime
+_SMOOTHING = 0.5
+# Heuristic cost model for testbenches that have never run (seconds)
+_BASE_SECONDS = 0.5
+_SECONDS_PER_PORT = 0.02
+_SECONDS_PER_WAIT = 0.005
+
+_WAIT_FOR_RE = re.compile(rb'\bwait\s+for\b', re.IGNORECASE)
+
+class RuntimeHistory:
+    """Smoothed wall-clock time per testbench, kept in a small JSON file."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f).get("testbenches", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            self.entries = {}
+
+    def get(self, testbench: str) -> Optional[float]:
+        entry = self.entries.get(testbench.lower())
+        return entry["seconds"] if entry else None
+
+    def record(self, testbench: str, seconds: float, features: Optional[Tuple[int, int]] = None) -> None:
+        key = testbench.lower()
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = {"seconds": seconds, "runs": 0}
+        else:
+            entry["seconds"] = _SMOOTHING * seconds + (1 - _SMOOTHING) * entry["seconds"]
+        entry["runs"] += 1
+        entry["last_seconds"] = seconds
+        if features is not None:
+            entry["ports"], entry["waits"] = features
+        self.entries[key] = entry
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"testbenches": self.entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+def testbench_features(path: str) -> Tuple[int, int]:
+    """(ports, wait statements) of a testbench file.
+
+    The generated testbenches declare one signal per DUT port, so the signal
+    count of the first architecture stands in for the port count; the number
+    of 'wait for' statements measures the stimulus length.
+    """
+    content = map_vhdl_file(path)
+    ports = 0
+    for unit in VHDLParser(content).iter_units():
+        if isinstance(unit, Architecture):
+            ports = len(unit.signals)
+            break
+    return ports, len(_WAIT_FOR_RE.findall(content))
+
+def heuristic_seconds(features: Tuple[int, int]) -> float:
+    ports, waits = features
+    return _BASE_SECONDS + ports * _SECONDS_PER_PORT + waits * _SECONDS_PER_WAIT
+
+def estimate_runtimes(testbenches: Sequence[str], features: Sequence[Tuple[int, int]],
+                      history: RuntimeHistory) -> List[float]:
+    """Expected seconds per testbench: its history when known, otherwise the
+    heuristic scaled by how far the heuristic was off for tests with history."""
+    ratios = []
+    for name, entry in history.entries.items():
+        if "ports" in entry:
+            predicted = heuristic_seconds((entry["ports"], entry["waits"]))
+            ratios.append(entry["seconds"] / predicted)
+    scale = median(ratios) if ratios else 1.0
+
+    estimates = []
+    for testbench, job_features in zip(testbenches, features):
+        known = history.get(testbench)
+        estimates.append(known if known is not None else heuristic_seconds(job_features) * scale)
+    return estimates
+
+def lpt_order(estimates: Sequence[float]) -> List[int]:
+    """Indices by decreasing estimate. Handing jobs to a pool of identical
+    workers in this order is longest-processing-time-first scheduling."""
+    return sorted(range(len(estimates)), key=lambda i: (-estimates[i], i))
+
+def predicted_makespan(estimates: Sequence[float], workers: int, order: Optional[Sequence[int]] = None) -> float:
+    """Finish time of list scheduling the jobs in order on `workers` workers."""
+    order = lpt_order(estimates) if order is None else order
+    loads = [0.0] * max(1, workers)
+    for index in order:
+        heapq.heapreplace(loads, loads[0] + estimates[index])
+    return max(loads)
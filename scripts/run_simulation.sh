@@ -24,19 +24,19 @@ fi
 # Create simulation directories if they don't exist
 mkdir -p sim
 
-# Step 1: Remove unnecessary or old simulation files
-rm -f *.o work-obj93.cf sim/*.fst sim/*.vcd sim/*.ghw sim/*.fst.hier
+# Step 1: Remove old waveforms; the work library is kept and only stale files are re-analyzed
+rm -f sim/*.fst sim/*.vcd sim/*.ghw sim/*.fst.hier
 
-# Step 2: Compile the VHDL files
+# Step 2: Compile the VHDL files, sub-components and work packages in dependency order
+TESTBENCH_NAME="${ENTITY_NAME}_tb"
 echo "Compiling VHDL files..."
-ghdl -a "$VHDL_MODULE" "$TESTBENCH"
+python3 "$(dirname "$0")/ghdl_build.py" --top "$TESTBENCH_NAME" "$VHDL_MODULE" "$TESTBENCH" src
 if [ $? -ne 0 ]; then
     echo "Compilation failed."
     exit 1
 fi
 
 # Step 3: Elaborate the Testbench
-TESTBENCH_NAME="${ENTITY_NAME}_tb"
 echo "Elaborating the testbench..."
 ghdl -e "$TESTBENCH_NAME"
 if [ $? -ne 0 ]; then
@@ -45,8 +45,12 @@ if [ $? -ne 0 ]; then
 fi
 
 # Step 4: Run the Simulation and Generate FST Waveform
-echo "Running simulation..."
-ghdl -r "$TESTBENCH_NAME" --fst="sim/${TESTBENCH_NAME}.fst" --stop-time=1000ns > sim/simulation.log
+# The generator records the exact stimulus length in the testbench header
+# (file-driven testbenches: the current length of their stimulus file)
+STOP_TIME=$(python3 -c 'import sys; sys.path.insert(0, sys.argv[1]); from testbench_generator import read_stop_time; print(read_stop_time(sys.argv[2]) or "")' "$(dirname "$0")" "$TESTBENCH")
+STOP_TIME=${STOP_TIME:-1000ns}
+echo "Running simulation for $STOP_TIME..."
+ghdl -r "$TESTBENCH_NAME" --fst="sim/${TESTBENCH_NAME}.fst" --stop-time="$STOP_TIME" > sim/simulation.log
 if [ $? -ne 0 ]; then
     echo "Simulation failed."
     exit 1
@@ -0,0 +1,125 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from dataclasses import asdict, fields
+from typing import Dict, Optional
+
+try:
+    from .dependency_graph import DependencyGraph, SourceFile
+    from .ghdl_build import analysis_keys, file_digest, ghdl_options, GHDL
+except ImportError:
+    from dependency_graph import DependencyGraph, SourceFile
+    from ghdl_build import analysis_keys, file_digest, ghdl_options, GHDL
+
+DEFAULT_SIM_CACHE_DIR = os.path.join('.vhdl_cache', 'sim')
+
+# Only deterministic verdicts are worth replaying; errors and timeouts are retried
+CACHEABLE_STATUSES = ("passed", "failed")
+
+class SimulationCache:
+    """Stored simulation verdicts, logs and waveforms keyed by everything that
+    can change the outcome.
+
+    The key covers the analysis key of every file in the testbench's
+    dependency closure (content hashes chained through dependencies, the
+    GHDL version and options), the content of the data files it reads at run
+    time (stimulus files), the stop time, the generics and the waveform
+    format. Each entry is a directory holding result.json, the log and the
+    waveform; a hit hands these back without starting GHDL.
+
+    Scanned sources and content hashes are kept for the life of the instance,
+    so the jobs of one regression parse and hash each file once; a lock
+    serializes key computation, since run_regression calls it from its
+    worker threads. Sources are assumed not to change while it is in use;
+    create one per regression.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_SIM_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._scanned: Dict[str, SourceFile] = {}
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _digest(self, path: str) -> str:
+        with self._lock:
+            if path not in self._digests:
+                self._digests[path] = file_digest(path)
+            return self._digests[path]
+
+    def key_for(self, job, std: Optional[str] = None, ghdl: str = GHDL) -> str:
+        with self._lock:
+            graph = DependencyGraph.from_paths(job.sources, scanned=self._scanned)
+            levels = graph.levels(graph.closure([f"entity:{job.testbench}"]))
+            keys = analysis_keys(graph, levels, ghdl_options(None, std), ghdl, self._digests)
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "testbench": job.testbench.lower(),
+            "files": sorted(keys.values()),
+            "inputs": sorted(self._digest(path) for path in job.inputs),
+            "stop_time": job.stop_time,
+            "generics": sorted((name.lower(), str(value)) for name, value in job.generics.items()),
+            "wave": job.wave
+        }).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key: str, result_type):
+        """The cached result as a result_type (JobResult) instance, or None."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'result.json'), 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        known = {f.name for f in fields(result_type)}
+        result = result_type(**{name: value for name, value in data.items() if name in known and name != 'steps'})
+        result.workdir = os.path.abspath(entry)
+        result.cached = True
+        for name in ('log', 'wave'):
+            stored = data.get(name)
+            setattr(result, name, os.path.join(result.workdir, stored) if stored else None)
+        if result.wave and not os.path.exists(result.wave):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result) -> bool:
+        """Store a passed/failed result with copies of its log and waveform."""
+        if result.status not in CACHEABLE_STATUSES:
+            return False
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(entry), suffix='.tmp')
+        try:
+            data: Dict = asdict(result)
+            data.pop('steps', None)
+            data.pop('cached', None)
+            for name in ('log', 'wave'):
+                path = data.get(name)
+                if path and os.path.exists(path):
+                    shutil.copyfile(path, os.path.join(staging, os.path.basename(path)))
+                    data[name] = os.path.basename(path)
+                else:
+                    data[name] = None
+            with open(os.path.join(staging, 'result.json'), 'w') as f:
+                json.dump(data, f, indent=2)
+            if os.path.exists(entry):
+                shutil.rmtree(entry)
+            os.replace(staging, entry)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return True
+
+    def invalidate(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
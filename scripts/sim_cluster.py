@@ -0,0 +1,380 @@
+"""Spread a simulation regression over several hosts.
+
+A coordinator owns the job list and serves it over TCP; workers connect,
+lease one job at a time, run it with sim_orchestrator.run_job() in a local
+scratch directory and send back the result, the log and the waveform. Every
+message is a single line of JSON on its own short-lived connection.
+
+Workers must see the same source tree as the coordinator (a shared checkout
+or identical paths relative to their working directory). While a job runs
+the worker sends heartbeats; a lease whose heartbeats stop is handed to
+another worker, and jobs that end in an infrastructure error are retried up
+to max_attempts times. A failing simulation is a verdict and is not retried.
+When the coordinator answers a heartbeat with a cancel, the worker kills the
+job's simulation and drops its result. The coordinator only listens on the
+loopback interface unless another --host is given.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import socket
+import threading
+import socketserver
+import subprocess
+from dataclasses import asdict, fields
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from .sim_orchestrator import (SimulationJob, JobResult, StepResult, RegressionResult, run_job, job_features,
+                                   discover_testbenches, DEFAULT_SCRATCH_DIR)
+    from .regression_scheduler import RuntimeHistory, DEFAULT_HISTORY_PATH, estimate_runtimes, lpt_order
+    from .ghdl_build import GHDL
+except ImportError:
+    from sim_orchestrator import (SimulationJob, JobResult, StepResult, RegressionResult, run_job, job_features,
+                                  discover_testbenches, DEFAULT_SCRATCH_DIR)
+    from regression_scheduler import RuntimeHistory, DEFAULT_HISTORY_PATH, estimate_runtimes, lpt_order
+    from ghdl_build import GHDL
+
+DEFAULT_PORT = 8765
+DEFAULT_HEARTBEAT = 5.0
+DEFAULT_OUTPUT_DIR = os.path.join('sim', 'cluster')
+
+def _send(host: str, port: int, message: Dict, timeout: float = 30.0) -> Dict:
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        with connection.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("Coordinator closed the connection without replying")
+    return json.loads(line)
+
+def _job_result_from_dict(data: Dict) -> JobResult:
+    known = {f.name for f in fields(JobResult)}
+    result = JobResult(**{key: value for key, value in data.items() if key in known and key != 'steps'})
+    result.steps = [StepResult(**step) for step in data.get('steps', [])]
+    return result
+
+class Coordinator:
+    """Job table behind the TCP server. All state changes happen under one lock."""
+
+    def __init__(self, jobs: Sequence[SimulationJob], output_dir: str = DEFAULT_OUTPUT_DIR,
+                 heartbeat_timeout: float = 3 * DEFAULT_HEARTBEAT, max_attempts: int = 3,
+                 token: Optional[str] = None, order: Optional[Sequence[int]] = None):
+        self.jobs = list(jobs)
+        self.output_dir = output_dir
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.token = token
+        self.pending: List[int] = list(order) if order is not None else list(range(len(self.jobs)))
+        self.attempts = [0] * len(self.jobs)
+        self.leases: Dict[int, Dict] = {}  # job index -> {"worker", "attempt", "heartbeat"}
+        self.results: List[Optional[JobResult]] = [None] * len(self.jobs)
+        self.workers: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.jobs:
+            self.finished.set()
+
+    def _expire_leases(self, now: float) -> None:
+        for index, lease in list(self.leases.items()):
+            if now - lease["heartbeat"] > self.heartbeat_timeout:
+                del self.leases[index]
+                self._retry_or_fail(index, f"worker {lease['worker']} stopped sending heartbeats")
+
+    def _retry_or_fail(self, index: int, reason: str) -> None:
+        if self.attempts[index] < self.max_attempts:
+            self.pending.insert(0, index)
+            return
+        self.results[index] = JobResult(testbench=self.jobs[index].testbench, status="error",
+                                        error=f"Gave up after {self.attempts[index]} attempts: {reason}")
+        self._check_finished()
+
+    def _check_finished(self) -> None:
+        if all(result is not None for result in self.results):
+            self.finished.set()
+
+    def handle(self, message: Dict) -> Dict:
+        if self.token is not None and message.get("token") != self.token:
+            return {"error": "bad token"}
+        op = message.get("op")
+        worker = str(message.get("worker", "?"))
+        now = time.monotonic()
+        with self.lock:
+            self.workers.setdefault(worker, {"jobs": 0})["seen"] = now
+            self._expire_leases(now)
+
+            if op == "get":
+                if self.finished.is_set():
+                    return {"done": True}
+                if not self.pending:
+                    return {"wait": 1.0}
+                index = self.pending.pop(0)
+                self.attempts[index] += 1
+                self.leases[index] = {"worker": worker, "attempt": self.attempts[index], "heartbeat": now}
+                return {"job_id": index, "attempt": self.attempts[index], "job": asdict(self.jobs[index])}
+
+            if op == "heartbeat":
+                lease = self.leases.get(message.get("job_id"))
+                if lease is None or lease["worker"] != worker:
+                    return {"cancel": True}  # lease expired and was handed to someone else
+                lease["heartbeat"] = now
+                return {"ok": True}
+
+            if op == "result":
+                index = message.get("job_id")
+                lease = self.leases.get(index)
+                if lease is None or lease["worker"] != worker:
+                    return {"ok": False, "stale": True}
+                del self.leases[index]
+                result = _job_result_from_dict(message["result"])
+                if result.status == "error":
+                    self._retry_or_fail(index, result.error or "worker error")
+                    return {"ok": True}
+                self.results[index] = self._store(index, result, message, worker)
+                self.workers[worker]["jobs"] += 1
+                self._check_finished()
+                return {"ok": True}
+
+        return {"error": f"unknown op {op!r}"}
+
+    def _store(self, index: int, result: JobResult, message: Dict, worker: str) -> JobResult:
+        """Copy the returned log and waveform into output_dir/<job>/ and point the result at them."""
+        job_dir = os.path.abspath(os.path.join(self.output_dir, f"{index:03d}_{self.jobs[index].testbench.lower()}"))
+        os.makedirs(job_dir, exist_ok=True)
+        result.workdir = job_dir
+        if message.get("log") is not None:
+            result.log = os.path.join(job_dir, 'simulation.log')
+            with open(result.log, 'w') as f:
+                f.write(message["log"])
+        else:
+            result.log = None
+        if message.get("wave") is not None and result.wave:
+            result.wave = os.path.join(job_dir, os.path.basename(result.wave))
+            with open(result.wave, 'wb') as f:
+                f.write(base64.b64decode(message["wave"]))
+        else:
+            result.wave = None
+        self.workers[worker].setdefault("testbenches", []).append(result.testbench)
+        return result
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            reply = self.server.coordinator.handle(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def serve(coordinator: Coordinator, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+          ready: Optional[threading.Event] = None, linger: float = 2.0) -> RegressionResult:
+    """Serve jobs until every one has a result, then return them in job order.
+
+    After the last result the server keeps answering for `linger` seconds so
+    polling workers are told to stop instead of finding the port closed.
+    """
+    started = time.perf_counter()
+    with _Server((host, port), _Handler) as server:
+        server.coordinator = coordinator
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        if ready is not None:
+            ready.set()
+        while not coordinator.finished.wait(timeout=1.0):
+            with coordinator.lock:
+                coordinator._expire_leases(time.monotonic())
+        time.sleep(linger)
+        server.shutdown()
+
+    return RegressionResult(jobs=coordinator.results, workers=len(coordinator.workers),
+                            seconds=round(time.perf_counter() - started, 3))
+
+def _heartbeat(host: str, port: int, base: Dict, job_id: int, interval: float, stop: threading.Event,
+               cancel: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            reply = _send(host, port, {**base, "op": "heartbeat", "job_id": job_id})
+        except OSError:
+            continue  # a missed beat only matters if the coordinator stays unreachable
+        if reply.get("cancel"):
+            cancel.set()  # the lease went to another worker; stop simulating for nothing
+            return
+
+def run_worker(host: str = 'localhost', port: int = DEFAULT_PORT, name: Optional[str] = None,
+               scratch_dir: str = DEFAULT_SCRATCH_DIR, std: Optional[str] = None, ghdl: str = GHDL,
+               timeout: Optional[float] = None, heartbeat: float = DEFAULT_HEARTBEAT,
+               token: Optional[str] = None, connect_timeout: float = 30.0) -> int:
+    """Lease and run jobs until the coordinator reports that all are done. Returns the job count."""
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    base = {"worker": name, "token": token}
+    completed = 0
+    deadline = time.monotonic() + connect_timeout
+    connected = False
+
+    while True:
+        try:
+            reply = _send(host, port, {**base, "op": "get"})
+            connected = True
+        except OSError:
+            # Not up yet, or gone after the regression finished
+            if connected or time.monotonic() > deadline:
+                return completed
+            time.sleep(0.5)
+            continue
+
+        if reply.get("done") or reply.get("error"):
+            if reply.get("error"):
+                print(f"Coordinator refused worker {name}: {reply['error']}")
+            return completed
+        if "wait" in reply:
+            time.sleep(reply["wait"])
+            continue
+
+        job = SimulationJob(**reply["job"])
+        workdir = os.path.join(scratch_dir, f"{name}_{job.testbench.lower()}")
+        stop = threading.Event()
+        cancel = threading.Event()
+        beat = threading.Thread(target=_heartbeat,
+                                args=(host, port, base, reply["job_id"], heartbeat, stop, cancel), daemon=True)
+        beat.start()
+        try:
+            result = run_job(job, workdir, std, ghdl, timeout, cancel=cancel)
+        finally:
+            stop.set()
+            beat.join()
+        if cancel.is_set():
+            continue  # the coordinator no longer wants this result
+
+        log = wave = None
+        try:
+            if result.log and os.path.exists(result.log):
+                with open(result.log, 'r', errors='replace') as f:
+                    log = f.read()
+            if result.wave and os.path.exists(result.wave):
+                with open(result.wave, 'rb') as f:
+                    wave = base64.b64encode(f.read()).decode('ascii')
+        except OSError as e:
+            result.status, result.error = "error", f"{type(e).__name__}: {e}"
+
+        message = {**base, "op": "result", "job_id": reply["job_id"], "result": asdict(result),
+                   "log": log, "wave": wave}
+        try:
+            _send(host, port, message, timeout=300.0)
+            completed += 1
+        except OSError:
+            pass  # the lease expires and the job is handed out again
+
+def _print_result(result: RegressionResult) -> None:
+    for job in result.jobs:
+        detail = f" at {job.stage}" if job.stage else ""
+        if job.error:
+            detail += f": {job.error}"
+        print(f"{job.testbench:28} {job.status.upper():8} {job.seconds:7.3f} s{detail}")
+    print(f"{len(result.passed)}/{len(result.jobs)} passed in {result.seconds} s on {result.workers} workers")
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Coordinator/worker mode for VHDL regressions.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    coordinator = commands.add_parser("coordinator", help="Serve the regression's jobs to workers")
+    local = commands.add_parser("local", help="Coordinator plus N worker processes on this host")
+    worker = commands.add_parser("worker", help="Run jobs leased from a coordinator")
+
+    for sub in (coordinator, local):
+        sub.add_argument("testbenches", nargs="*", help="Testbench entities to run (default: every *_tb file)")
+        sub.add_argument("--src", default="src", help="Directory holding DUTs and testbenches")
+        sub.add_argument("--stop-time", default=None, help="Override the stop time read from each testbench")
+        sub.add_argument("--wave", choices=("fst", "vcd", "ghw", "none"), default="fst")
+        sub.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Where merged logs and waves are stored")
+        sub.add_argument("--max-attempts", type=int, default=3)
+        sub.add_argument("--heartbeat-timeout", type=float, default=3 * DEFAULT_HEARTBEAT)
+        sub.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="Runtime history for longest-first order")
+        sub.add_argument("--json", default=None, help="Write the merged regression result to this file")
+    coordinator.add_argument("--host", default="127.0.0.1",
+                             help="Address to listen on; pass 0.0.0.0 (with --token) to accept remote workers")
+    local.add_argument("-n", "--workers", type=int, default=2, help="Worker processes to start")
+    worker.add_argument("--host", default="localhost")
+    worker.add_argument("--name", default=None)
+    for sub in (coordinator, local, worker):
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        sub.add_argument("--token", default=os.environ.get("SIM_CLUSTER_TOKEN"), help="Shared secret")
+    for sub in (local, worker):
+        sub.add_argument("--scratch-dir", default=DEFAULT_SCRATCH_DIR)
+        sub.add_argument("--heartbeat", type=float, default=DEFAULT_HEARTBEAT)
+        sub.add_argument("--std", default=None)
+        sub.add_argument("--ghdl", default=GHDL)
+        sub.add_argument("--timeout", type=float, default=None, help="Per-step timeout in seconds")
+    args = arg_parser.parse_args()
+
+    if args.command == "worker":
+        count = run_worker(args.host, args.port, args.name, args.scratch_dir, args.std, args.ghdl,
+                           args.timeout, args.heartbeat, args.token)
+        print(f"Worker finished {count} job(s)")
+        return
+
+    jobs = discover_testbenches(args.src)
+    if args.testbenches:
+        wanted = {name.lower() for name in args.testbenches}
+        jobs = [job for job in jobs if job.testbench.lower() in wanted]
+    for job in jobs:
+        job.stop_time = args.stop_time or job.stop_time
+        job.wave = None if args.wave == "none" else args.wave
+    if not jobs:
+        print("No testbenches to run.")
+        sys.exit(1)
+
+    history = RuntimeHistory(args.history)
+    features = [job_features(job) for job in jobs]
+    order = lpt_order(estimate_runtimes([job.testbench for job in jobs], features, history))
+    state = Coordinator(jobs, args.output_dir, args.heartbeat_timeout, args.max_attempts, args.token, order)
+
+    processes = []
+    if args.command == "local":
+        ready = threading.Event()
+        merged = {}
+
+        def run_server():
+            merged["result"] = serve(state, '127.0.0.1', args.port, ready)
+
+        server = threading.Thread(target=run_server)
+        server.start()
+        ready.wait()
+        for number in range(args.workers):
+            command = [sys.executable, os.path.abspath(__file__), "worker", "--port", str(args.port),
+                       "--name", f"local{number}", "--scratch-dir", args.scratch_dir,
+                       "--heartbeat", str(args.heartbeat), "--ghdl", args.ghdl]
+            if args.std:
+                command += ["--std", args.std]
+            if args.timeout:
+                command += ["--timeout", str(args.timeout)]
+            if args.token:
+                command += ["--token", args.token]
+            processes.append(subprocess.Popen(command))
+        server.join()
+        for process in processes:
+            process.wait()
+        result = merged["result"]
+    else:
+        result = serve(state, args.host, args.port)
+
+    for job, feature in zip(result.jobs, features):
+        if job.status in ("passed", "failed"):
+            history.record(job.testbench, job.seconds, feature)
+    history.save()
+
+    _print_result(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result.to_dict(), f, indent=2)
+    sys.exit(0 if result.ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .vhdl_parser import VHDLParser, Entity, map_vhdl_file
+    from .ghdl_build import analyze, ghdl_options, GHDL
+    from .regression_scheduler import (RuntimeHistory, DEFAULT_HISTORY_PATH, testbench_features,
+                                       estimate_runtimes, lpt_order, predicted_makespan)
+    from .sim_cache import SimulationCache, DEFAULT_SIM_CACHE_DIR
+    from .testbench_generator import read_stop_time, read_stimulus_file
+except ImportError:
+    from vhdl_parser import VHDLParser, Entity, map_vhdl_file
+    from ghdl_build import analyze, ghdl_options, GHDL
+    from regression_scheduler import (RuntimeHistory, DEFAULT_HISTORY_PATH, testbench_features,
+                                      estimate_runtimes, lpt_order, predicted_makespan)
+    from sim_cache import SimulationCache, DEFAULT_SIM_CACHE_DIR
+    from testbench_generator import read_stop_time, read_stimulus_file
+
+DEFAULT_SCRATCH_DIR = os.path.join('sim', 'jobs')
+DEFAULT_STOP_TIME = '1000ns'
+TESTBENCH_SUFFIXES = ('_tb.vhdl', '_tb.vhd')
+# How often a running step checks whether its job was cancelled
+CANCEL_POLL = 0.2
+
+@dataclass
+class SimulationJob:
+    testbench: str
+    sources: List[str]
+    stop_time: Optional[str] = DEFAULT_STOP_TIME
+    wave: Optional[str] = 'fst'  # 'fst', 'vcd', 'ghw' or None
+    generics: Dict[str, str] = field(default_factory=dict)
+    inputs: List[str] = field(default_factory=list)  # data files the testbench reads at run time
+
+@dataclass
+class StepResult:
+    name: str
+    returncode: Optional[int]
+    seconds: float
+
+@dataclass
+class JobResult:
+    testbench: str
+    status: str = "pending"  # passed, failed, timeout, cancelled or error
+    stage: Optional[str] = None  # step that failed
+    returncode: Optional[int] = None
+    seconds: float = 0.0
+    workdir: Optional[str] = None
+    log: Optional[str] = None
+    wave: Optional[str] = None
+    error: Optional[str] = None
+    estimate: Optional[float] = None
+    cached: bool = False
+    steps: List[StepResult] = field(default_factory=list)
+
+@dataclass
+class RegressionResult:
+    jobs: List[JobResult] = field(default_factory=list)
+    workers: int = 1
+    seconds: float = 0.0
+    predicted_seconds: Optional[float] = None
+
+    @property
+    def passed(self) -> List[JobResult]:
+        return [job for job in self.jobs if job.status == "passed"]
+
+    @property
+    def failed(self) -> List[JobResult]:
+        return [job for job in self.jobs if job.status != "passed"]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def to_dict(self) -> Dict:
+        return {
+            "summary": {
+                "jobs": len(self.jobs),
+                "passed": len(self.passed),
+                "failed": len(self.failed),
+                "workers": self.workers,
+                "seconds": self.seconds,
+                "predicted_seconds": self.predicted_seconds
+            },
+            "jobs": [asdict(job) for job in self.jobs]
+        }
+
+def discover_testbenches(src_dir: str = 'src') -> List[SimulationJob]:
+    """One job per *_tb.vhd(l) file in src_dir, named after the file's first entity.
+
+    The matching DUT file is listed before src_dir so it wins over other
+    files that declare the same entity. Generated testbenches carry their
+    exact stop time; others fall back to DEFAULT_STOP_TIME. A file-driven
+    testbench gets the absolute path of its stimulus file as STIMULUS_FILE,
+    since jobs run in their own working directory.
+    """
+    jobs = []
+    for name in sorted(os.listdir(src_dir)):
+        if not name.lower().endswith(TESTBENCH_SUFFIXES):
+            continue
+        path = os.path.join(src_dir, name)
+        entity = next((unit for unit in VHDLParser(map_vhdl_file(path)).iter_units()
+                       if isinstance(unit, Entity)), None)
+        if entity is None:
+            continue
+        stem = name[:name.lower().rindex('_tb.')]
+        sources = [path]
+        for extension in ('.vhdl', '.vhd'):
+            dut = os.path.join(src_dir, stem + extension)
+            if os.path.exists(dut):
+                sources.append(dut)
+                break
+        sources.append(src_dir)
+        job = SimulationJob(testbench=entity.name, sources=sources,
+                            stop_time=read_stop_time(path) or DEFAULT_STOP_TIME)
+        stimulus_file = read_stimulus_file(path)
+        if stimulus_file:
+            job.generics["STIMULUS_FILE"] = os.path.abspath(stimulus_file)
+            job.inputs.append(os.path.abspath(stimulus_file))
+        jobs.append(job)
+    return jobs
+
+def _wait(process: subprocess.Popen, timeout: Optional[float], cancel: Optional[threading.Event]) -> Optional[int]:
+    """Return code of process, or None after killing it for running past timeout or being cancelled"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        interval = None if cancel is None else CANCEL_POLL
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            interval = remaining if interval is None else min(interval, remaining)
+        try:
+            return process.wait(timeout=interval)
+        except subprocess.TimeoutExpired:
+            if (deadline is not None and time.monotonic() >= deadline) or (cancel is not None and cancel.is_set()):
+                process.kill()
+                process.wait()
+                return None
+
+def _run_step(result: JobResult, log, name: str, command: Sequence[str], cwd: str,
+              timeout: Optional[float], cancel: Optional[threading.Event] = None) -> bool:
+    log.write(f"$ {' '.join(command)}\n")
+    log.flush()
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    returncode = _wait(process, timeout, cancel)
+    result.steps.append(StepResult(name, returncode, round(time.perf_counter() - started, 3)))
+
+    if returncode == 0:
+        return True
+    result.stage = name
+    result.returncode = returncode
+    if returncode is not None:
+        result.status = "failed"
+    else:
+        result.status = "cancelled" if cancel is not None and cancel.is_set() else "timeout"
+    return False
+
+def _run_steps(job: SimulationJob, result: JobResult, std: Optional[str], ghdl: str,
+               timeout: Optional[float], cancel: Optional[threading.Event] = None) -> None:
+    """Analyze, elaborate and run, recording the outcome in result."""
+    workdir = result.workdir
+    with open(result.log, 'w') as log:
+        analysis_started = time.perf_counter()
+        analysis = analyze(job.sources, [job.testbench], workdir=workdir, std=std, ghdl=ghdl)
+        for level in analysis.levels:
+            log.write(level.output)
+        result.steps.append(StepResult("analyze", 0 if analysis.ok else 1,
+                                       round(time.perf_counter() - analysis_started, 3)))
+        if not analysis.ok:
+            result.status, result.stage, result.returncode = "failed", "analyze", 1
+            return
+
+        options = ghdl_options(workdir, std)
+        if not _run_step(result, log, "elaborate", [ghdl, "-e", *options, job.testbench], workdir, timeout,
+                         cancel):
+            return
+
+        run_options = [f"-g{name}={value}" for name, value in job.generics.items()]
+        if job.wave:
+            result.wave = os.path.join(workdir, f"{job.testbench}.{job.wave}")
+            run_options.append(f"--{job.wave}={result.wave}")
+        if job.stop_time:
+            run_options.append(f"--stop-time={job.stop_time}")
+        if not _run_step(result, log, "run", [ghdl, "-r", *options, job.testbench, *run_options],
+                         workdir, timeout, cancel):
+            return
+
+    result.status = "passed"
+    result.returncode = 0
+
+def run_job(job: SimulationJob, workdir: str, std: Optional[str] = None, ghdl: str = GHDL,
+            timeout: Optional[float] = None, cache: Optional[SimulationCache] = None,
+            cancel: Optional[threading.Event] = None) -> JobResult:
+    """Analyze, elaborate and run one testbench inside its own scratch directory.
+
+    The work library, elaborated binary, waveform and log all live in workdir,
+    so jobs never share files and can run side by side. With a cache, a job
+    whose sources and simulator inputs are unchanged returns the stored
+    verdict, log and waveform without starting GHDL. Setting cancel kills the
+    running step and ends the job with status "cancelled".
+    """
+    started = time.perf_counter()
+    workdir = os.path.abspath(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    result = JobResult(testbench=job.testbench, workdir=workdir, log=os.path.join(workdir, 'simulation.log'))
+
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = cache.key_for(job, std, ghdl)
+            cached = cache.get(cache_key, JobResult)
+            if cached is not None:
+                return cached
+        except (OSError, ValueError):
+            cache_key = None  # an unreadable source; let the run report it
+
+    try:
+        _run_steps(job, result, std, ghdl, timeout, cancel)
+    except (OSError, ValueError) as e:
+        result.status = "error"
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = round(time.perf_counter() - started, 3)
+
+    if cache_key is not None:
+        cache.put(cache_key, result)
+    return result
+
+def job_features(job: SimulationJob) -> Tuple[int, int]:
+    """Scheduling features of a job's testbench file; (0, 0) when it cannot be read."""
+    testbench_file = next((path for path in job.sources if os.path.isfile(path)), None)
+    if testbench_file is None:
+        return 0, 0
+    try:
+        return testbench_features(testbench_file)
+    except (OSError, ValueError):
+        return 0, 0
+
+def run_regression(jobs: Sequence[SimulationJob], scratch_dir: str = DEFAULT_SCRATCH_DIR,
+                   workers: Optional[int] = None, std: Optional[str] = None, ghdl: str = GHDL,
+                   timeout: Optional[float] = None, history: Optional[RuntimeHistory] = None,
+                   cache: Optional[SimulationCache] = None) -> RegressionResult:
+    """Run jobs on at most `workers` concurrent simulations; results keep the job order.
+
+    With a runtime history, jobs are started longest-expected-first so a slow
+    testbench never starts last, and every completed job's wall time is
+    recorded back into the history.
+    """
+    started = time.perf_counter()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    workdirs = []
+    used = set()
+    for job in jobs:
+        name = job.testbench.lower()
+        unique, suffix = name, 1
+        while unique in used:
+            suffix += 1
+            unique = f"{name}_{suffix}"
+        used.add(unique)
+        workdirs.append(os.path.join(scratch_dir, unique))
+
+    order = list(range(len(jobs)))
+    estimates = None
+    features = None
+    if history is not None:
+        features = [job_features(job) for job in jobs]
+        estimates = estimate_runtimes([job.testbench for job in jobs], features, history)
+        order = lpt_order(estimates)
+
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # The pool's queue is FIFO, so submission order is start order
+        futures = {index: executor.submit(run_job, jobs[index], workdirs[index], std, ghdl, timeout, cache)
+                   for index in order}
+        for index, future in futures.items():
+            results[index] = future.result()
+
+    regression = RegressionResult(jobs=results, workers=workers, seconds=round(time.perf_counter() - started, 3))
+    if history is not None:
+        regression.predicted_seconds = round(predicted_makespan(estimates, workers, order), 3)
+        for result, estimate, counts in zip(results, estimates, features):
+            result.estimate = round(estimate, 3)
+            if result.status in ("passed", "failed") and not result.cached:
+                history.record(result.testbench, result.seconds, counts)
+        history.save()
+    return regression
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Run VHDL testbenches in parallel, each in its own workdir.")
+    arg_parser.add_argument("testbenches", nargs="*", help="Testbench entities to run (default: every *_tb file)")
+    arg_parser.add_argument("--src", default="src", help="Directory holding DUTs and testbenches")
+    arg_parser.add_argument("--scratch-dir", default=DEFAULT_SCRATCH_DIR, help="Root of the per-job work directories")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None, help="Concurrent simulations (default: CPU count)")
+    arg_parser.add_argument("--stop-time", default=None,
+                            help="Simulation stop time, e.g. 1000ns (default: from the testbench header)")
+    arg_parser.add_argument("--wave", choices=("fst", "vcd", "ghw", "none"), default="fst")
+    arg_parser.add_argument("--std", default=None, help="VHDL standard passed to GHDL")
+    arg_parser.add_argument("--ghdl", default=GHDL, help="GHDL executable")
+    arg_parser.add_argument("--timeout", type=float, default=None, help="Per-step timeout in seconds")
+    arg_parser.add_argument("--history", default=DEFAULT_HISTORY_PATH,
+                            help="Runtime history used for longest-job-first scheduling")
+    arg_parser.add_argument("--no-history", action="store_true", help="Run jobs in discovery order")
+    arg_parser.add_argument("--cache-dir", default=DEFAULT_SIM_CACHE_DIR, help="Simulation result cache")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Always run GHDL")
+    arg_parser.add_argument("--json", default=None, help="Write the regression result to this file")
+    args = arg_parser.parse_args()
+
+    jobs = discover_testbenches(args.src)
+    if args.testbenches:
+        wanted = {name.lower() for name in args.testbenches}
+        jobs = [job for job in jobs if job.testbench.lower() in wanted]
+    for job in jobs:
+        job.stop_time = args.stop_time or job.stop_time
+        job.wave = None if args.wave == "none" else args.wave
+    if not jobs:
+        print("No testbenches to run.")
+        sys.exit(1)
+
+    history = None if args.no_history else RuntimeHistory(args.history)
+    cache = None if args.no_cache else SimulationCache(args.cache_dir)
+    result = run_regression(jobs, args.scratch_dir, args.jobs, args.std, args.ghdl, args.timeout, history, cache)
+    for job in result.jobs:
+        detail = f" at {job.stage}" if job.stage else ""
+        if job.error:
+            detail += f": {job.error}"
+        if job.cached:
+            detail += " (cached)"
+        print(f"{job.testbench:28} {job.status.upper():8} {job.seconds:7.3f} s{detail}")
+    predicted = f" (predicted {result.predicted_seconds} s)" if result.predicted_seconds is not None else ""
+    print(f"{len(result.passed)}/{len(result.jobs)} passed in {result.seconds} s{predicted} "
+          f"with {result.workers} workers")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result.to_dict(), f, indent=2)
+    sys.exit(0 if result.ok else 1)
+
+if __name__ == "__main__":
+    main()
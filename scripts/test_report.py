@@ -0,0 +1,266 @@
+import os
+import re
+import sys
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .waveform_store import SignalTrace, WaveformStore
+    from .wave_cache import load_waveform
+except ImportError:
+    from waveform_store import SignalTrace, WaveformStore
+    from wave_cache import load_waveform
+
+DEFAULT_GLITCH_PS = 1000
+DEFAULT_MAX_SIGNALS = 200
+DEFAULT_MAX_DETAILS = 20
+
+_TIME_UNITS_FS = (('s', 10 ** 15), ('ms', 10 ** 12), ('us', 10 ** 9), ('ns', 10 ** 6), ('ps', 10 ** 3), ('fs', 1))
+# GHDL reports a failed assertion or report statement as file:line:col:@time:(assertion error): message
+_FAILURE_RE = re.compile(r'\((?:assertion|report) (?:error|failure)\)|ghdl[\w-]*:error', re.IGNORECASE)
+_STOP_RE = re.compile(r'simulation (?:stopped|finished)[^\n]*', re.IGNORECASE)
+# A vector with any of these bits is unknown; an enumeration literal or string only if made of them
+_METAVALUES = frozenset("xXzZuUwW-")
+
+@dataclass
+class SignalSummary:
+    name: str
+    size: int
+    kind: str
+    changes: int
+    toggles: int
+    first_change: Optional[int] = None
+    last_change: Optional[int] = None
+    high: Optional[float] = None  # fraction of the traced time, 1-bit signals only
+    low: Optional[float] = None
+    glitches: int = 0
+    unknown_intervals: int = 0
+    unknown_time: int = 0
+    aliases: List[str] = field(default_factory=list)
+    # At most max_details entries each, so the summary stays bounded
+    glitch_times: List[int] = field(default_factory=list)
+    unknown_spans: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def has_findings(self) -> bool:
+        return bool(self.glitches or self.unknown_intervals)
+
+@dataclass
+class TestReport:
+    testbench: str
+    status: str  # PASSED, FAILED or UNKNOWN
+    status_detail: str
+    wave: str
+    timescale_fs: int
+    end_time: int
+    glitch_ps: float
+    signals: List[SignalSummary] = field(default_factory=list)
+
+    def format_time(self, units: Optional[int]) -> str:
+        return format_time(units, self.timescale_fs)
+
+def format_time(units: Optional[int], timescale_fs: int) -> str:
+    """A time in dump units as text in the largest unit that keeps it >= 1: 1500000 (fs) -> '1.5 ns'"""
+    if units is None:
+        return "-"
+    femtoseconds = int(units) * timescale_fs
+    for name, scale in _TIME_UNITS_FS:
+        if abs(femtoseconds) >= scale:
+            return f"{femtoseconds / scale:g} {name}"
+    return "0 fs"
+
+def simulation_status(log_path: Optional[str]) -> Tuple[str, str]:
+    """(status, detail) from a GHDL simulation log: FAILED on an assertion or
+    report of severity error/failure, PASSED otherwise, UNKNOWN without a log"""
+    if not log_path or not os.path.exists(log_path):
+        return "UNKNOWN", "no simulation log"
+    stop = None
+    with open(log_path, 'r', errors='replace') as f:
+        for line in f:
+            if _FAILURE_RE.search(line):
+                return "FAILED", line.strip()
+            stop = stop or _STOP_RE.search(line)
+    return "PASSED", stop.group(0) if stop else "no errors reported"
+
+def summarize_signal(trace: SignalTrace, end_time: int, glitch_units: float,
+                     max_details: int = DEFAULT_MAX_DETAILS) -> SignalSummary:
+    """Statistics of one trace over [its first change, end_time], computed on whole arrays"""
+    summary = SignalSummary(trace.name, trace.size, trace.kind, len(trace), 0)
+    if not len(trace):
+        return summary
+    times = np.asarray(trace.times)
+    values = np.asarray(trace.values)
+    known = np.asarray(trace.known, dtype=bool)
+    unknown = ~known
+    # Values that did not pack (X/Z, enumeration literals) differ by their text
+    labels = np.zeros(len(times), dtype=np.int64)
+    if trace.raw:
+        texts = list(trace.raw.values())
+        indices = np.fromiter(trace.raw.keys(), dtype=np.int64, count=len(texts))
+        codes = {text: code for code, text in enumerate(dict.fromkeys(texts), 1)}
+        labels[indices] = [codes[text] for text in texts]
+        if trace.size:
+            # A vector is unknown as soon as one bit is: 'UU10', 'X01Z'
+            unknown[indices[[_METAVALUES.isdisjoint(text) for text in texts]]] = False
+        else:
+            unknown[indices[[not set(text) <= _METAVALUES for text in texts]]] = False
+
+    changed = np.zeros(len(times), dtype=bool)
+    changed[1:] = (values[1:] != values[:-1]) | (known[1:] != known[:-1]) | (labels[1:] != labels[:-1])
+    # Changes at the first timestamp only settle the initial value (delta cycles)
+    changed &= times != times[0]
+    toggle_times = times[changed]
+    summary.toggles = len(toggle_times)
+    if summary.toggles:
+        summary.first_change = int(toggle_times[0])
+        summary.last_change = int(toggle_times[-1])
+
+    # Each value holds from its change to the next one (or to end_time)
+    durations = np.diff(np.append(times, max(end_time, int(times[-1]))))
+    traced = int(durations.sum())
+    if trace.kind == 'vector' and trace.size == 1 and traced:
+        summary.high = float(durations[known & (values == 1)].sum()) / traced
+        summary.low = float(durations[known & (values == 0)].sum()) / traced
+
+    if trace.kind == 'vector' and summary.toggles > 1:
+        # A glitch: a value that holds for less than the threshold before toggling again
+        short = np.diff(toggle_times) < glitch_units
+        summary.glitches = int(short.sum())
+        summary.glitch_times = [int(t) for t in toggle_times[:-1][short][:max_details]]
+
+    # Runs of consecutive X/Z/U values that last longer than a delta cycle
+    edges = np.diff(np.concatenate(([0], unknown.astype(np.int8), [0])))
+    bounds = np.append(times, max(end_time, int(times[-1])))
+    span_starts = times[np.flatnonzero(edges == 1)]
+    span_ends = bounds[np.flatnonzero(edges == -1)]
+    lasting = span_ends > span_starts
+    span_starts, span_ends = span_starts[lasting], span_ends[lasting]
+    if len(span_starts):
+        summary.unknown_intervals = len(span_starts)
+        summary.unknown_time = int((span_ends - span_starts).sum())
+        summary.unknown_spans = [(int(s), int(e)) for s, e in zip(span_starts[:max_details], span_ends[:max_details])]
+    return summary
+
+def build_report(store: WaveformStore, wave: str, testbench: Optional[str] = None, log_path: Optional[str] = None,
+                 glitch_ps: float = DEFAULT_GLITCH_PS, max_details: int = DEFAULT_MAX_DETAILS) -> TestReport:
+    """Summarize every signal of store; aliases of one trace are summarized once"""
+    unique: Dict[int, Tuple[SignalTrace, List[str]]] = {}
+    for name in store.names():
+        trace = store.traces[name]
+        unique.setdefault(id(trace), (trace, []))[1].append(name)
+    # The dump's final timestamp, so values held to the end get their full duration
+    end_time = max((int(trace.times[-1]) for trace, _ in unique.values() if len(trace)), default=0)
+    if store.end_time is not None:
+        end_time = max(end_time, store.end_time)
+    glitch_units = glitch_ps * 1000 / store.timescale_fs
+
+    status, detail = simulation_status(log_path)
+    if testbench is None:
+        # A VCD's top scope is the testbench; GHDL's FST has none but is named after it
+        scopes = {name.split('.')[0] if '.' in name else None for name in store.names()}
+        testbench = scopes.pop() if len(scopes) == 1 and None not in scopes else os.path.basename(wave).split('.')[0]
+    report = TestReport(testbench, status, detail, wave, store.timescale_fs, end_time, glitch_ps)
+    for trace, names in unique.values():
+        summary = summarize_signal(trace, end_time, glitch_units, max_details)
+        summary.name, summary.aliases = names[0], names[1:]
+        report.signals.append(summary)
+    return report
+
+def _percent(fraction: Optional[float]) -> str:
+    return "-" if fraction is None else f"{fraction * 100:.1f}%"
+
+def render_markdown(report: TestReport, max_signals: int = DEFAULT_MAX_SIGNALS, details: bool = False,
+                    max_details: int = DEFAULT_MAX_DETAILS) -> str:
+    """The report as Markdown, bounded whatever the waveform size: one table
+    row per signal up to max_signals and, with details, at most max_details
+    glitches and X/Z intervals per signal"""
+    time = report.format_time
+    signals = report.signals[:max_signals]
+    findings = [s for s in report.signals if s.has_findings]
+    lines = ["# VHDL Test Report", "",
+             f"## {report.testbench}",
+             f"**Status**: {report.status} ({report.status_detail})", "",
+             f"- Waveform: `{report.wave}`, {len(report.signals)} signal(s), traced to {time(report.end_time)}",
+             f"- Signals with glitches (< {report.glitch_ps:g} ps) or X/Z intervals: {len(findings)}", "",
+             "### Signal Summary", "",
+             "| Signal | Width | Toggles | First change | Last change | High | Low | Glitches | X/Z intervals | X/Z time |",
+             "|---|---|---|---|---|---|---|---|---|---|"]
+    for s in signals:
+        width = "real" if s.kind == 'real' else str(s.size) if s.size else "enum"
+        lines.append(f"| `{s.name}` | {width} | {s.toggles} | {time(s.first_change)} | {time(s.last_change)} "
+                     f"| {_percent(s.high)} | {_percent(s.low)} | {s.glitches} | {s.unknown_intervals} "
+                     f"| {time(s.unknown_time) if s.unknown_intervals else '-'} |")
+    if len(report.signals) > len(signals):
+        lines.append("")
+        lines.append(f"*{len(report.signals) - len(signals)} more signal(s) omitted.*")
+
+    if details and findings:
+        lines += ["", "### Details"]
+        for s in findings[:max_signals]:
+            lines += ["", f"#### `{s.name}`"]
+            if s.glitches:
+                shown = ", ".join(time(t) for t in s.glitch_times[:max_details])
+                more = f" (+{s.glitches - min(s.glitches, max_details)} more)" if s.glitches > max_details else ""
+                lines.append(f"- Glitches at: {shown}{more}")
+            if s.unknown_intervals:
+                shown = ", ".join(f"{time(a)}..{time(b)}" for a, b in s.unknown_spans[:max_details])
+                more = (f" (+{s.unknown_intervals - max_details} more)"
+                        if s.unknown_intervals > max_details else "")
+                lines.append(f"- X/Z intervals: {shown}{more}")
+        if len(findings) > max_signals:
+            lines += ["", f"*{len(findings) - max_signals} more signal(s) with findings omitted.*"]
+    return "\n".join(lines) + "\n"
+
+def render_json(report: TestReport, max_signals: int = DEFAULT_MAX_SIGNALS, details: bool = False) -> Dict:
+    data = asdict(report)
+    data["signal_count"] = len(report.signals)
+    data["signals"] = data["signals"][:max_signals]
+    if not details:
+        for signal in data["signals"]:
+            del signal["glitch_times"], signal["unknown_spans"]
+    return data
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Write a bounded-size summary report of a simulation waveform.")
+    arg_parser.add_argument("wave_file", help="Waveform (.vcd or .fst) to summarize")
+    arg_parser.add_argument("--log", default=None, help="Simulation log to take the pass/fail status from")
+    arg_parser.add_argument("--testbench", default=None, help="Testbench name (default: the waveform file name)")
+    arg_parser.add_argument("--output", default="test_report.md", help="Markdown report to write")
+    arg_parser.add_argument("--json", default=None, help="Also write the summary as JSON to this file")
+    arg_parser.add_argument("--signal", action="append", default=None,
+                            help="Only summarize signals whose name contains this (repeatable)")
+    arg_parser.add_argument("--glitch-ps", type=float, default=DEFAULT_GLITCH_PS,
+                            help=f"Count pulses shorter than this as glitches (default {DEFAULT_GLITCH_PS})")
+    arg_parser.add_argument("--max-signals", type=int, default=DEFAULT_MAX_SIGNALS,
+                            help=f"Signals listed in the report (default {DEFAULT_MAX_SIGNALS})")
+    arg_parser.add_argument("--details", action="store_true", help="Add glitch and X/Z interval sections")
+    arg_parser.add_argument("--max-details", type=int, default=DEFAULT_MAX_DETAILS,
+                            help=f"Entries per signal in the detail sections (default {DEFAULT_MAX_DETAILS})")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Do not read or write the waveform cache")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.wave_file):
+        print(f"Error: {args.wave_file} not found.")
+        sys.exit(1)
+    try:
+        store = load_waveform(args.wave_file, args.signal, use_cache=not args.no_cache)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    report = build_report(store, args.wave_file, args.testbench, args.log, args.glitch_ps, args.max_details)
+    with open(args.output, 'w') as f:
+        f.write(render_markdown(report, args.max_signals, args.details, args.max_details))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(render_json(report, args.max_signals, args.details), f, indent=2)
+    print(f"{report.testbench}: {report.status}, {len(report.signals)} signal(s) summarized in {args.output}")
+    sys.exit(1 if report.status == "FAILED" else 0)
+
+if __name__ == "__main__":
+    main()
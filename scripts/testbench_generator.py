@@ -1,6 +1,8 @@
 import json
+import math
 import os
 import re
+from functools import lru_cache
 
 def load_vhdl_data(json_file):
     """Loads the VHDL entity data from a JSON file."""
@@ -75,17 +77,178 @@ def parse_data_type(port):
 
     raise ValueError("Invalid port definition format")
 
-def get_vector_width(range_str):
-    """Extract vector width from range string, handling parametric expressions"""
-    # Check if the range contains parametric expressions
-    if any(c.isalpha() for c in range_str):
-        return None  # Return None for parametric widths
-        
-    match = re.search(r'\((\d+)\s+downto\s+(\d+)\)', range_str)
-    if match:
-        high, low = map(int, match.groups())
-        return high - low + 1
-    return None
+_EXPR_TOKEN_RE = re.compile(r"\s*(?:(\d[\d_]*)|([A-Za-z]\w*)|('\s*[A-Za-z]\w*)|(\*\*|[-+*/()]))")
+_RANGE_RE = re.compile(r'^\(?(.*?)\s+(downto|to)\s+(.*?)\)?$', re.IGNORECASE | re.DOTALL)
+
+def _tokenize_expression(expr):
+    tokens = []
+    pos = 0
+    expr = expr.strip()
+    while pos < len(expr):
+        match = _EXPR_TOKEN_RE.match(expr, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected character in expression: {expr[pos:]!r}")
+        number, name, attribute, operator = match.groups()
+        if number is not None:
+            tokens.append(('num', int(number.replace('_', ''))))
+        elif name is not None:
+            tokens.append(('name', name.lower()))
+        elif attribute is not None:
+            tokens.append(('attr', attribute[1:].strip().lower()))
+        else:
+            tokens.append(('op', operator))
+        pos = match.end()
+    return tokens
+
+@lru_cache(maxsize=4096)
+def _evaluate(expr, env):
+    """Evaluate an integer VHDL expression against a frozen (name, value) environment."""
+    values = dict(env)
+    tokens = _tokenize_expression(expr)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def take():
+        nonlocal pos
+        tok = peek()
+        pos += 1
+        return tok
+
+    def primary():
+        kind, value = take()
+        if kind == 'num':
+            return value
+        if kind == 'op' and value == '(':
+            result = expression()
+            if take() != ('op', ')'):
+                raise ValueError(f"Unbalanced parentheses in {expr!r}")
+            return result
+        if kind == 'op' and value in ('+', '-'):
+            operand = factor()
+            return -operand if value == '-' else operand
+        if kind == 'name' and value == 'abs':
+            return abs(factor())
+        if kind == 'name':
+            if peek()[0] == 'attr':
+                key = f"{value}'{take()[1]}"
+            else:
+                key = value
+            if key not in values:
+                raise ValueError(f"Unknown name '{key}' in {expr!r}")
+            return values[key]
+        raise ValueError(f"Unexpected token {value!r} in {expr!r}")
+
+    def factor():
+        base = primary()
+        if peek() == ('op', '**'):
+            take()
+            return base ** primary()
+        return base
+
+    def term():
+        result = factor()
+        while True:
+            kind, value = peek()
+            if kind == 'op' and value in ('*', '/'):
+                take()
+                right = factor()
+                if value == '*':
+                    result *= right
+                else:
+                    # VHDL integer division truncates toward zero
+                    result = abs(result) // abs(right) * (1 if (result < 0) == (right < 0) else -1)
+            elif kind == 'name' and value in ('mod', 'rem'):
+                take()
+                right = factor()
+                if value == 'mod':
+                    result = result % right  # sign follows the right operand, as in VHDL
+                else:
+                    result = result - right * int(result / right)
+            else:
+                return result
+
+    def expression():
+        sign = 1
+        if peek() in (('op', '+'), ('op', '-')):
+            sign = -1 if take()[1] == '-' else 1
+        result = sign * term()
+        while peek() in (('op', '+'), ('op', '-')):
+            operator = take()[1]
+            right = term()
+            result = result + right if operator == '+' else result - right
+        return result
+
+    result = expression()
+    if pos != len(tokens):
+        raise ValueError(f"Trailing tokens in {expr!r}")
+    return result
+
+def evaluate_expression(expr, constants=None):
+    """Constant-fold an integer expression (+ - * / ** mod rem abs, parentheses,
+    'length/'high/'low/'left/'right of known ports) using resolved constants."""
+    env = tuple(sorted((constants or {}).items()))
+    return _evaluate(expr, env)
+
+def resolve_range(range_str, constants=None):
+    """Return (left, right, direction) for a range such as '(WIDTH-1 downto 0)', or None."""
+    match = _RANGE_RE.match(range_str.strip())
+    if not match:
+        return None
+    left_expr, direction, right_expr = match.groups()
+    try:
+        return (evaluate_expression(left_expr, constants), evaluate_expression(right_expr, constants),
+                direction.lower())
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def build_constant_env(vhdl_entity, overrides=None):
+    """Resolve generic defaults (and user overrides) plus the range attributes of
+    every port whose bounds become constant. Names are lower-cased, as VHDL is
+    case-insensitive; unresolvable generics (times, strings, ...) are skipped."""
+    overrides = {name.lower(): value for name, value in (overrides or {}).items()}
+    constants = {}
+
+    for generic in vhdl_entity.get('generics', []):
+        name = generic['name'].lower()
+        value = overrides.get(name, generic.get('default_value'))
+        if isinstance(value, int):
+            constants[name] = value
+            continue
+        if value is None:
+            continue
+        try:
+            constants[name] = evaluate_expression(str(value), constants)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            continue
+
+    for port in vhdl_entity.get('ports', []):
+        try:
+            _, range_str = parse_data_type(port)
+        except ValueError:
+            continue
+        bounds = resolve_range(range_str, constants) if range_str else None
+        if bounds is None:
+            continue
+        left, right, _ = bounds
+        name = port['name'].lower()
+        constants[f"{name}'left"] = left
+        constants[f"{name}'right"] = right
+        constants[f"{name}'high"] = max(left, right)
+        constants[f"{name}'low"] = min(left, right)
+        constants[f"{name}'length"] = abs(left - right) + 1
+
+    return constants
+
+def get_vector_width(range_str, constants=None):
+    """Extract vector width from range string, resolving parametric expressions
+    against the generic constants when they are known"""
+    bounds = resolve_range(range_str, constants)
+    if bounds is None:
+        return None  # Return None for widths that cannot be resolved
+    left, right, _ = bounds
+    return abs(left - right) + 1
 
 def estimate_simulation_time(ports):
     """Estimate required simulation time based on design complexity"""
@@ -101,13 +264,53 @@ def estimate_simulation_time(ports):
     
     return sim_time
 
-def generate_test_vectors(ports_data, clock_signal=None, reset_signal=None):
-    """Generate appropriate test vectors based on port types"""
-    # Filter out clock and reset signals
+_WAIT_FOR_RE = re.compile(r'^\s*wait\s+for\s+(\d+(?:\.\d+)?)\s*(fs|ps|ns|us|ms|sec)\s*;', re.IGNORECASE | re.MULTILINE)
+_TIME_UNITS_NS = {'fs': 1e-6, 'ps': 1e-3, 'ns': 1, 'us': 1e3, 'ms': 1e6, 'sec': 1e9}
+_STOP_TIME_RE = re.compile(r'^-- STOP_TIME: (\d+) ns$', re.MULTILINE)
+
+_FOR_LOOP_RE = re.compile(r'^\s*for\s+\w+\s+in\s+(-?\d+)\s+(to|downto)\s+(-?\d+)\s+loop\b', re.IGNORECASE)
+_END_LOOP_RE = re.compile(r'^\s*end\s+loop\b', re.IGNORECASE)
+
+def stimulus_duration(stimulus_code):
+    """Total simulated time, in ns, of the sequential 'wait for' steps of a stimulus process.
+    Steps inside for loops with literal bounds count once per iteration."""
+    total = 0.0
+    repeats = [1]
+    for line in stimulus_code.splitlines():
+        loop = _FOR_LOOP_RE.match(line)
+        if loop:
+            left, direction, right = int(loop.group(1)), loop.group(2).lower(), int(loop.group(3))
+            count = max(0, right - left + 1 if direction == 'to' else left - right + 1)
+            repeats.append(repeats[-1] * count)
+        elif _END_LOOP_RE.match(line) and len(repeats) > 1:
+            repeats.pop()
+        else:
+            for value, unit in _WAIT_FOR_RE.findall(line):
+                total += float(value) * _TIME_UNITS_NS[unit.lower()] * repeats[-1]
+    return int(math.ceil(total))
+
+def read_stop_time(testbench_file):
+    """Stop time recorded by generate_testbench() in a testbench header, e.g. '290ns', or None.
+    For a file-driven testbench the current length of its stimulus file counts too,
+    since the vectors can change without regenerating the testbench."""
+    try:
+        with open(testbench_file, 'r', errors='replace') as f:
+            match = _STOP_TIME_RE.search(f.read(4096))
+    except OSError:
+        return None
+    if not match:
+        return None
+    stop_time = int(match.group(1))
+    stimulus_file = read_stimulus_file(testbench_file)
+    if stimulus_file and os.path.exists(stimulus_file):
+        stop_time = max(stop_time, stimulus_file_steps(stimulus_file) * STIMULUS_STEP_NS)
+    return f"{stop_time}ns"
+
+def _stimulus_ports(ports_data, clock_signal=None, reset_signal=None):
+    """(driven ports, STD_LOGIC inputs, other inputs), leaving out clock and reset"""
     filtered_ports = [p for p in ports_data if p['name'] not in ([clock_signal] if clock_signal else []) + 
                                              ([reset_signal] if reset_signal else [])]
     
-    # First, identify all STD_LOGIC ports and other port types
     std_logic_ports = []
     other_ports = []
     
@@ -120,9 +323,11 @@ def generate_test_vectors(ports_data, clock_signal=None, reset_signal=None):
             std_logic_ports.append(port)
         else:
             other_ports.append(port)
-    
-    # ADD THE INITIALIZATION CODE HERE
-    test_code = ["        -- Initialize all inputs to prevent undefined values"]
+    return filtered_ports, std_logic_ports, other_ports
+
+def _initialization_lines(filtered_ports):
+    """Drive every input to a defined value before the test patterns start"""
+    lines = ["        -- Initialize all inputs to prevent undefined values"]
     
     for port in filtered_ports:
         if port['direction'] in ['in', 'inout']:
@@ -130,192 +335,479 @@ def generate_test_vectors(ports_data, clock_signal=None, reset_signal=None):
             
             # Initialize based on type
             if port_data_type == "STD_LOGIC":
-                test_code.append(f"        {port['name']} <= '0';")
+                lines.append(f"        {port['name']} <= '0';")
             elif port_data_type in ["STD_LOGIC_VECTOR", "UNSIGNED", "SIGNED"]:
-                test_code.append(f"        {port['name']} <= (others => '0');")
+                lines.append(f"        {port['name']} <= (others => '0');")
             elif port_data_type in ["INTEGER", "NATURAL", "POSITIVE"]:
-                test_code.append(f"        {port['name']} <= 0;")
+                lines.append(f"        {port['name']} <= 0;")
             elif port_data_type == "BOOLEAN":
-                test_code.append(f"        {port['name']} <= false;")
+                lines.append(f"        {port['name']} <= false;")
     
-    test_code.append("        wait for 10 ns;  -- Allow signals to settle")
-    test_code.append("")
-    
-    # Then continue with the original test pattern generation code
-    # Handle STD_LOGIC ports together in patterns
-    if std_logic_ports:
-        test_code.append("        -- Test patterns for STD_LOGIC ports")
-        
-        # ... rest of the function remains the same
-        
-        # Generate all possible combinations for up to 8 STD_LOGIC ports
-        if len(std_logic_ports) <= 8:
-            num_combinations = min(2 ** len(std_logic_ports), 16)  # Limit to 16 test cases for larger combinations
-            for i in range(num_combinations):
-                # Add blank line between test cases
-                if i > 0:
-                    test_code.append("")
-                
-                # Set each port based on the binary representation of i
-                for j, port in enumerate(std_logic_ports):
-                    bit_value = (i >> j) & 1
-                    test_code.append(f"        {port['name']} <= '{bit_value}';")
-                
-                test_code.append("        wait for 10 ns;")
-        else:
-            # For many ports, just do some basic test patterns
-            # All zeros
-            test_code.append("")
-            for port in std_logic_ports:
-                test_code.append(f"        {port['name']} <= '0';")
-            test_code.append("        wait for 10 ns;")
+    lines.append("        wait for 10 ns;  -- Allow signals to settle")
+    lines.append("")
+    return lines
+
+def _std_logic_patterns(std_logic_ports):
+    """Unrolled test patterns driving the STD_LOGIC ports together"""
+    lines = []
+    # Generate all possible combinations for up to 8 STD_LOGIC ports
+    if len(std_logic_ports) <= 8:
+        num_combinations = min(2 ** len(std_logic_ports), 16)  # Limit to 16 test cases for larger combinations
+        for i in range(num_combinations):
+            # Add blank line between test cases
+            if i > 0:
+                lines.append("")
             
-            # All ones
-            test_code.append("")
-            for port in std_logic_ports:
-                test_code.append(f"        {port['name']} <= '1';")
-            test_code.append("        wait for 10 ns;")
+            # Set each port based on the binary representation of i
+            for j, port in enumerate(std_logic_ports):
+                bit_value = (i >> j) & 1
+                lines.append(f"        {port['name']} <= '{bit_value}';")
             
-            # Alternating
-            test_code.append("")
-            for i, port in enumerate(std_logic_ports):
-                test_code.append(f"        {port['name']} <= '{i % 2}';")
-            test_code.append("        wait for 10 ns;")
-    
-    # Handle other port types individually
-    for port in other_ports:
-        port_data_type, port_range = parse_data_type(port)
-        port_name = port['name'].lower()
+            lines.append("        wait for 10 ns;")
+    else:
+        # For many ports, just do some basic test patterns
+        # All zeros
+        lines.append("")
+        for port in std_logic_ports:
+            lines.append(f"        {port['name']} <= '0';")
+        lines.append("        wait for 10 ns;")
         
-        test_code.append("")  # Add spacing between port sections
+        # All ones
+        lines.append("")
+        for port in std_logic_ports:
+            lines.append(f"        {port['name']} <= '1';")
+        lines.append("        wait for 10 ns;")
         
-        if port_data_type in ["STD_LOGIC_VECTOR", "UNSIGNED", "SIGNED"]:
-            # Check for special port types
-            if "addr" in port_name:
-                width = get_vector_width(port_range)
-                if width is not None:
-                    test_code.extend([
-                        f"        -- Test address {port['name']}",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= \"{format(5, '0' + str(width) + 'b')}\";",
-                        "        wait for 10 ns;"
-                    ])
-                else:
-                    test_code.extend([
-                        f"        -- Test address {port['name']} (parametric width)",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= (2 => '1', 0 => '1', others => '0');  -- Example address pattern",
-                        "        wait for 10 ns;"
-                    ])
-            # Identify data signals (commonly named with "data")
-            elif "data" in port_name:
-                width = get_vector_width(port_range)
-                if width is not None:
-                    test_code.extend([
-                        f"        -- Write data to {port['name']}",
-                        f"        {port['name']} <= (others => '0');",
+        # Alternating
+        lines.append("")
+        for i, port in enumerate(std_logic_ports):
+            lines.append(f"        {port['name']} <= '{i % 2}';")
+        lines.append("        wait for 10 ns;")
+    return lines
+
+def _port_patterns(port, constants=None):
+    """Unrolled test patterns for one non-STD_LOGIC input port"""
+    port_data_type, port_range = parse_data_type(port)
+    port_name = port['name'].lower()
+    lines = []
+    
+    if port_data_type in ["STD_LOGIC_VECTOR", "UNSIGNED", "SIGNED"]:
+        # Check for special port types
+        if "addr" in port_name:
+            width = get_vector_width(port_range, constants)
+            if width is not None:
+                lines.extend([
+                    f"        -- Test address {port['name']}",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= \"{format(5, '0' + str(width) + 'b')}\";",
+                    "        wait for 10 ns;"
+                ])
+            else:
+                lines.extend([
+                    f"        -- Test address {port['name']} (parametric width)",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (2 => '1', 0 => '1', others => '0');  -- Example address pattern",
+                    "        wait for 10 ns;"
+                ])
+        # Identify data signals (commonly named with "data")
+        elif "data" in port_name:
+            width = get_vector_width(port_range, constants)
+            if width is not None:
+                lines.extend([
+                    f"        -- Write data to {port['name']}",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= \"{format(42, '0' + str(width) + 'b')}\";  -- Example data",
+                    "        wait for 10 ns;"
+                ])
+            else:
+                lines.extend([
+                    f"        -- Write data to {port['name']} (parametric width)",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (0 => '1', 1 => '0', 3 => '1', 5 => '1', others => '0');  -- Example data pattern",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (0 => '0', 1 => '1', 3 => '0', 5 => '1', others => '0');  -- Example data pattern",
+                    "        wait for 10 ns;"
+                ])
+                
+            # For bidirectional ports, add specific handling
+            if port['direction'] == 'inout':
+                lines.extend([
+                    f"        -- Set {port['name']} to high impedance (for reading)",
+                    f"        {port['name']} <= (others => 'Z');",
+                    "        wait for 10 ns;"
+                ])
+        else:
+            # Original code for standard vectors
+            width = get_vector_width(port_range, constants)
+            if width is not None:
+                lines.extend([
+                    f"        -- Test cases for {port['name']}",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;"
+                ])
+                
+                # Only try to create bit patterns if the width is manageable
+                if width <= 64:
+                    lines.extend([
+                        f"        {port['name']} <= \"{format(1, '0' + str(width) + 'b')}\";",
                         "        wait for 10 ns;",
-                        f"        {port['name']} <= \"{format(42, '0' + str(width) + 'b')}\";  -- Example data",
+                        f"        {port['name']} <= \"{format(min(2**(width-1), 2**63), '0' + str(width) + 'b')}\";",
                         "        wait for 10 ns;"
                     ])
-                else:
-                    test_code.extend([
-                        f"        -- Write data to {port['name']} (parametric width)",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= (0 => '1', 1 => '0', 3 => '1', 5 => '1', others => '0');  -- Example data pattern",
+                
+                lines.extend([
+                    f"        {port['name']} <= (others => '1');",
+                    "        wait for 10 ns;"
+                ])
+                
+                # Add a few more test patterns for smaller vectors
+                if width <= 64:
+                    lines.extend([
+                        f"        {port['name']} <= \"{format(min(5, 2**width-1), '0' + str(width) + 'b')}\";",
                         "        wait for 10 ns;",
-                        f"        {port['name']} <= (0 => '0', 1 => '1', 3 => '0', 5 => '1', others => '0');  -- Example data pattern",
-                        "        wait for 10 ns;"
-                    ])
-                    
-                # For bidirectional ports, add specific handling
-                if port['direction'] == 'inout':
-                    test_code.extend([
-                        f"        -- Set {port['name']} to high impedance (for reading)",
-                        f"        {port['name']} <= (others => 'Z');",
+                        f"        {port['name']} <= \"{format(min(10, 2**width-1), '0' + str(width) + 'b')}\";",
                         "        wait for 10 ns;"
                     ])
             else:
-                # Original code for standard vectors
-                width = get_vector_width(port_range)
-                if width is not None:
-                    test_code.extend([
-                        f"        -- Test cases for {port['name']}",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;"
-                    ])
-                    
-                    # Only try to create bit patterns if the width is manageable
-                    if width <= 64:
-                        test_code.extend([
-                            f"        {port['name']} <= \"{format(1, '0' + str(width) + 'b')}\";",
-                            "        wait for 10 ns;",
-                            f"        {port['name']} <= \"{format(min(2**(width-1), 2**63), '0' + str(width) + 'b')}\";",
-                            "        wait for 10 ns;"
-                        ])
-                    
-                    test_code.extend([
-                        f"        {port['name']} <= (others => '1');",
-                        "        wait for 10 ns;"
-                    ])
-                    
-                    # Add a few more test patterns for smaller vectors
-                    if width <= 64:
-                        test_code.extend([
-                            f"        {port['name']} <= \"{format(min(5, 2**width-1), '0' + str(width) + 'b')}\";",
-                            "        wait for 10 ns;",
-                            f"        {port['name']} <= \"{format(min(10, 2**width-1), '0' + str(width) + 'b')}\";",
-                            "        wait for 10 ns;"
-                        ])
-                else:
-                    test_code.extend([
-                        f"        -- Test cases for {port['name']} (parametric width)",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= (0 => '1', others => '0');",  # Set LSB
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= (others => '1');",  # Set all bits
-                        "        wait for 10 ns;",
-                        f"        {port['name']} <= (others => '0');",
-                        "        wait for 10 ns;"
-                    ])
-        # Handle integer, natural, positive types
-        elif port_data_type in ["INTEGER", "NATURAL", "POSITIVE"]:
-            test_code.extend([
-                f"        -- Test cases for {port['name']} ({port_data_type})",
-                f"        {port['name']} <= 0;",
-                "        wait for 10 ns;",
-                f"        {port['name']} <= 1;",
-                "        wait for 10 ns;",
-                f"        {port['name']} <= 10;",
-                "        wait for 10 ns;",
-                f"        {port['name']} <= 100;",
-                "        wait for 10 ns;"
-            ])
-        # Handle boolean type
-        elif port_data_type == "BOOLEAN":
-            test_code.extend([
-                f"        -- Test cases for {port['name']} (BOOLEAN)",
-                f"        {port['name']} <= false;",
-                "        wait for 10 ns;",
-                f"        {port['name']} <= true;",
-                "        wait for 10 ns;",
-                f"        {port['name']} <= false;",
-                "        wait for 10 ns;"
-            ])
+                lines.extend([
+                    f"        -- Test cases for {port['name']} (parametric width)",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (0 => '1', others => '0');",  # Set LSB
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (others => '1');",  # Set all bits
+                    "        wait for 10 ns;",
+                    f"        {port['name']} <= (others => '0');",
+                    "        wait for 10 ns;"
+                ])
+    # Handle integer, natural, positive types
+    elif port_data_type in ["INTEGER", "NATURAL", "POSITIVE"]:
+        lines.extend([
+            f"        -- Test cases for {port['name']} ({port_data_type})",
+            f"        {port['name']} <= 0;",
+            "        wait for 10 ns;",
+            f"        {port['name']} <= 1;",
+            "        wait for 10 ns;",
+            f"        {port['name']} <= 10;",
+            "        wait for 10 ns;",
+            f"        {port['name']} <= 100;",
+            "        wait for 10 ns;"
+        ])
+    # Handle boolean type
+    elif port_data_type == "BOOLEAN":
+        lines.extend([
+            f"        -- Test cases for {port['name']} (BOOLEAN)",
+            f"        {port['name']} <= false;",
+            "        wait for 10 ns;",
+            f"        {port['name']} <= true;",
+            "        wait for 10 ns;",
+            f"        {port['name']} <= false;",
+            "        wait for 10 ns;"
+        ])
+    return lines
+
+def generate_test_vectors(ports_data, clock_signal=None, reset_signal=None, constants=None):
+    """Generate appropriate test vectors based on port types. Parametric widths
+    are resolved against constants (see build_constant_env) where possible."""
+    filtered_ports, std_logic_ports, other_ports = _stimulus_ports(ports_data, clock_signal, reset_signal)
+    test_code = _initialization_lines(filtered_ports)
+    
+    # Handle STD_LOGIC ports together in patterns
+    if std_logic_ports:
+        test_code.append("        -- Test patterns for STD_LOGIC ports")
+        test_code.extend(_std_logic_patterns(std_logic_ports))
+    
+    # Handle other port types individually
+    for port in other_ports:
+        test_code.append("")  # Add spacing between port sections
+        test_code.extend(_port_patterns(port, constants))
     
     return "\n".join(test_code)
 
+# Variable of the compact stimulus; the tb_ prefix (also used for the loop
+# parameter and the pattern tables) keeps it from clashing with a DUT port
+_PATTERN_VARIABLE = "tb_pattern"
+_WAIT_STEP = "wait for 10 ns;"
+# Values per line of a pattern table are packed up to this many characters
+_TABLE_LINE_WIDTH = 80
+
+def _pattern_loop(port, lines):
+    """(declarations, code) replaying the unrolled steps of one port from a
+    constant table, or None when the lines are not plain assign/wait steps.
+    Only the first comment line is kept."""
+    steps = []
+    comment = None
+    waiting = False  # an assignment still needs its wait
+    for line in lines:
+        assignment = _ASSIGNMENT_RE.match(line)
+        if line.strip().startswith("--"):
+            comment = comment or line
+        elif assignment and assignment.group(1) == port['name'] and not waiting:
+            steps.append(assignment.group(2))
+            waiting = True
+        elif line.strip() == _WAIT_STEP and waiting:
+            waiting = False
+        else:
+            return None
+    if waiting or len(steps) < 2:
+        return None
+
+    data_type, range_str = parse_data_type(port)
+    table = f"tb_{port['name']}_patterns"
+    declarations = [
+        f"        type {table}_t is array (0 to {len(steps) - 1}) of {data_type}{range_str};",
+        f"        constant {table} : {table}_t := (",
+    ]
+    row = []
+    for value in steps:
+        if row and len(", ".join(row + [value])) > _TABLE_LINE_WIDTH:
+            declarations.append(f"            {', '.join(row)},")
+            row = []
+        row.append(value)
+    declarations.append(f"            {', '.join(row)});")
+    code = [comment] if comment else []
+    code.extend([
+        f"        for tb_step in 0 to {len(steps) - 1} loop",
+        f"            {port['name']} <= {table}(tb_step);",
+        f"            {_WAIT_STEP}",
+        "        end loop;",
+    ])
+    return declarations, code
+
+def generate_compact_test_vectors(ports_data, clock_signal=None, reset_signal=None, constants=None):
+    """Like generate_test_vectors, but repeated steps are emitted as VHDL for
+    loops instead of one assignment block per step: the binary count over the
+    STD_LOGIC ports is computed from the loop index, and the patterns of every
+    other input are read from a constant table. The stimulus (and so the
+    coverage and stop time) is unchanged; only the source shrinks.
+
+    Not compacted: the initialization block and the three fixed patterns used
+    for more than 8 STD_LOGIC ports.
+
+    Returns (declarations, code); the declarations go in the stimulus process'
+    declarative part. Loop bounds are literals, so stimulus_duration() still
+    yields the exact simulated time.
+    """
+    filtered_ports, std_logic_ports, other_ports = _stimulus_ports(ports_data, clock_signal, reset_signal)
+    declarations = []
+    test_code = _initialization_lines(filtered_ports)
+    
+    if std_logic_ports:
+        test_code.append("        -- Test patterns for STD_LOGIC ports")
+        if len(std_logic_ports) <= 8:
+            # Count through the same (at most 16) combinations as the unrolled patterns
+            count = len(std_logic_ports)
+            num_combinations = min(2 ** count, 16)
+            declarations.append(f"        variable {_PATTERN_VARIABLE} : unsigned({count - 1} downto 0);")
+            test_code.append(f"        for tb_step in 0 to {num_combinations - 1} loop")
+            test_code.append(f"            {_PATTERN_VARIABLE} := to_unsigned(tb_step, {count});")
+            for j, port in enumerate(std_logic_ports):
+                test_code.append(f"            {port['name']} <= {_PATTERN_VARIABLE}({j});")
+            test_code.append(f"            {_WAIT_STEP}")
+            test_code.append("        end loop;")
+        else:
+            test_code.extend(_std_logic_patterns(std_logic_ports))
+    
+    for port in other_ports:
+        test_code.append("")
+        lines = _port_patterns(port, constants)
+        loop = _pattern_loop(port, lines)
+        if loop is None:
+            test_code.extend(lines)
+        else:
+            declarations.extend(loop[0])
+            test_code.extend(loop[1])
+    
+    return "\n".join(declarations), "\n".join(test_code)
+
+# File-driven stimulus: every line of the stimulus file is one STIMULUS_STEP_NS
+# step holding the value of every input as a whitespace-separated field. The
+# STD_LOGIC inputs share one hex field (bit j is the j-th port), vectors and
+# booleans are hex, a lone 'Z' sets a whole vector to high impedance and
+# integers are decimal. Lines starting with '#' are comments.
+STIMULUS_STEP_NS = 10
+_ASSIGNMENT_RE = re.compile(r'^\s*(\w+)\s*<=\s*(.+?)\s*;')
+_OTHERS_RE = re.compile(r"^\(\s*others\s*=>\s*'(.)'\s*\)$", re.IGNORECASE)
+_STIMULUS_FILE_RE = re.compile(r'^-- STIMULUS_FILE: (.+)$', re.MULTILINE)
+
+def _stimulus_columns(ports_data, clock_signal=None, reset_signal=None, constants=None):
+    """(kind, ports, data_type, range_str, width) per field of a stimulus file line"""
+    filtered_ports, std_logic_ports, other_ports = _stimulus_ports(ports_data, clock_signal, reset_signal)
+    columns = []
+    if std_logic_ports:
+        columns.append(("std_logic", std_logic_ports, "STD_LOGIC", "", len(std_logic_ports)))
+    for port in other_ports:
+        data_type, range_str = parse_data_type(port)
+        if data_type in ["STD_LOGIC_VECTOR", "UNSIGNED", "SIGNED"]:
+            width = get_vector_width(range_str, constants)
+            if width is None:
+                raise ValueError(f"Width of port '{port['name']}' {range_str} cannot be resolved; "
+                                 f"set its generics to write a stimulus file")
+            columns.append(("vector", [port], data_type, range_str, width))
+        elif data_type in ["INTEGER", "NATURAL", "POSITIVE"]:
+            columns.append(("integer", [port], data_type, "", None))
+        elif data_type == "BOOLEAN":
+            columns.append(("boolean", [port], data_type, "", 1))
+    return columns
+
+def _vector_bits(value, width):
+    """Characters (leftmost element first) of a vector value emitted by the pattern generators"""
+    others = _OTHERS_RE.match(value)
+    if others:
+        return others.group(1) * width
+    if len(value) == width + 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    raise ValueError(f"Cannot pack vector value {value} into {width} bits")
+
+def _hex_field(bits):
+    if set(bits) <= {'0', '1'}:
+        return format(int(bits, 2), f"0{(len(bits) + 3) // 4}X")
+    if set(bits) == {'Z'}:
+        return "Z"
+    raise ValueError(f"Cannot pack '{bits}' into a hex stimulus field")
+
+def stimulus_rows(test_code, columns):
+    """Replay the assignments of a generated stimulus and yield the packed
+    fields of every input after each 'wait for' step."""
+    values = {}
+    for line in test_code.splitlines():
+        line = line.split('--', 1)[0]
+        assignment = _ASSIGNMENT_RE.match(line)
+        if assignment:
+            values[assignment.group(1).lower()] = assignment.group(2)
+            continue
+        for value, unit in _WAIT_FOR_RE.findall(line):
+            if float(value) * _TIME_UNITS_NS[unit.lower()] != STIMULUS_STEP_NS:
+                raise ValueError(f"Stimulus step of {value} {unit} is not {STIMULUS_STEP_NS} ns")
+            fields = []
+            for kind, ports, data_type, range_str, width in columns:
+                if kind == "std_logic":
+                    # Bit j of the field drives the j-th STD_LOGIC port
+                    fields.append(_hex_field(''.join(values[port['name'].lower()].strip("'")
+                                                     for port in reversed(ports))))
+                elif kind == "vector":
+                    fields.append(_hex_field(_vector_bits(values[ports[0]['name'].lower()], width)))
+                elif kind == "integer":
+                    fields.append(str(int(values[ports[0]['name'].lower()])))
+                else:
+                    fields.append("1" if values[ports[0]['name'].lower()].lower() == "true" else "0")
+            yield " ".join(fields)
+
+def write_stimulus_file(path, entity_name, test_code, columns):
+    """Write the packed stimulus; returns the number of steps"""
+    names = []
+    for kind, ports, data_type, range_str, width in columns:
+        if kind == "std_logic":
+            names.append("{" + " ".join(port['name'] for port in ports) + "}")
+        else:
+            names.append(ports[0]['name'])
+    steps = 0
+    with open(path, 'w') as f:
+        f.write(f"# Stimulus for {entity_name}_tb: one line per {STIMULUS_STEP_NS} ns step\n")
+        f.write(f"# Fields: {' '.join(names)}\n")
+        for row in stimulus_rows(test_code, columns):
+            f.write(row + "\n")
+            steps += 1
+    return steps
+
+def stimulus_file_steps(path):
+    """Number of steps (non-comment lines) in a stimulus file"""
+    with open(path, 'r') as f:
+        return sum(1 for line in f if line.strip() and not line.lstrip().startswith('#'))
+
+def read_stimulus_file(testbench_file):
+    """Stimulus file streamed by a file-driven testbench (resolved next to it), or None"""
+    try:
+        with open(testbench_file, 'r', errors='replace') as f:
+            match = _STIMULUS_FILE_RE.search(f.read(4096))
+    except OSError:
+        return None
+    return os.path.join(os.path.dirname(testbench_file), match.group(1).strip()) if match else None
+
+def generate_stimulus_reader(columns):
+    """(declarations, code) of a stimulus process that streams the stimulus file with std.textio"""
+    declarations = [
+        "        file tb_stimulus : text open read_mode is STIMULUS_FILE;",
+        "        variable tb_row : line;"
+    ]
+    body = []
+    for index, (kind, ports, data_type, range_str, width) in enumerate(columns):
+        variable = f"tb_field{index}"
+        if kind == "std_logic":
+            declarations.append(f"        variable {variable} : std_logic_vector({width - 1} downto 0);")
+            body.append(f"                read_hex(tb_row, {variable});")
+            body.extend(f"                {port['name']} <= {variable}({j});" for j, port in enumerate(ports))
+        elif kind == "vector":
+            declarations.append(f"        variable {variable} : std_logic_vector{range_str};")
+            body.append(f"                read_hex(tb_row, {variable});")
+            value = variable if data_type == "STD_LOGIC_VECTOR" else f"{data_type.lower()}({variable})"
+            body.append(f"                {ports[0]['name']} <= {value};")
+        elif kind == "integer":
+            declarations.append(f"        variable {variable} : integer;")
+            body.append(f"                read(tb_row, {variable});")
+            body.append(f"                {ports[0]['name']} <= {variable};")
+        else:
+            declarations.append(f"        variable {variable} : std_logic_vector(0 downto 0);")
+            body.append(f"                read_hex(tb_row, {variable});")
+            body.append(f"                {ports[0]['name']} <= {variable}(0) = '1';")
+
+    declarations.append("""
+        -- Read one hex field; a lone 'Z' sets the whole vector to high impedance
+        procedure read_hex(row : inout line; value : out std_logic_vector) is
+            variable c : character;
+            variable good : boolean;
+            variable digit : integer;
+            variable result : unsigned(4 * ((value'length + 3) / 4) - 1 downto 0) := (others => '0');
+        begin
+            loop  -- Skip the separating blanks
+                read(row, c, good);
+                exit when not good or (c /= ' ' and c /= HT);
+            end loop;
+            assert good report "Stimulus line has too few fields" severity failure;
+            if c = 'Z' or c = 'z' then
+                value := (value'range => 'Z');
+                return;
+            end if;
+            while good and c /= ' ' and c /= HT loop
+                case c is
+                    when '0' to '9' => digit := character'pos(c) - character'pos('0');
+                    when 'A' to 'F' => digit := character'pos(c) - character'pos('A') + 10;
+                    when 'a' to 'f' => digit := character'pos(c) - character'pos('a') + 10;
+                    when others =>
+                        report "Invalid hex digit in stimulus file" severity failure;
+                        digit := 0;
+                end case;
+                result := shift_left(result, 4) + digit;
+                read(row, c, good);
+            end loop;
+            value := std_logic_vector(result(value'length - 1 downto 0));
+        end procedure;""")
+
+    code = [
+        "        -- One line per STEP; lines starting with '#' are comments",
+        "        while not endfile(tb_stimulus) loop",
+        "            readline(tb_stimulus, tb_row);",
+        "            if tb_row'length > 0 and tb_row(tb_row'left) /= '#' then"
+    ]
+    code.extend(body)
+    code.extend([
+        "                wait for STEP;",
+        "            end if;",
+        "        end loop;"
+    ])
+    return "\n".join(declarations), "\n".join(code)
+
 def generate_clock_process(clock_signal, clock_period):
-    """Generate clock process for testbench"""
+    """Generate clock process for testbench; it stops once the stimulus sets sim_done"""
     return f"""
     -- Clock generation process
     clk_process: process
     begin
-        while now < SIM_TIME loop  -- Run simulation for SIM_TIME
+        while not sim_done loop  -- Run until the stimulus process finishes
             {clock_signal} <= '0';
             wait for {clock_period/2} ns;
             {clock_signal} <= '1';
@@ -340,11 +832,18 @@ def generate_reset_process(reset_signal, reset_active_high=True):
     end process;
 """
 
-def generate_testbench(vhdl_data, output_file):
-    """Enhanced testbench generator with proper signal initialization and test vectors"""
+def generate_testbench(vhdl_data, output_file, generic_overrides=None, compact=False, stimulus_file=None):
+    """Enhanced testbench generator with proper signal initialization and test vectors.
+    generic_overrides maps generic names to values used instead of their defaults.
+    With compact, repeated steps are emitted as loops (see generate_compact_test_vectors).
+    With stimulus_file, the vectors are written to that file instead and the
+    testbench streams it with std.textio, so new vectors need no recompilation;
+    its STIMULUS_FILE generic defaults to the path as given."""
     entity_name = vhdl_data['vhdl_entity']['name']
     ports = vhdl_data['vhdl_entity']['ports']
     clock_period = 10
+    generic_overrides = {name.lower(): value for name, value in (generic_overrides or {}).items()}
+    constants = build_constant_env(vhdl_data['vhdl_entity'], generic_overrides)
 
     # Find clock and reset signals if they exist
     clock_signal = next((p['name'] for p in ports if p['name'].lower() in ['clk', 'clock']), None)
@@ -353,16 +852,43 @@ def generate_testbench(vhdl_data, output_file):
     if reset_signal and any(n in reset_signal.lower() for n in ['rstn', 'resetn', '_n']):
         reset_active_high = False
 
-    # Estimate simulation time based on complexity
-    sim_time = estimate_simulation_time(ports)
+    # Generate the stimulus first: its 'wait for' steps fix the exact simulation time
+    if stimulus_file:
+        if compact:
+            raise ValueError("A file-driven testbench has no inline stimulus to compact")
+        columns = _stimulus_columns(ports, clock_signal, reset_signal, constants)
+        steps = write_stimulus_file(stimulus_file, entity_name,
+                                    generate_test_vectors(ports, clock_signal, reset_signal, constants), columns)
+        declarations, test_vectors = generate_stimulus_reader(columns)
+        sim_time = max(steps * STIMULUS_STEP_NS, 20 if reset_signal else 0)
+    elif compact:
+        declarations, test_vectors = generate_compact_test_vectors(ports, clock_signal, reset_signal, constants)
+        sim_time = max(stimulus_duration(test_vectors), 20 if reset_signal else 0)
+    else:
+        declarations, test_vectors = "", generate_test_vectors(ports, clock_signal, reset_signal, constants)
+        sim_time = max(stimulus_duration(test_vectors), 20 if reset_signal else 0)
 
     # Generate the testbench header
-    tb_code = f"""library IEEE;
+    tb_code = f"-- STOP_TIME: {sim_time} ns\n"
+    if stimulus_file:
+        relative = os.path.relpath(stimulus_file, os.path.dirname(os.path.abspath(output_file)))
+        tb_code += f"-- STIMULUS_FILE: {relative}\n"
+    tb_code += """library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
-
+"""
+    if stimulus_file:
+        tb_code += "use STD.TEXTIO.ALL;\n"
+    tb_code += f"""
 entity {entity_name}_tb is
-end {entity_name}_tb;
+"""
+    if stimulus_file:
+        tb_code += f"""    generic (
+        STIMULUS_FILE : string := "{stimulus_file}";
+        STEP : time := {STIMULUS_STEP_NS} ns
+    );
+"""
+    tb_code += f"""end {entity_name}_tb;
 
 architecture Behavioral of {entity_name}_tb is
     -- Component declaration
@@ -397,7 +923,7 @@ architecture Behavioral of {entity_name}_tb is
         tb_code += "    -- Generic constants\n"
         for generic in vhdl_data['vhdl_entity']['generics']:
             name = generic['name']
-            value = generic['default_value']
+            value = generic_overrides.get(name.lower(), generic['default_value'])
             data_type = generic['data_type']
             tb_code += f"    constant {name} : {data_type} := {value};\n"
         tb_code += "\n"
@@ -408,9 +934,10 @@ architecture Behavioral of {entity_name}_tb is
         data_type, range_str = parse_data_type(port)
         tb_code += f"    signal {port['name']} : {data_type}{range_str};\n"
     
-    # Add simulation time constant
-    tb_code += f"\n    -- Simulation time\n"
+    # Add simulation time constant and end-of-simulation flag
+    tb_code += f"\n    -- Simulation time (total of the stimulus steps)\n"
     tb_code += f"    constant SIM_TIME : time := {sim_time} ns;\n"
+    tb_code += "    signal sim_done : boolean := false;\n"
     
     # Begin architecture
     tb_code += "\nbegin\n"
@@ -453,16 +980,21 @@ architecture Behavioral of {entity_name}_tb is
     tb_code += """
     -- Stimulus process
     stim_proc: process
-    begin
+"""
+    if declarations:
+        tb_code += declarations + "\n"
+    tb_code += """    begin
         -- Initialize inputs
 """
 
-    # Generate test vectors using the enhanced function
-    test_vectors = generate_test_vectors(ports, clock_signal, reset_signal)
     tb_code += test_vectors
 
+    # Stopping the clock leaves no pending events, so the simulator ends here
+    # (std.env.stop would need VHDL-2008; GHDL defaults to VHDL-93)
     tb_code += """
         -- End simulation
+        report "Simulation finished" severity note;
+        sim_done <= true;
         wait;
     end process;
 end Behavioral;
@@ -472,7 +1004,29 @@ end Behavioral;
     with open(output_file, 'w') as f:
         f.write(tb_code)
 
+    return sim_time
+
+def _parse_generic_override(text):
+    name, sep, value = text.partition('=')
+    if not sep or not name.strip():
+        raise ValueError(f"Generic override must be NAME=VALUE, got '{text}'")
+    value = value.strip()
+    return name.strip(), int(value) if re.fullmatch(r'-?\d+', value) else value
+
 def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Generate a testbench from src/vhdl_module.json.")
+    arg_parser.add_argument("-g", "--generic", action="append", default=[], metavar="NAME=VALUE",
+                            help="Override a generic's default value (repeatable)")
+    arg_parser.add_argument("--compact", action="store_true",
+                            help="Emit the STD_LOGIC count and each other input's patterns as for loops over "
+                                 "constant tables (same stimulus); the initialization step and the fixed "
+                                 "patterns for more than 8 STD_LOGIC ports stay unrolled")
+    arg_parser.add_argument("--stimulus-file", action="store_true",
+                            help="Write the vectors to src/<entity>_tb.stim and stream them with std.textio")
+    args = arg_parser.parse_args()
+
     # Create src directory if it doesn't exist
     if not os.path.exists("src"):
         os.makedirs("src")
@@ -487,8 +1041,12 @@ def main():
         entity_name = vhdl_data['vhdl_entity']['name']
         tb_file = os.path.join("src", f"{entity_name}_tb.vhdl")
         
-        generate_testbench(vhdl_data, tb_file)
-        print(f"Successfully generated testbench: {tb_file}")
+        overrides = dict(_parse_generic_override(text) for text in args.generic)
+        stimulus_file = os.path.join("src", f"{entity_name}_tb.stim") if args.stimulus_file else None
+        sim_time = generate_testbench(vhdl_data, tb_file, overrides, args.compact, stimulus_file)
+        print(f"Successfully generated testbench: {tb_file} (stop time {sim_time} ns)")
+        if stimulus_file:
+            print(f"Stimulus written to {stimulus_file}")
         
     except Exception as e:
         print(f"Error generating testbench: {str(e)}")
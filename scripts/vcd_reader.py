@@ -0,0 +1,201 @@
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# First characters of a scalar change such as '1!' or 'U#' (std_logic values included)
+_SCALAR_VALUES = frozenset("01xXzZuUwWlLhH-")
+_TIME_UNITS_FS = {'s': 10 ** 15, 'ms': 10 ** 12, 'us': 10 ** 9, 'ns': 10 ** 6, 'ps': 10 ** 3, 'fs': 1}
+
+@dataclass(frozen=True)
+class VCDSignal:
+    id_code: str
+    name: str  # hierarchical, e.g. shift_register_tb.uut.q[3:0]
+    reference: str
+    var_type: str
+    size: int
+
+class ValueChange(NamedTuple):
+    time: int
+    id_code: str
+    # '0'/'1'/'x'/... for scalars, a bit string for vectors, a float for reals
+    value: Union[str, float]
+
+class VCDReader:
+    """One-pass reader of a value change dump.
+
+    The file is read in chunks of chunk_size characters and split into
+    whitespace-separated tokens, so memory stays bounded however long the
+    dump is. The header ($scope/$var/$timescale, up to $enddefinitions) is
+    parsed on construction; iterating the reader then yields a ValueChange
+    per change, in file order. Several variables can share one id code
+    (GHDL aliases a port and the signal driving it), so signals maps an id
+    code to a list.
+    """
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.signals: Dict[str, List[VCDSignal]] = {}
+        self.timescale: Tuple[int, str] = (1, 's')
+        self.date: Optional[str] = None
+        self.version: Optional[str] = None
+        # The last #time of the dump, known once the changes have been read
+        self.end_time: Optional[int] = None
+        self._file = open(path, 'r', errors='replace')
+        self._tokens = self._read_tokens()
+        self._consumed = False
+        self._read_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def timescale_fs(self) -> int:
+        """Length of one time unit of the dump in femtoseconds"""
+        magnitude, unit = self.timescale
+        return magnitude * _TIME_UNITS_FS[unit]
+
+    def _read_tokens(self) -> Iterator[str]:
+        tail = ''
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                break
+            chunk = tail + chunk
+            tokens = chunk.split()
+            # A token touching the end of the chunk may continue in the next one
+            tail = tokens.pop() if tokens and not chunk[-1].isspace() else ''
+            yield from tokens
+        if tail:
+            yield tail
+
+    def _until_end(self) -> List[str]:
+        words = []
+        for token in self._tokens:
+            if token == '$end':
+                return words
+            words.append(token)
+        raise ValueError(f"{self.path}: unterminated header section")
+
+    def _read_header(self) -> None:
+        scope: List[str] = []
+        for token in self._tokens:
+            if token == '$enddefinitions':
+                self._until_end()
+                return
+            if token == '$scope':
+                words = self._until_end()
+                scope.append(words[-1] if words else '')
+            elif token == '$upscope':
+                self._until_end()
+                if scope:
+                    scope.pop()
+            elif token == '$var':
+                words = self._until_end()
+                if len(words) < 4:
+                    raise ValueError(f"{self.path}: malformed $var {' '.join(words)}")
+                var_type, size, id_code = words[0], int(words[1]), words[2]
+                # The reference may be split from its bit range: 'q [3:0]'
+                reference = ''.join(words[3:])
+                signal = VCDSignal(id_code, '.'.join(scope + [reference]), reference, var_type, size)
+                self.signals.setdefault(id_code, []).append(signal)
+            elif token == '$timescale':
+                text = ''.join(self._until_end())
+                digits = len(text) - len(text.lstrip('0123456789'))
+                self.timescale = (int(text[:digits] or 1), text[digits:] or 's')
+            elif token == '$date':
+                self.date = ' '.join(self._until_end())
+            elif token == '$version':
+                self.version = ' '.join(self._until_end())
+            elif token.startswith('$'):
+                self._until_end()
+            else:
+                raise ValueError(f"{self.path}: unexpected '{token}' in header")
+        raise ValueError(f"{self.path}: missing $enddefinitions")
+
+    def _vector(self, bits: str, id_code: str) -> str:
+        """Left-extend a vector value to its declared size as the VCD format specifies"""
+        signals = self.signals.get(id_code)
+        if signals and len(bits) < signals[0].size:
+            fill = bits[0] if bits[0] in 'xXzZ' else '0'
+            return bits.rjust(signals[0].size, fill)
+        return bits
+
+    def __iter__(self) -> Iterator[ValueChange]:
+        if self._consumed:
+            raise ValueError(f"{self.path}: a VCDReader can only be iterated once")
+        self._consumed = True
+        time = 0
+        tokens = self._tokens
+        scalar_values = _SCALAR_VALUES
+        for token in tokens:
+            first = token[0]
+            # Fast path: most changes in a dump are scalar
+            if first in scalar_values:
+                yield ValueChange(time, token[1:], first)
+            elif first == '#':
+                time = int(token[1:])
+            elif first in 'bBrRsS':
+                # The identifier code is the next token; a dump cut off after the value has none
+                id_code = next(tokens, None)
+                if id_code is None:
+                    raise ValueError(f"{self.path}: value '{token}' at time {time} has no identifier code "
+                                     f"(truncated dump?)")
+                if first in 'bB':
+                    yield ValueChange(time, id_code, self._vector(token[1:], id_code))
+                elif first in 'rR':
+                    yield ValueChange(time, id_code, float(token[1:]))
+                else:
+                    yield ValueChange(time, id_code, token[1:])
+            elif token == '$comment':
+                self._until_end()
+            # $dumpvars/$dumpall/$dumpon/$dumpoff and their $end only bracket changes
+        self.end_time = time
+
+def iter_changes(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, VCDSignal, Union[str, float]]]:
+    """(time, signal, value) for every change of every variable in a dump"""
+    with VCDReader(path, chunk_size) as reader:
+        for time, id_code, value in reader:
+            for signal in reader.signals.get(id_code, ()):
+                yield time, signal, value
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Stream the value changes of a VCD file.")
+    arg_parser.add_argument("vcd_file", help="Value change dump to read")
+    arg_parser.add_argument("--signal", action="append", default=[],
+                            help="Only print changes of signals whose name contains this (repeatable)")
+    arg_parser.add_argument("--count", action="store_true", help="Only print the number of changes per signal")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.vcd_file):
+        print(f"Error: {args.vcd_file} not found.")
+        sys.exit(1)
+
+    counts: Dict[str, int] = {}
+    try:
+        for time, signal, value in iter_changes(args.vcd_file):
+            if args.signal and not any(part in signal.name for part in args.signal):
+                continue
+            if args.count:
+                counts[signal.name] = counts.get(signal.name, 0) + 1
+            else:
+                print(f"{time} {signal.name} {value}")
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for name, count in counts.items():
+        print(f"{name}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import re
 import json
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Union
+import mmap
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Dict, Union, Iterator, NamedTuple, Tuple
 from enum import Enum
 from pathlib import Path
 
@@ -20,7 +23,16 @@ class VHDLType(Enum):
     TIME = "time"
     STRING = "string"
 
-@dataclass
+PARSER_VERSION = "2.1"
+
+# (start, end) byte offsets into the parsed source
+Span = Tuple[int, int]
+
+# Parse-tree nodes are slotted to keep per-instance memory small when whole
+# IP libraries are indexed. Leaf declarations are also frozen (and therefore
+# hashable); the containers stay mutable so callers can edit port lists.
+
+@dataclass(slots=True, frozen=True)
 class Port:
     name: str
     direction: str
@@ -28,6 +40,9 @@ class Port:
     width: Optional[str] = None
     default_value: Optional[str] = None
     range: Optional[str] = None
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("name", "direction", "data_type", "width", "default_value", "range")
 
     def to_dict(self):
         return {
@@ -39,11 +54,14 @@ class Port:
             "range": self.range
         }
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Generic:
     name: str
     data_type: str
     default_value: Optional[str] = None
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("name", "data_type", "default_value")
 
     def to_dict(self):
         return {
@@ -52,12 +70,15 @@ class Generic:
             "default_value": self.default_value
         }
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Signal:
     name: str
     data_type: str
     width: Optional[str] = None
     default_value: Optional[str] = None
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("name", "data_type", "width", "default_value")
 
     def to_dict(self):
         return {
@@ -67,41 +88,128 @@ class Signal:
             "default_value": self.default_value
         }
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class Instance:
+    label: str
+    kind: str  # 'component', 'entity' or 'configuration'
+    unit: str
+    library: Optional[str] = None
+    architecture: Optional[str] = None
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("label", "kind", "unit", "library", "architecture")
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "kind": self.kind,
+            "unit": self.unit,
+            "library": self.library,
+            "architecture": self.architecture
+        }
+
+@dataclass(slots=True, frozen=True)
+class Package:
+    name: str
+    body: bool = False
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("name", "body")
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "body": self.body
+        }
+
+@dataclass(slots=True, frozen=True)
+class ContextClause:
+    kind: str  # 'library', 'use' or 'context'
+    names: Tuple[str, ...]
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("kind", "names")
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "names": list(self.names)
+        }
+
+class SourceText:
+    """Read-only view of a parsed source buffer that nodes slice on demand."""
+
+    __slots__ = ('_view',)
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).toreadonly()
+
+    def __len__(self):
+        return len(self._view)
+
+    def text(self, span: Span) -> str:
+        start, end = span
+        return str(self._view[start:end], 'utf-8', 'replace')
+
+    def release(self) -> None:
+        self._view.release()
+
+@dataclass(slots=True)
 class Process:
     name: Optional[str]
     sensitivity_list: List[str]
-    code: str
+    code_span: Span
+    source: Optional[SourceText] = field(default=None, repr=False, compare=False)
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
 
-    def to_dict(self):
+    @property
+    def code(self) -> str:
+        return self.source.text(self.code_span)
+
+    def to_dict(self, spans: bool = False):
         return {
             "name": self.name,
             "sensitivity_list": self.sensitivity_list,
-            "code": self.code
+            **({"code_span": list(self.code_span)} if spans else {"code": self.code})
         }
 
-@dataclass
+@dataclass(slots=True)
 class Architecture:
     name: str
     entity_name: str
     signals: List[Signal]
     processes: List[Process]
-    concurrent_statements: List[str]
+    statement_spans: List[Span]
+    instances: List[Instance] = field(default_factory=list)
+    source: Optional[SourceText] = field(default=None, repr=False, compare=False)
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
 
-    def to_dict(self):
-        return {
+    @property
+    def concurrent_statements(self) -> List[str]:
+        return [self.source.text(span) for span in self.statement_spans]
+
+    def to_dict(self, spans: bool = False):
+        data = {
             "name": self.name,
             "entity_name": self.entity_name,
             "signals": [s.to_dict() for s in self.signals],
-            "processes": [p.to_dict() for p in self.processes],
-            "concurrent_statements": self.concurrent_statements
+            "processes": [p.to_dict(spans) for p in self.processes],
+            "instances": [i.to_dict() for i in self.instances]
         }
+        if spans:
+            data["concurrent_statement_spans"] = [list(span) for span in self.statement_spans]
+        else:
+            data["concurrent_statements"] = self.concurrent_statements
+        return data
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     name: str
     ports: List[Port]
     generics: List[Generic]
+    span: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    _json_fields = ("name", "generics", "ports")
 
     def to_dict(self):
         return {
@@ -110,281 +218,972 @@ class Entity:
             "ports": [p.to_dict() for p in self.ports]
         }
 
+class Token(NamedTuple):
+    kind: str
+    text: str
+    key: str
+    start: int
+    end: int
+
+# One alternative per lexical class; every alternative is anchored on its first
+# byte and never re-enters itself, so each byte is examined a bounded number of
+# times and tokenizing is linear in the size of the input.
+_TOKEN_RE = re.compile(rb"""
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*)
+    | (?P<bitstring>[bBoOxX]"[^"\n]*")
+    | (?P<ident>[A-Za-z][A-Za-z0-9_]*)
+    | (?P<extended>\\[^\\\n]*\\)
+    | (?P<number>[0-9][0-9_]*(?:\#[0-9A-Fa-f_.]*\#|(?:\.[0-9_]+)?(?:[eE][+-]?[0-9]+)?))
+    | (?P<string>"[^"\n]*(?:""[^"\n]*)*")
+    | (?P<delim>:=|<=|=>|>=|/=|\*\*|<>|\S)
+""", re.VERBOSE)
+
+# Tokens after which a tick is an attribute/qualifier rather than a character literal
+_TICK_PREFIX = frozenset(('ident', 'extended'))
+_TICK_PREFIX_TEXT = frozenset((')', ']'))
+
+_VECTOR_TYPES = frozenset(('std_logic_vector', 'bit_vector', 'signed', 'unsigned'))
+_PORT_MODES = frozenset(('in', 'out', 'inout', 'buffer', 'linkage'))
+_INTERFACE_CLASSES = frozenset(('signal', 'constant', 'variable', 'file'))
+# Searched with a pattern: memoryview, unlike bytes and mmap, has no find()
+_BLOCK_COMMENT_END = re.compile(rb'\*/')
+# Block/generate statements recurse; bound the depth instead of hitting RecursionError
+_MAX_NESTING = 200
+# Keywords that may follow 'end' without closing the enclosing subprogram or unit
+_COMPOUND_ENDS = frozenset((
+    'if', 'loop', 'case', 'record', 'units', 'protected',
+    'generate', 'block', 'process', 'component'
+))
+
+def tokenize(buffer) -> Iterator[Token]:
+    """Lazily split a VHDL source buffer (bytes, bytearray, memoryview or mmap)
+    into tokens, dropping whitespace and comments."""
+    match = _TOKEN_RE.match
+    length = len(buffer)
+    pos = 0
+    prev_kind = None
+    prev_text = None
+
+    while pos < length:
+        m = match(buffer, pos)
+        kind = m.lastgroup
+        end = m.end()
+
+        if kind == 'ws' or kind == 'comment':
+            pos = end
+            continue
+
+        if kind == 'delim':
+            first = buffer[pos:pos + 1]
+            if first == b'/' and buffer[pos + 1:pos + 2] == b'*':
+                # VHDL-2008 block comment; an unterminated one swallows the rest
+                close = _BLOCK_COMMENT_END.search(buffer, pos + 2)
+                pos = length if close is None else close.end()
+                continue
+            if (first == b"'" and buffer[pos + 2:pos + 3] == b"'"
+                    and prev_kind not in _TICK_PREFIX and prev_text not in _TICK_PREFIX_TEXT):
+                kind = 'char'
+                end = pos + 3
+
+        text = bytes(buffer[pos:end]).decode('utf-8', 'replace')
+        if kind == 'extended':
+            kind = 'ident'
+            key = text
+        elif kind == 'ident':
+            key = text.lower()
+        else:
+            key = text
+
+        yield Token(kind, text, key, pos, end)
+        prev_kind = kind
+        prev_text = text
+        pos = end
+
+def _with_deadline(tokens: Iterator[Token], time_budget: float) -> Iterator[Token]:
+    """Pass tokens through, raising TimeoutError once time_budget seconds have elapsed."""
+    deadline = time.monotonic() + time_budget
+    for count, tok in enumerate(tokens):
+        if not count & 0xFFF and time.monotonic() > deadline:
+            raise TimeoutError(f"VHDL parse exceeded its {time_budget} s time budget at offset {tok.start}")
+        yield tok
+
+def _join(tokens: List[Token]) -> str:
+    """Rebuild source text from tokens, collapsing whitespace and comments to one space."""
+    parts = []
+    prev_end = None
+    for tok in tokens:
+        if prev_end is not None and tok.start > prev_end:
+            parts.append(' ')
+        parts.append(tok.text)
+        prev_end = tok.end
+    return ''.join(parts)
+
+def _split_top_level(tokens: List[Token], separator: str) -> List[List[Token]]:
+    groups = [[]]
+    depth = 0
+    for tok in tokens:
+        if tok.key == '(':
+            depth += 1
+        elif tok.key == ')':
+            depth -= 1
+        elif tok.key == separator and depth == 0:
+            groups.append([])
+            continue
+        groups[-1].append(tok)
+    return [g for g in groups if g]
+
 class VHDLParser:
-    def __init__(self, content: str):
+    def __init__(self, content: Union[str, bytes, mmap.mmap], time_budget: Optional[float] = None):
         self.content = content
-        self.clean_content = self._preprocess_vhdl(content)
+        self._buffer = content.encode('utf-8') if isinstance(content, str) else content
+        self._source = SourceText(self._buffer)
+        self._tokens = tokenize(self._buffer)
+        if time_budget is not None:
+            self._tokens = _with_deadline(self._tokens, time_budget)
+        self._nesting = 0
+        self._lookahead = deque()
+        self._eof = Token('eof', '', '', len(self._buffer), len(self._buffer))
+        self._last_end = 0
         self.entity: Optional[Entity] = None
-        self.architecture: Optional[Architecture] = None
+        self._architecture: Optional[Architecture] = None
+        self._architecture_pending = False
+        # use clauses met inside architecture declarative parts, reported after the architecture
+        self._nested_context: List[ContextClause] = []
 
-    def _preprocess_vhdl(self, content: str) -> str:
-        content = re.sub(r'--.*$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-        content = ' '.join(content.split())
-        return content
+    @classmethod
+    def from_file(cls, input_file: str, time_budget: Optional[float] = None) -> 'VHDLParser':
+        return cls(map_vhdl_file(input_file), time_budget)
 
-    def _parse_generics(self, entity_text: str) -> List[Generic]:
-        generics = []
-        generic_match = re.search(r'generic\s*\((.*?)\);', entity_text, re.IGNORECASE | re.DOTALL)
+    @property
+    def architecture(self) -> Optional[Architecture]:
+        """First architecture in the source; parsed on first access after an entity-only parse()."""
+        if self._architecture_pending:
+            self._architecture_pending = False
+            for unit in self.iter_units():
+                if isinstance(unit, Architecture):
+                    self._architecture = unit
+                    break
+        return self._architecture
 
-        if not generic_match:
-            return generics
+    @architecture.setter
+    def architecture(self, value: Optional[Architecture]) -> None:
+        self._architecture_pending = False
+        self._architecture = value
 
-        generic_text = generic_match.group(1)
-        generic_declarations = generic_text.split(';')
+    # Token stream
 
-        for decl in generic_declarations:
-            decl = decl.strip()
-            if not decl:
-                continue
+    def _peek(self, offset: int = 0) -> Token:
+        while len(self._lookahead) <= offset:
+            tok = next(self._tokens, None)
+            if tok is None:
+                return self._eof
+            self._lookahead.append(tok)
+        return self._lookahead[offset]
 
-            try:
-                if ':=' in decl:
-                    name_type, default = decl.split(':=', 1)
-                    default = default.strip()
-                else:
-                    name_type = decl
-                    default = None
+    def _advance(self) -> Token:
+        tok = self._peek()
+        if tok is not self._eof:
+            self._lookahead.popleft()
+            self._last_end = tok.end
+        return tok
+
+    def _accept(self, key: str) -> Optional[Token]:
+        if self._peek().key == key:
+            return self._advance()
+        return None
+
+    def _expect(self, key: str) -> Token:
+        tok = self._advance()
+        if tok.key != key:
+            raise ValueError(f"Expected '{key}' at offset {tok.start}, found '{tok.text or 'end of file'}'")
+        return tok
+
+    def _expect_ident(self) -> Token:
+        tok = self._advance()
+        if tok.kind != 'ident':
+            raise ValueError(f"Expected identifier at offset {tok.start}, found '{tok.text or 'end of file'}'")
+        return tok
+
+    def _collect_until(self, *stops: str) -> List[Token]:
+        """Consume tokens up to (not including) the first stop key at parenthesis depth 0."""
+        collected = []
+        depth = 0
+        while True:
+            tok = self._peek()
+            if tok is self._eof:
+                return collected
+            if depth == 0 and tok.key in stops:
+                return collected
+            if tok.key == '(':
+                depth += 1
+            elif tok.key == ')':
+                if depth == 0:
+                    return collected
+                depth -= 1
+            collected.append(self._advance())
+
+    def _span_until(self, *stops: str) -> Optional[Span]:
+        """Like _collect_until, but only track the (start, end) span of what was consumed."""
+        start = None
+        depth = 0
+        while True:
+            tok = self._peek()
+            if tok is self._eof:
+                break
+            if depth == 0 and tok.key in stops:
+                break
+            if tok.key == '(':
+                depth += 1
+            elif tok.key == ')':
+                if depth == 0:
+                    break
+                depth -= 1
+            self._advance()
+            if start is None:
+                start = tok.start
+        return None if start is None else (start, self._last_end)
+
+    def _skip_statement(self) -> None:
+        self._span_until(';')
+        self._accept(';')
+
+    def _skip_to_end(self, keyword: str) -> None:
+        """Skip past 'end <keyword> [name] ;'."""
+        while True:
+            tok = self._advance()
+            if tok is self._eof:
+                return
+            if tok.key == 'end' and self._peek().key == keyword:
+                self._advance()
+                self._skip_statement()
+                return
 
-                name_part, type_part = name_type.split(':', 1)
-                names = [n.strip() for n in name_part.split(',')]
-                data_type = type_part.strip()
+    def _parse_end(self, keyword: str) -> None:
+        """Consume 'end [keyword] [name] ;' closing a design unit or block."""
+        self._expect('end')
+        self._accept(keyword)
+        if self._peek().kind == 'ident':
+            self._advance()
+        self._accept(';')
 
+    # Declarations
+
+    def _skip_subprogram(self) -> None:
+        self._span_until(';', 'is')
+        if self._accept(';') or self._peek() is self._eof:
+            return
+        self._advance()  # 'is'
+        if self._peek().key == 'new':  # generic subprogram instantiation
+            self._skip_statement()
+            return
+        depth = 0
+        while True:
+            tok = self._advance()
+            if tok is self._eof:
+                return
+            if tok.key == 'begin':
+                depth += 1
+            elif tok.key == 'end':
+                if self._peek().key in _COMPOUND_ENDS:
+                    self._advance()
+                    continue
+                depth -= 1
+                if depth <= 0:
+                    self._skip_statement()
+                    return
+
+    def _skip_declaration(self) -> None:
+        tok = self._advance()
+        if tok.key in ('function', 'procedure', 'pure', 'impure'):
+            self._skip_subprogram()
+            return
+        if tok.key == 'component':
+            self._skip_to_end('component')
+            return
+        depth = 0
+        while True:
+            tok = self._advance()
+            if tok is self._eof:
+                return
+            if tok.key == '(':
+                depth += 1
+            elif tok.key == ')':
+                depth -= 1
+            elif depth == 0 and tok.key in ('record', 'units', 'protected'):
+                self._skip_to_end(tok.key)
+                return
+            elif depth == 0 and tok.key == ';':
+                return
+
+    def _parse_interface_list(self) -> List[List[Token]]:
+        self._expect('(')
+        tokens = self._collect_until(')')
+        self._accept(')')
+        self._accept(';')
+        return _split_top_level(tokens, ';')
+
+    def _parse_declaration_parts(self, decl: List[Token]):
+        """Split 'names : subtype [:= default]' into (names, subtype tokens, default)."""
+        if decl and decl[0].key in _INTERFACE_CLASSES:
+            decl = decl[1:]
+        colon = next((i for i, tok in enumerate(decl) if tok.key == ':'), None)
+        if colon is None:
+            raise ValueError("missing ':'")
+        names = [tok.text for tok in decl[:colon] if tok.key != ',']
+        rest = decl[colon + 1:]
+        assign = next((i for i, tok in enumerate(rest) if tok.key == ':='), None)
+        default = None
+        if assign is not None:
+            default = _join(rest[assign + 1:])
+            rest = rest[:assign]
+        return names, rest, default
+
+    def _parse_subtype(self, subtype: List[Token]) -> Tuple[str, Optional[str]]:
+        """Return (data_type, width) for a subtype indication."""
+        if (len(subtype) >= 2 and subtype[0].key in _VECTOR_TYPES
+                and subtype[1].key == '(' and subtype[-1].key == ')'):
+            return subtype[0].key, _join(subtype[2:-1])
+        return _join(subtype).lower(), None
+
+    def _parse_generics(self) -> List[Generic]:
+        generics = []
+        for decl in self._parse_interface_list():
+            try:
+                names, subtype, default = self._parse_declaration_parts(decl)
+                data_type = _join(subtype)
+                span = (decl[0].start, decl[-1].end)
                 for name in names:
-                    if name:
-                        generics.append(Generic(name=name, data_type=data_type, default_value=default))
+                    generics.append(Generic(name=name, data_type=data_type, default_value=default, span=span))
             except Exception as e:
-                print(f"Error parsing generic: {decl}, Error: {str(e)}")
+                print(f"Error parsing generic: {_join(decl)}, Error: {str(e)}")
                 continue
 
         return generics
 
-    def _parse_ports(self, entity_text: str) -> List[Port]:
+    def _parse_ports(self) -> List[Port]:
         ports = []
-        port_match = re.search(r'port\s*\((.*)\)\s*;', entity_text, re.IGNORECASE | re.DOTALL)
-
-        if not port_match:
-            return ports
-
-        port_text = port_match.group(1)
-        port_declarations = [decl.strip() for decl in port_text.split(';') if decl.strip()]
-
-        for decl in port_declarations:
+        for decl in self._parse_interface_list():
             try:
-                name_part, type_part = decl.split(':', 1)
-                names = [n.strip() for n in name_part.split(',')]
-                
-                type_parts = type_part.strip().split(maxsplit=1)
-                direction = type_parts[0].lower()
-                data_type_full = type_parts[1] if len(type_parts) > 1 else ""
-
-                vector_match = re.match(
-                    r'(std_logic_vector|bit_vector|signed|unsigned)\s*\((.*?)\)', 
-                    data_type_full, 
-                    re.IGNORECASE
-                )
-                
-                if vector_match:
-                    data_type = vector_match.group(1).lower()
-                    range_expr = vector_match.group(2).strip()
-                    
-                    for name in names:
-                        if name:
-                            ports.append(Port(
-                                name=name,
-                                direction=direction,
-                                data_type=data_type,
-                                width=range_expr,
-                                default_value=None,
-                                range=None
-                            ))
-                else:
-                    data_type = data_type_full.lower()
-                    for name in names:
-                        if name:
-                            ports.append(Port(
-                                name=name,
-                                direction=direction,
-                                data_type=data_type,
-                                width=None,
-                                default_value=None,
-                                range=None
-                            ))
-
+                names, subtype, default = self._parse_declaration_parts(decl)
+                direction = 'in'
+                if subtype and subtype[0].key in _PORT_MODES:
+                    direction = subtype[0].key
+                    subtype = subtype[1:]
+                data_type, width = self._parse_subtype(subtype)
+                span = (decl[0].start, decl[-1].end)
+                for name in names:
+                    ports.append(Port(
+                        name=name,
+                        direction=direction,
+                        data_type=data_type,
+                        width=width,
+                        default_value=default,
+                        range=None,
+                        span=span
+                    ))
             except Exception as e:
-                print(f"Error parsing port: {decl}, Error: {str(e)}")
+                print(f"Error parsing port: {_join(decl)}, Error: {str(e)}")
                 continue
 
         return ports
 
-    def _parse_signals(self, arch_body: str) -> List[Signal]:
+    def _parse_signal_declaration(self) -> List[Signal]:
         signals = []
-        # Extract signal declarations
-        signal_pattern = r'signal\s+(.*?)\s*:\s*(.*?)\s*(?:;\s*|$)'
-        signal_matches = re.finditer(signal_pattern, arch_body, re.IGNORECASE)
-        
-        for match in signal_matches:
-            signal_names = match.group(1).split(',')
-            signal_type = match.group(2).strip()
-            
-            # Check for vector types
-            vector_match = re.match(
-                r'(std_logic_vector|bit_vector|signed|unsigned)\s*\((.*?)\)', 
-                signal_type, 
-                re.IGNORECASE
-            )
-            
-            # Check for default value
-            default_value = None
-            if ':=' in signal_type:
-                signal_type, default_value = signal_type.split(':=', 1)
-                signal_type = signal_type.strip()
-                default_value = default_value.strip()
-            
-            if vector_match:
-                data_type = vector_match.group(1).lower()
-                width = vector_match.group(2).strip()
-                
-                for name in signal_names:
-                    if name.strip():
-                        signals.append(Signal(
-                            name=name.strip(),
-                            data_type=data_type,
-                            width=width,
-                            default_value=default_value
-                        ))
-            else:
-                data_type = signal_type.lower()
-                for name in signal_names:
-                    if name.strip():
-                        signals.append(Signal(
-                            name=name.strip(),
-                            data_type=data_type,
-                            width=None,
-                            default_value=default_value
-                        ))
-        
+        decl = self._collect_until(';')
+        self._accept(';')
+        try:
+            names, subtype, default = self._parse_declaration_parts(decl)
+        except Exception as e:
+            print(f"Error parsing signal: {_join(decl)}, Error: {str(e)}")
+            return signals
+
+        data_type, width = self._parse_subtype(subtype)
+        span = (decl[0].start, decl[-1].end)
+        for name in names:
+            signals.append(Signal(name=name, data_type=data_type, width=width, default_value=default, span=span))
         return signals
 
-    def _parse_processes(self, arch_body: str) -> List[Process]:
+    def _parse_declarative_part(self, signals: List[Signal]) -> None:
+        while True:
+            tok = self._peek()
+            if tok is self._eof or tok.key in ('begin', 'end'):
+                return
+            if tok.key == 'signal':
+                signals.extend(self._parse_signal_declaration())
+            elif tok.key == 'use':
+                self._nested_context.append(self._parse_context_clause())
+            else:
+                self._skip_declaration()
+
+    # Concurrent statements
+
+    def _parse_process(self, label: Optional[Token], start: int) -> Optional[Process]:
+        self._accept('postponed')
+        self._expect('process')
+        sensitivity_list = []
+        if self._accept('('):
+            sensitivity = self._collect_until(')')
+            self._accept(')')
+            sensitivity_list = [_join(group) for group in _split_top_level(sensitivity, ',')]
+
+        body_start = self._peek().start
+        body_end = body_start
+        while True:
+            tok = self._advance()
+            if tok is self._eof:
+                return None  # unterminated process
+            if tok.key == 'end' and self._peek().key in ('process', 'postponed'):
+                break
+            body_end = tok.end
+        self._accept('postponed')
+        self._accept('process')
+        if self._peek().kind == 'ident':
+            self._advance()
+        self._accept(';')
+
+        return Process(
+            name=label.text if label else None,
+            sensitivity_list=sensitivity_list,
+            code_span=(body_start, body_end),
+            source=self._source,
+            span=(start, self._last_end)
+        )
+
+    def _parse_nested_region(self, signals, processes, statements, instances) -> None:
+        """Body of a block or generate statement: [declarations begin] statements."""
+        self._nesting += 1
+        if self._nesting > _MAX_NESTING:
+            raise ValueError(f"Block/generate statements nested deeper than {_MAX_NESTING} levels")
+        self._accept('is')
+        if self._peek().key != 'begin':
+            head = self._peek()
+            if head.key in ('signal', 'constant', 'type', 'subtype', 'component', 'function',
+                            'procedure', 'pure', 'impure', 'attribute', 'alias', 'shared',
+                            'file', 'use', 'for', 'disconnect'):
+                self._parse_declarative_part(signals)
+        self._accept('begin')
+        self._parse_statement_part(signals, processes, statements, instances)
+        self._nesting -= 1
+
+    def _parse_generate(self, label: Token, signals, processes, statements, instances) -> None:
+        while True:
+            self._span_until('generate')
+            self._accept('generate')
+            self._parse_nested_region(signals, processes, statements, instances)
+            tok = self._peek()
+            if tok is self._eof:
+                return
+            if tok.key in ('elsif', 'else', 'when'):
+                self._advance()
+                if tok.key == 'when':
+                    self._span_until('=>')
+                    self._accept('=>')
+                    self._parse_nested_region(signals, processes, statements, instances)
+                    if self._peek().key in ('when', 'elsif', 'else'):
+                        continue
+                else:
+                    continue
+            # 'end' of an alternative body ('end [label];') or of the generate
+            self._expect('end')
+            if self._accept('generate'):
+                if self._peek().kind == 'ident':
+                    self._advance()
+                self._accept(';')
+                return
+            if self._peek().kind == 'ident':
+                self._advance()
+            self._accept(';')
+
+    def _instantiated_unit(self, label: Token) -> Optional[Instance]:
+        """Recognise a component, entity or configuration instantiation at the
+        current position without consuming any tokens."""
+        kind = 'component'
+        i = 0
+        if self._peek().key in ('component', 'entity', 'configuration'):
+            kind = self._peek().key
+            i = 1
+
+        names = []
+        while True:
+            tok = self._peek(i)
+            if tok.kind != 'ident':
+                return None
+            names.append(tok.text)
+            i += 1
+            if self._peek(i).key != '.':
+                break
+            i += 1
+
+        architecture = None
+        if kind == 'entity' and self._peek(i).key == '(':
+            if self._peek(i + 1).kind != 'ident' or self._peek(i + 2).key != ')':
+                return None
+            architecture = self._peek(i + 1).text
+            i += 3
+
+        if self._peek(i).key not in ('port', 'generic', ';'):
+            return None
+        return Instance(
+            label=label.text,
+            kind=kind,
+            unit=names[-1],
+            library=names[0] if len(names) > 1 else None,
+            architecture=architecture
+        )
+
+    def _parse_statement_part(self, signals, processes, statements, instances) -> None:
+        while True:
+            tok = self._peek()
+            if tok is self._eof or tok.key in ('end', 'elsif', 'else', 'when'):
+                return
+
+            start = tok.start
+            label = None
+            if tok.kind == 'ident' and self._peek(1).key == ':':
+                label = self._advance()
+                self._advance()
+
+            key = self._peek().key
+            if key == 'postponed' and self._peek(1).key == 'process':
+                key = 'process'
+
+            if key == 'process':
+                process = self._parse_process(label, start)
+                if process:
+                    processes.append(process)
+            elif key == 'block':
+                self._advance()
+                if self._accept('('):
+                    self._span_until(')')
+                    self._accept(')')
+                self._parse_nested_region(signals, processes, statements, instances)
+                self._parse_end('block')
+            elif label is not None and key in ('for', 'if', 'case'):
+                self._parse_generate(label, signals, processes, statements, instances)
+            else:
+                instance = self._instantiated_unit(label) if label is not None else None
+                stmt = self._span_until(';')
+                self._accept(';')
+                if not stmt and self._peek() is not self._eof and self._peek().key == ')':
+                    self._advance()  # stray ')' would otherwise stall the loop
+                if stmt:
+                    statements.append((start, stmt[1]))
+                    if instance is not None:
+                        instances.append(replace(instance, span=(start, stmt[1])))
+
+    # Design units
+
+    def _parse_entity(self) -> Entity:
+        start = self._expect('entity').start
+        name = self._expect_ident().text
+        self._expect('is')
+
+        generics = []
+        ports = []
+        while True:
+            tok = self._peek()
+            if tok is self._eof or tok.key == 'end':
+                break
+            if tok.key == 'generic':
+                self._advance()
+                generics = self._parse_generics()
+            elif tok.key == 'port':
+                self._advance()
+                ports = self._parse_ports()
+            elif tok.key == 'begin':
+                self._advance()
+                self._parse_statement_part([], [], [], [])
+            else:
+                self._skip_declaration()
+
+        if self._peek() is not self._eof:
+            self._parse_end('entity')
+        return Entity(name=name, ports=ports, generics=generics, span=(start, self._last_end))
+
+    def _parse_architecture(self) -> Architecture:
+        start = self._expect('architecture').start
+        name = self._expect_ident().text
+        self._expect('of')
+        entity_name = self._expect_ident().text
+        self._expect('is')
+
+        signals = []
         processes = []
-        
-        # Extract processes
-        process_pattern = r'(?:(\w+)\s*:\s*)?process\s*\((.*?)\)(.*?)end\s+process\s*(?:\1)?\s*;'
-        process_matches = re.finditer(process_pattern, arch_body, re.IGNORECASE | re.DOTALL)
-        
-        for match in process_matches:
-            process_name = match.group(1) if match.group(1) else None
-            sensitivity_list = [s.strip() for s in match.group(2).split(',') if s.strip()]
-            process_body = match.group(3).strip()
-            
-            processes.append(Process(
-                name=process_name,
-                sensitivity_list=sensitivity_list,
-                code=process_body
-            ))
-        
-        return processes
-
-    def _parse_concurrent_statements(self, arch_body: str) -> List[str]:
-        # This is a simplified approach - would need more complex parsing for full accuracy
-        statements = []
-        
-        # Remove signal declarations
-        cleaned_body = re.sub(r'signal\s+.*?;', '', arch_body, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Remove process blocks
-        cleaned_body = re.sub(r'(?:\w+\s*:\s*)?process\s*\(.*?\).*?end\s+process\s*(?:\w+)?\s*;', '', cleaned_body, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Split remaining statements
-        stmt_pattern = r'(.*?);'
-        stmt_matches = re.finditer(stmt_pattern, cleaned_body)
-        
-        for match in stmt_matches:
-            stmt = match.group(1).strip()
-            if stmt and not stmt.lower().startswith(('begin', 'end')):
-                statements.append(stmt)
-        
-        return statements
-
-    def parse(self) -> Dict:
-        # Parse entity
-        entity_pattern = r'entity\s+(\w+)\s+is(.*?)end\s+(?:entity\s+)?\1\s*;'
-        entity_match = re.search(entity_pattern, self.clean_content, re.IGNORECASE | re.DOTALL)
-
-        if not entity_match:
+        statement_spans = []
+        instances = []
+        self._parse_declarative_part(signals)
+        self._accept('begin')
+        self._parse_statement_part(signals, processes, statement_spans, instances)
+        if self._peek() is not self._eof:
+            self._parse_end('architecture')
+
+        return Architecture(
+            name=name,
+            entity_name=entity_name,
+            signals=signals,
+            processes=processes,
+            statement_spans=statement_spans,
+            instances=instances,
+            source=self._source,
+            span=(start, self._last_end)
+        )
+
+    def _parse_context_clause(self) -> ContextClause:
+        """'library a, b;', 'use lib.pkg.item, ...;' or a 'context lib.ctx;' reference."""
+        start_tok = self._advance()
+        names = self._collect_until(';')
+        self._accept(';')
+        return ContextClause(
+            kind=start_tok.key,
+            names=tuple(''.join(tok.text for tok in group) for group in _split_top_level(names, ',')),
+            span=(start_tok.start, self._last_end)
+        )
+
+    def _skip_unit(self) -> Optional[Package]:
+        """Skip a package, package body, configuration or context declaration.
+
+        Packages (including bodies and instantiations) are returned as Package
+        nodes so callers can index them; their contents are not parsed.
+        """
+        start = self._peek().start
+        kind = self._advance().key
+        body = self._accept('body') is not None
+        name = self._peek().text if self._peek().kind == 'ident' else None
+
+        def unit() -> Optional[Package]:
+            if kind != 'package' or name is None:
+                return None
+            return Package(name=name, body=body, span=(start, self._last_end))
+
+        self._span_until('is', ';')
+        if self._accept(';') or (self._accept('is') and self._peek().key == 'new'):
+            self._skip_statement()  # package instantiation
+            return unit()
+        while True:
+            tok = self._peek()
+            if tok is self._eof:
+                return unit()
+            if tok.key == 'end':
+                self._advance()
+                if self._peek().key != kind and (self._peek().key in _COMPOUND_ENDS or self._peek().key == 'for'):
+                    self._advance()
+                    continue
+                self._accept(kind)
+                self._accept('body')
+                self._skip_statement()
+                return unit()
+            if tok.key in ('function', 'procedure', 'pure', 'impure', 'component'):
+                self._skip_declaration()
+            else:
+                self._advance()
+
+    def iter_units(self) -> Iterator[Union[Entity, Architecture, Package, ContextClause]]:
+        """Yield every entity, architecture, package and context clause in the
+        source, in file order. use clauses from an architecture's declarative
+        part follow that architecture."""
+        while True:
+            tok = self._peek()
+            if tok is self._eof:
+                return
+            if tok.key == 'entity':
+                yield self._parse_entity()
+            elif tok.key == 'architecture':
+                yield self._parse_architecture()
+                yield from self._nested_context
+                self._nested_context.clear()
+            elif tok.key in ('package', 'configuration') or (tok.key == 'context' and self._peek(2).key == 'is'):
+                package = self._skip_unit()
+                if package is not None:
+                    yield package
+            elif tok.key in ('library', 'use', 'context'):
+                yield self._parse_context_clause()
+            else:
+                self._advance()
+                if tok.key != ';':
+                    self._skip_statement()
+
+    def iter_design_units(self) -> Iterator[Tuple[Optional[Entity], Optional[Architecture]]]:
+        """Yield (entity, architecture) pairs in a single pass over the source.
+
+        A pair is emitted as soon as its architecture has been parsed; an
+        architecture whose entity is not in this file is paired with None, and
+        entities that never receive an architecture are emitted at the end.
+        """
+        entities: Dict[str, Entity] = {}
+        paired = set()
+        for unit in self.iter_units():
+            if isinstance(unit, Entity):
+                entities.setdefault(unit.name.lower(), unit)
+                continue
+            if not isinstance(unit, Architecture):
+                continue
+            key = unit.entity_name.lower()
+            entity = entities.get(key)
+            if entity is not None:
+                paired.add(key)
+            yield entity, unit
+
+        for key, entity in entities.items():
+            if key not in paired:
+                yield entity, None
+
+    def parse(self, entity_only: bool = False) -> Dict:
+        """Parse the first entity and the first architecture.
+
+        With entity_only the token stream is left just past the entity header
+        and the architecture is only parsed if the architecture attribute is
+        read later, so callers that only need ports and generics never pay for
+        signals, processes and concurrent statements.
+        """
+        for unit in self.iter_units():
+            if isinstance(unit, Entity):
+                if self.entity is None:
+                    self.entity = unit
+            elif isinstance(unit, Architecture) and self._architecture is None:
+                self._architecture = unit
+            if self.entity is not None and (entity_only or self._architecture is not None):
+                break
+
+        if not self.entity:
             raise ValueError("No valid entity found in VHDL file")
 
-        entity_name = entity_match.group(1)
-        entity_body = entity_match.group(2)
-
-        generics = self._parse_generics(entity_body)
-        ports = self._parse_ports(entity_body)
-
-        self.entity = Entity(name=entity_name, ports=ports, generics=generics)
-        
-        # Parse architecture
-        arch_pattern = r'architecture\s+(\w+)\s+of\s+(\w+)\s+is(.*?)begin(.*?)end\s+(?:architecture\s+)?\1\s*;'
-        arch_match = re.search(arch_pattern, self.clean_content, re.IGNORECASE | re.DOTALL)
-        
-        if arch_match:
-            arch_name = arch_match.group(1)
-            arch_entity = arch_match.group(2)
-            arch_declaration = arch_match.group(3)
-            arch_body = arch_match.group(4)
-            
-            signals = self._parse_signals(arch_declaration)
-            processes = self._parse_processes(arch_body)
-            concurrent_statements = self._parse_concurrent_statements(arch_body)
-            
-            self.architecture = Architecture(
-                name=arch_name,
-                entity_name=arch_entity,
-                signals=signals,
-                processes=processes,
-                concurrent_statements=concurrent_statements
-            )
-            
+        if entity_only:
+            self._architecture_pending = self._architecture is None
+            return {"entity": self.entity}
+
+        if self.architecture:
             return {"entity": self.entity, "architecture": self.architecture}
-        
+
         return {"entity": self.entity}
 
-    def save_to_json(self, output_path: str) -> None:
+    def to_json_data(self, include_architecture: bool = True, spans: bool = False) -> Dict:
+        """JSON-ready parse result; with spans, process bodies and concurrent
+        statements are emitted as [start, end] byte offsets into the source."""
         if not self.entity:
             raise ValueError("No entity has been parsed yet. Call parse() first.")
 
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        json_data = {
+            "vhdl_entity": self.entity.to_dict(),
+            "metadata": _metadata()
+        }
+
+        if include_architecture and self.architecture:
+            json_data["vhdl_architecture"] = self.architecture.to_dict(spans)
+
+        return json_data
+
+    def design_units_data(self, spans: bool = False) -> List[Dict]:
+        """Every design unit as a {"vhdl_entity", "vhdl_architecture"} dict."""
+        units = []
+        for entity, architecture in self.iter_design_units():
+            unit = {}
+            if entity is not None:
+                unit["vhdl_entity"] = entity.to_dict()
+            if architecture is not None:
+                unit["vhdl_architecture"] = architecture.to_dict(spans)
+            units.append(unit)
+        return units
+
+    def save_to_json(self, output_path: str, include_architecture: bool = True, spans: bool = False,
+                     compact: bool = False) -> None:
+        if not self.entity:
+            raise ValueError("No entity has been parsed yet. Call parse() first.")
 
-        entity_dict = self.entity.to_dict()
-        
         json_data = {
-            "vhdl_entity": entity_dict,
-            "metadata": {
-                "supported_types": [t.value for t in VHDLType],
-                "parser_version": "1.1"
-            }
+            "vhdl_entity": self.entity,
+            "metadata": _metadata()
         }
-        
-        if self.architecture:
-            json_data["vhdl_architecture"] = self.architecture.to_dict()
 
+        if include_architecture and self.architecture:
+            json_data["vhdl_architecture"] = self.architecture
+
+        write_json(json_data, output_path, None if compact else 2, spans)
+
+    def save_design_units_to_json(self, output_path: str, spans: bool = False) -> int:
+        """Stream every design unit into a multi-entity JSON document.
+
+        Units are written as they are parsed under "vhdl_design_units"; the
+        first entity is also stored as "vhdl_entity" so single-entity readers
+        such as the testbench generator keep working. Returns the unit count.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        count = 0
+        first_entity = None
         with open(output_path, 'w') as f:
-            json.dump(json_data, f, indent=2)
+            f.write('{\n  "vhdl_design_units": [')
+            for entity, architecture in self.iter_design_units():
+                unit = {}
+                if entity is not None:
+                    unit["vhdl_entity"] = entity
+                    if first_entity is None:
+                        first_entity = entity
+                if architecture is not None:
+                    unit["vhdl_architecture"] = architecture
+                f.write(',\n    ' if count else '\n    ')
+                dump_json(unit, f, indent=None, spans=spans)
+                count += 1
+            f.write('\n  ],\n')
+            if first_entity is not None:
+                f.write('  "vhdl_entity": ')
+                dump_json(first_entity, f, indent=None)
+                f.write(',\n')
+            f.write('  "metadata": ')
+            dump_json(_metadata(), f, indent=None)
+            f.write('\n}\n')
+
+        if first_entity is None:
+            raise ValueError("No valid entity found in VHDL file")
+        return count
+
+def _metadata() -> Dict:
+    return {
+        "supported_types": [t.value for t in VHDLType],
+        "parser_version": PARSER_VERSION
+    }
 
-def parse_vhdl_file(input_file: str, output_file: str = None) -> Dict:
-    with open(input_file, 'r') as f:
-        vhdl_content = f.read()
+def map_vhdl_file(input_file: str):
+    """Memory-map a VHDL file read-only.
+
+    The parser lexes the mapping in place, so no decoded or normalized copy of
+    the file is ever built and peak memory stays close to one file size. The
+    mapping is released once the parser and the nodes that reference it are
+    garbage collected.
+    """
+    with open(input_file, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return b''
+
+# Same escaping json.dump applies by default (ensure_ascii=True)
+_encode_str = json.encoder.encode_basestring_ascii
+
+def _node_items(node, spans: bool):
+    """(key, value) pairs of a parse-tree node in to_dict() order, without building the dict."""
+    if isinstance(node, Process):
+        yield "name", node.name
+        yield "sensitivity_list", node.sensitivity_list
+        if spans:
+            yield "code_span", node.code_span
+        else:
+            yield "code", node.code
+    elif isinstance(node, Architecture):
+        yield "name", node.name
+        yield "entity_name", node.entity_name
+        yield "signals", node.signals
+        yield "processes", node.processes
+        yield "instances", node.instances
+        if spans:
+            yield "concurrent_statement_spans", node.statement_spans
+        else:
+            yield "concurrent_statements", (node.source.text(span) for span in node.statement_spans)
+    else:
+        for name in node._json_fields:
+            yield name, getattr(node, name)
+
+def _write_value(write, value, spans: bool, indent: Optional[str], prefix: str) -> None:
+    if value is None:
+        write('null')
+    elif value is True:
+        write('true')
+    elif value is False:
+        write('false')
+    elif isinstance(value, str):
+        write(_encode_str(value))
+    elif isinstance(value, (int, float)):
+        write(json.dumps(value))
+    elif isinstance(value, (list, tuple)) or hasattr(value, '__next__'):
+        inner = prefix + indent if indent is not None else prefix
+        separator = ',\n' + inner if indent is not None else ','
+        first = True
+        for item in value:
+            if first:
+                write('[\n' + inner if indent is not None else '[')
+                first = False
+            else:
+                write(separator)
+            _write_value(write, item, spans, indent, inner)
+        if first:
+            write('[]')
+        else:
+            write('\n' + prefix + ']' if indent is not None else ']')
+    else:
+        items = value.items() if isinstance(value, dict) else _node_items(value, spans)
+        inner = prefix + indent if indent is not None else prefix
+        separator = ',\n' + inner if indent is not None else ','
+        colon = ': ' if indent is not None else ':'
+        first = True
+        for key, item in items:
+            if first:
+                write('{\n' + inner if indent is not None else '{')
+                first = False
+            else:
+                write(separator)
+            write(_encode_str(key))
+            write(colon)
+            _write_value(write, item, spans, indent, inner)
+        if first:
+            write('{}')
+        else:
+            write('\n' + prefix + '}' if indent is not None else '}')
+
+def dump_json(data, fp, indent: Optional[int] = 2, spans: bool = False) -> None:
+    """Stream JSON for plain values and parse-tree nodes straight to fp.
+
+    Nodes are walked field by field instead of being converted with to_dict()
+    first. indent=2 reproduces json.dump(..., indent=2) byte for byte;
+    indent=None writes compact output with no whitespace at all.
+    """
+    _write_value(fp.write, data, spans, None if indent is None else ' ' * indent, '')
+
+def write_json(json_data: Dict, output_path: str, indent: Optional[int] = 2, spans: bool = False) -> None:
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, 'w') as f:
+        dump_json(json_data, f, indent, spans)
+
+def parse_vhdl_file(input_file: str, output_file: str = None, cache=None, entity_only: bool = False) -> Dict:
+    """Parse a VHDL file and save its entity/architecture JSON.
+
+    When a ParseCache is given, unchanged sources are served from it instead
+    of being parsed again. entity_only skips the architecture entirely, which
+    is all the testbench generator needs.
+    """
+    vhdl_content = map_vhdl_file(input_file)
+
+    if cache is not None:
+        json_data = cache.parse(vhdl_content, entity_only=entity_only)
+        write_json(json_data, output_file or 'src/vhdl_module.json')
+        return json_data["vhdl_entity"]
 
     parser = VHDLParser(vhdl_content)
-    parse_result = parser.parse()
+    parse_result = parser.parse(entity_only=entity_only)
 
     if not output_file:
         output_file = 'src/vhdl_module.json'
 
-    parser.save_to_json(output_file)
-    
+    parser.save_to_json(output_file, include_architecture=not entity_only)
+
     # Return the entity dict to maintain backward compatibility
     return parse_result.get("entity").to_dict() if isinstance(parse_result.get("entity"), Entity) else parse_result.get("entity")
 
-parse_vhdl = parse_vhdl_file
\ No newline at end of file
+def iter_design_units(input_file: str) -> Iterator[Tuple[Optional[Entity], Optional[Architecture]]]:
+    """Yield every (entity, architecture) pair defined in a VHDL file."""
+    vhdl_content = map_vhdl_file(input_file)
+
+    yield from VHDLParser(vhdl_content).iter_design_units()
+
+def parse_vhdl_file_units(input_file: str, output_file: str = None) -> int:
+    """Parse all design units of a VHDL file into a multi-entity JSON document."""
+    vhdl_content = map_vhdl_file(input_file)
+
+    if not output_file:
+        output_file = 'src/vhdl_module.json'
+
+    return VHDLParser(vhdl_content).save_design_units_to_json(output_file)
+
+parse_vhdl = parse_vhdl_file
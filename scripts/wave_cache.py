@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .waveform_store import SignalTrace, WaveformStore
+    from .parse_cache import FILE_MODE
+except ImportError:
+    from waveform_store import SignalTrace, WaveformStore
+    from parse_cache import FILE_MODE
+
+CACHE_SUFFIX = '.wcache'
+CACHE_VERSION = 2
+DEFAULT_BLOCK_SIZE = 4096
+
+_MAGIC = b'WAVECACH'
+# magic, version, block size, source size, source mtime (ns), timescale (fs), end time
+# (-1 if unknown), directory offset, directory length
+_HEADER = struct.Struct('<8sIIQqQqQQ')
+# Arrays start on cache-line boundaries so every mapped view is aligned
+_ALIGNMENT = 64
+
+def cache_path(wave_file: str) -> str:
+    """Sidecar cache of a waveform: sim/uart_tx_tb.fst -> sim/uart_tx_tb.fst.wcache"""
+    return wave_file + CACHE_SUFFIX
+
+def _selected(names: Iterable[str], signals: Optional[Iterable[str]]) -> List[str]:
+    """Names containing one of the given substrings (all names when signals is None)"""
+    if signals is None:
+        return list(names)
+    patterns = list(signals)
+    return [name for name in names if any(pattern in name for pattern in patterns)]
+
+def _write_array(f, array: np.ndarray) -> int:
+    f.write(b'\0' * (-f.tell() % _ALIGNMENT))
+    offset = f.tell()
+    np.ascontiguousarray(array).tofile(f)
+    return offset
+
+def _pack_wide(values: np.ndarray, width: int) -> np.ndarray:
+    """Vectors wider than 64 bits (Python ints) as big-endian rows of width bytes"""
+    return np.frombuffer(b''.join(int(value).to_bytes(width, 'big') for value in values), dtype=np.uint8)
+
+def _unpack_wide(data: np.ndarray, width: int) -> np.ndarray:
+    rows = data.reshape(-1, width)
+    return np.array([int.from_bytes(row.tobytes(), 'big') for row in rows], dtype=object)
+
+def write_cache(store: WaveformStore, wave_file: str, path: Optional[str] = None,
+                block_size: int = DEFAULT_BLOCK_SIZE) -> str:
+    """Write the traces of store as the cache of wave_file and return its path.
+
+    The file is a fixed header, then per trace its times, values and known
+    arrays plus a time-block index (every block_size-th change time), each
+    aligned for memory mapping, then the JSON signal directory giving the
+    offsets. It is written to a temporary file and renamed into place, so a
+    reader never sees a partial cache.
+    """
+    path = path or cache_path(wave_file)
+    stat = os.stat(wave_file)
+    unique: Dict[int, Tuple[SignalTrace, List[str]]] = {}
+    for name, trace in store.traces.items():
+        unique.setdefault(id(trace), (trace, []))[1].append(name)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\0' * _HEADER.size)
+            directory = []
+            for trace, names in unique.values():
+                times = trace.times.astype(np.int64, copy=False)
+                values = trace.values
+                entry = {"names": names, "size": trace.size, "kind": trace.kind, "count": len(trace)}
+                if values.dtype == object:
+                    entry["width"] = (trace.size + 7) // 8
+                    values = _pack_wide(values, entry["width"])
+                entry["dtype"] = values.dtype.str
+                entry["times"] = _write_array(f, times)
+                entry["values"] = _write_array(f, values)
+                entry["known"] = _write_array(f, trace.known.astype(np.bool_, copy=False))
+                entry["blocks"] = _write_array(f, times[::block_size])
+                if trace.raw:
+                    raw = json.dumps({str(index): text for index, text in trace.raw.items()}).encode('utf-8')
+                    entry["raw"] = [f.tell(), len(raw)]
+                    f.write(raw)
+                directory.append(entry)
+            text = json.dumps(directory).encode('utf-8')
+            directory_offset = f.tell()
+            f.write(text)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, CACHE_VERSION, block_size, stat.st_size, stat.st_mtime_ns,
+                                 store.timescale_fs, -1 if store.end_time is None else store.end_time,
+                                 directory_offset, len(text)))
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+class _LazyTraces(Mapping):
+    """Name -> SignalTrace mapping that maps a trace out of the cache on first access"""
+
+    def __init__(self, cache: 'WaveCache', names: List[str]):
+        self._cache = cache
+        self._names = dict.fromkeys(names)
+
+    def __getitem__(self, name: str) -> SignalTrace:
+        if name not in self._names:
+            raise KeyError(name)
+        return self._cache.trace(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+class WaveCache:
+    """A waveform cache file opened read-only with mmap.
+
+    Opening reads only the header and the signal directory. A trace's arrays
+    are NumPy views of the mapping, created when the trace is first asked
+    for, so a query touches only the pages of the signals it reads. Raises
+    ValueError for a file that is not a cache of the current version.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path}: truncated waveform cache")
+        (magic, version, self.block_size, self.source_size, self.source_mtime_ns,
+         self.timescale_fs, end_time, directory_offset, directory_length) = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a waveform cache")
+        if version != CACHE_VERSION:
+            raise ValueError(f"{path}: cache version {version}, expected {CACHE_VERSION}")
+        try:
+            self.directory = json.loads(self._map[directory_offset:directory_offset + directory_length])
+        except ValueError:
+            raise ValueError(f"{path}: corrupt signal directory")
+        self.directory_index = {name: index for index, entry in enumerate(self.directory) for name in entry["names"]}
+        self._traces: Dict[int, SignalTrace] = {}
+        self.end_time = None if end_time < 0 else end_time
+
+    def is_current(self, wave_file: str) -> bool:
+        """Whether the cache was built from wave_file as it is now"""
+        try:
+            stat = os.stat(wave_file)
+        except OSError:
+            return False
+        return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+    def names(self) -> List[str]:
+        return list(self.directory_index)
+
+    def _array(self, offset: int, dtype, count: int) -> np.ndarray:
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+    def trace(self, name: str) -> SignalTrace:
+        index = self.directory_index[name]
+        trace = self._traces.get(index)
+        if trace is None:
+            entry = self.directory[index]
+            count = entry["count"]
+            width = entry.get("width")
+            if width:
+                values = _unpack_wide(self._array(entry["values"], np.uint8, count * width), width)
+            else:
+                values = self._array(entry["values"], np.dtype(entry["dtype"]), count)
+            raw = {}
+            if "raw" in entry:
+                offset, length = entry["raw"]
+                raw = {int(key): text for key, text in json.loads(self._map[offset:offset + length]).items()}
+            blocks = (count + self.block_size - 1) // self.block_size
+            trace = SignalTrace(entry["names"][0], entry["size"], entry["kind"],
+                                self._array(entry["times"], np.int64, count), values,
+                                self._array(entry["known"], np.bool_, count), raw,
+                                self._array(entry["blocks"], np.int64, blocks), self.block_size)
+            self._traces[index] = trace
+        return trace
+
+    def store(self, signals: Optional[Iterable[str]] = None) -> WaveformStore:
+        """A WaveformStore over the cached signals (those whose name contains
+        one of the given substrings, if signals is given)"""
+        return WaveformStore(_LazyTraces(self, _selected(self.directory_index, signals)), self.timescale_fs,
+                             self.end_time)
+
+def open_cache(wave_file: str) -> Optional[WaveCache]:
+    """The cache of wave_file if it exists and is current, else None"""
+    try:
+        cache = WaveCache(cache_path(wave_file))
+    except (OSError, ValueError):
+        return None
+    return cache if cache.is_current(wave_file) else None
+
+def load_waveform(wave_file: str, signals: Optional[Iterable[str]] = None, use_cache: bool = True,
+                  rebuild: bool = False) -> WaveformStore:
+    """Load a .vcd or .fst through its cache.
+
+    A current cache is memory-mapped and only the signals a query touches are
+    paged in. Otherwise the whole waveform is parsed once, the cache is
+    written next to it for later reads, and the parsed store is returned. A
+    cache that cannot be written (read-only directory) is silently skipped.
+    """
+    signals = list(signals) if signals is not None else None
+    if not use_cache:
+        return WaveformStore.open(wave_file, signals)
+    if not rebuild:
+        cache = open_cache(wave_file)
+        if cache is not None:
+            return cache.store(signals)
+    store = WaveformStore.open(wave_file)
+    try:
+        write_cache(store, wave_file)
+    except OSError:
+        pass
+    names = _selected(store.traces, signals)
+    return WaveformStore({name: store.traces[name] for name in names}, store.timescale_fs, store.end_time)
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Build or query the indexed cache of a VCD or FST waveform.")
+    arg_parser.add_argument("wave_file", help="Waveform (.vcd or .fst) to load")
+    arg_parser.add_argument("--signal", action="append", default=None,
+                            help="Only load signals whose name contains this (repeatable)")
+    arg_parser.add_argument("--at", type=int, default=None, help="Print every selected value at this time")
+    arg_parser.add_argument("--rebuild", action="store_true", help="Rebuild the cache even if it is current")
+    arg_parser.add_argument("--info", action="store_true", help="Print the cache header and signal directory")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.wave_file):
+        print(f"Error: {args.wave_file} not found.")
+        sys.exit(1)
+    try:
+        store = load_waveform(args.wave_file, args.signal, rebuild=args.rebuild)
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.info:
+        cache = open_cache(args.wave_file)
+        if cache is None:
+            print(f"No current cache for {args.wave_file}")
+            sys.exit(1)
+        print(f"{cache.path}: version {CACHE_VERSION}, {len(cache.directory)} trace(s), "
+              f"block size {cache.block_size}, timescale {cache.timescale_fs} fs")
+        for entry in cache.directory:
+            print(f"  {', '.join(entry['names'])}: {entry['count']} change(s), {entry['size']} bit(s), {entry['kind']}")
+        return
+
+    for name in store.names():
+        trace = store[name]
+        if args.at is not None:
+            print(f"{name}: {trace.value_at(args.at)}")
+        else:
+            print(f"{name}: {len(trace)} change(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .vcd_reader import VCDReader, DEFAULT_CHUNK_SIZE
+    from .fst_reader import FSTReader
+except ImportError:
+    from vcd_reader import VCDReader, DEFAULT_CHUNK_SIZE
+    from fst_reader import FSTReader
+
+EDGE_KINDS = ("rising", "falling", "any")
+_REAL_VAR_TYPES = ("real", "realtime", "real_parameter", "shortreal")
+# Only values made of these pack into integers; int(value, 2) would also take signs and underscores
+_BINARY_DIGITS = frozenset('01')
+
+def _value_typecode(size: int) -> Optional[str]:
+    """array/NumPy type code holding a size-bit vector, or None past 64 bits"""
+    for bits, typecode in ((8, 'B'), (16, 'H'), (32, 'I'), (64, 'Q')):
+        if size <= bits:
+            return typecode
+    return None
+
+class SignalTrace:
+    """One signal as parallel arrays: int64 change times (in dump time units)
+    and packed values.
+
+    Vectors of up to 64 bits (scalars are 1-bit vectors) are packed into the
+    smallest unsigned integer type; wider vectors are kept as Python ints in
+    an object array, and reals as float64. A value with X/Z/U/... bits packs
+    as 0 with known[i] False, and its text is kept in raw. Lookups are binary
+    searches over times; bulk queries are vectorized.
+
+    block_times, when given, holds times[::block_size]: a point lookup then
+    searches this small index first and touches a single block of times,
+    which keeps memory-mapped traces (see wave_cache) mostly on disk.
+    """
+
+    def __init__(self, name: str, size: int, kind: str, times: np.ndarray, values: np.ndarray,
+                 known: np.ndarray, raw: Optional[Dict[int, str]] = None,
+                 block_times: Optional[np.ndarray] = None, block_size: int = 0):
+        self.name = name
+        self.size = size
+        self.kind = kind  # 'vector' or 'real'
+        self.times = times
+        self.values = values
+        self.known = known
+        self.raw = raw or {}
+        self.block_times = block_times
+        self.block_size = block_size
+        self._edges: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __repr__(self) -> str:
+        return f"SignalTrace({self.name!r}, size={self.size}, kind={self.kind!r}, changes={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes + self.known.nbytes
+
+    def _value(self, index: int) -> Union[int, float, str]:
+        if not self.known[index]:
+            return self.raw.get(index, 'x')
+        value = self.values[index]
+        return float(value) if self.kind == 'real' else int(value)
+
+    def index_at(self, t: int) -> int:
+        """Index of the change in effect at time t (the last one at or before t), or -1"""
+        if self.block_times is None:
+            return int(np.searchsorted(self.times, t, side='right')) - 1
+        block = int(np.searchsorted(self.block_times, t, side='right')) - 1
+        if block < 0:
+            return -1
+        first = block * self.block_size
+        return first + int(np.searchsorted(self.times[first:first + self.block_size], t, side='right')) - 1
+
+    def value_at(self, t: int) -> Union[int, float, str, None]:
+        """Value at time t: an int for vectors, a float for reals, the raw text
+        for values with unknown bits, None before the first change"""
+        index = self.index_at(t)
+        return None if index < 0 else self._value(index)
+
+    def window(self, t0: int, t1: int) -> 'SignalTrace':
+        """The trace between t0 and t1 inclusive, starting with the value in
+        effect at t0 (re-timed to t0)"""
+        first = int(np.searchsorted(self.times, t0, side='right'))
+        last = int(np.searchsorted(self.times, t1, side='right'))
+        start = max(first - 1, 0)
+        times = self.times[start:last].copy()
+        if first > 0 and len(times):
+            times[0] = max(times[0], t0)
+        raw = {index - start: text for index, text in self.raw.items() if start <= index < last}
+        return SignalTrace(self.name, self.size, self.kind, times, self.values[start:last],
+                           self.known[start:last], raw)
+
+    def edges(self, kind: str = "rising") -> np.ndarray:
+        """Times of rising/falling edges (scalars only) or of any value change.
+        Changes between two unknown values, or to the same value, are not edges."""
+        if kind not in EDGE_KINDS:
+            raise ValueError(f"Edge kind must be one of {', '.join(EDGE_KINDS)}, got '{kind}'")
+        if kind in self._edges:
+            return self._edges[kind]
+        if kind != "any" and (self.kind != 'vector' or self.size != 1):
+            raise ValueError(f"{self.name}: {kind} edges need a scalar signal")
+
+        previous_values, values = self.values[:-1], self.values[1:]
+        previous_known, known = self.known[:-1], self.known[1:]
+        if kind == "rising":
+            mask = previous_known & known & (previous_values == 0) & (values == 1)
+        elif kind == "falling":
+            mask = previous_known & known & (previous_values == 1) & (values == 0)
+        else:
+            mask = (previous_known != known) | (known & (previous_values != values))
+            if self.raw:
+                # Both unknown: an edge only if the text changed (e.g. U -> X)
+                for index in np.flatnonzero(~previous_known & ~known):
+                    mask[index] = self.raw.get(int(index)) != self.raw.get(int(index) + 1)
+        self._edges[kind] = self.times[1:][mask]
+        return self._edges[kind]
+
+    def next_edge(self, t: int, kind: str = "rising") -> Optional[int]:
+        """Time of the first edge strictly after t, or None"""
+        edges = self.edges(kind)
+        index = int(np.searchsorted(edges, t, side='right'))
+        return int(edges[index]) if index < len(edges) else None
+
+    def previous_edge(self, t: int, kind: str = "rising") -> Optional[int]:
+        """Time of the last edge strictly before t, or None"""
+        edges = self.edges(kind)
+        index = int(np.searchsorted(edges, t, side='left')) - 1
+        return int(edges[index]) if index >= 0 else None
+
+    def sample(self, times: Iterable[int], before: bool = False) -> np.ma.MaskedArray:
+        """Values at many times at once. With before, a change exactly at a
+        sample time is not yet visible (what a flip-flop clocked at that time
+        captures). Unknown values and times before the first change are masked."""
+        times = np.asarray(times, dtype=np.int64)
+        indices = np.searchsorted(self.times, times, side='left' if before else 'right') - 1
+        valid = indices >= 0
+        clipped = np.where(valid, indices, 0)
+        if len(self.values):
+            values = self.values[clipped]
+            mask = ~(valid & self.known[clipped])
+        else:
+            values = np.zeros(len(times), dtype=self.values.dtype)
+            mask = np.ones(len(times), dtype=bool)
+        return np.ma.MaskedArray(values, mask=mask)
+
+class _TraceBuilder:
+    """Appends changes into compact typed buffers while a dump is read"""
+
+    def __init__(self, size: int, kind: str):
+        self.size = size
+        self.kind = kind
+        self.times = array('q')
+        typecode = 'd' if kind == 'real' else _value_typecode(size)
+        self.values: Union[array, List[int]] = array(typecode) if typecode else []
+        self.known = bytearray()
+        self.raw: Dict[int, str] = {}
+
+    def append(self, time: int, value: Union[str, float]) -> None:
+        self.times.append(time)
+        if self.kind == 'real':
+            if isinstance(value, float):
+                self.values.append(value)
+                self.known.append(1)
+                return
+            # A real variable dumped with a non-real value
+            packed = None
+        elif isinstance(value, str) and value and set(value) <= _BINARY_DIGITS:
+            packed = int(value, 2)
+            if packed.bit_length() > self.size:
+                packed = None  # wider than declared; would not fit the value array
+        else:
+            packed = None
+        if packed is None:
+            self.raw[len(self.known)] = str(value)
+            self.values.append(0)
+            self.known.append(0)
+        else:
+            self.values.append(packed)
+            self.known.append(1)
+
+    def build(self, name: str) -> SignalTrace:
+        times = np.frombuffer(self.times, dtype=np.int64) if self.times else np.zeros(0, dtype=np.int64)
+        if isinstance(self.values, list):
+            values = np.empty(len(self.values), dtype=object)
+            values[:] = self.values
+        elif self.values:
+            values = np.frombuffer(self.values, dtype=np.dtype(self.values.typecode))
+        else:
+            values = np.zeros(0, dtype=np.dtype(self.values.typecode))
+        known = np.frombuffer(bytes(self.known), dtype=np.bool_)
+        trace = SignalTrace(name, self.size, self.kind, times, values, known, self.raw)
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            raise ValueError(f"{name}: change times are not in order")
+        return trace
+
+class WaveformStore:
+    """All (or selected) signals of a waveform, one SignalTrace each, keyed by
+    hierarchical name. Aliases sharing a VCD id code share one trace. traces
+    may be any mapping, e.g. one that maps traces from a cache on access.
+    end_time is the final timestamp of the dump, which may come after the
+    last change of every signal (None when unknown)."""
+
+    def __init__(self, traces: Mapping[str, SignalTrace], timescale_fs: int = 1,
+                 end_time: Optional[int] = None):
+        self.traces = traces
+        self.timescale_fs = timescale_fs
+        self.end_time = end_time
+
+    @classmethod
+    def _load(cls, reader, signals: Optional[Iterable[str]], changes,
+              end: Optional[int] = None) -> 'WaveformStore':
+        """Build traces from a reader's signals and a change iterator factory,
+        which receives the id codes to read (None for all). The store ends at
+        the reader's end_time, or at end for a window that stops earlier."""
+        patterns = list(signals) if signals is not None else None
+        builders: Dict[str, _TraceBuilder] = {}
+        for id_code, variables in reader.signals.items():
+            if patterns is not None and not any(p in v.name for p in patterns for v in variables):
+                continue
+            kind = 'real' if variables[0].var_type in _REAL_VAR_TYPES else 'vector'
+            builders[id_code] = _TraceBuilder(variables[0].size, kind)
+
+        for time, id_code, value in changes(None if patterns is None else list(builders)):
+            builder = builders.get(id_code)
+            if builder is not None:
+                builder.append(time, value)
+
+        traces = {}
+        for id_code, builder in builders.items():
+            trace = builder.build(reader.signals[id_code][0].name)
+            for variable in reader.signals[id_code]:
+                traces[variable.name] = trace
+        end_time = reader.end_time
+        if end is not None and end_time is not None:
+            end_time = min(end, end_time)
+        return cls(traces, reader.timescale_fs, end_time)
+
+    @classmethod
+    def from_vcd(cls, path: str, signals: Optional[Iterable[str]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'WaveformStore':
+        """Load a VCD. signals limits the store to names containing one of the
+        given substrings; changes of other signals are skipped while reading."""
+        with VCDReader(path, chunk_size) as reader:
+            return cls._load(reader, signals, lambda id_codes: reader)
+
+    @classmethod
+    def from_fst(cls, path: str, signals: Optional[Iterable[str]] = None, start: Optional[int] = None,
+                 end: Optional[int] = None) -> 'WaveformStore':
+        """Load an FST. Only the value change blocks overlapping start..end
+        and, within them, only the selected signals are decompressed."""
+        with FSTReader(path) as reader:
+            return cls._load(reader, signals, lambda id_codes: reader.changes(id_codes, start, end), end)
+
+    @classmethod
+    def open(cls, path: str, signals: Optional[Iterable[str]] = None) -> 'WaveformStore':
+        """Load a .vcd or .fst file, chosen by extension"""
+        if path.lower().endswith('.fst'):
+            return cls.from_fst(path, signals)
+        return cls.from_vcd(path, signals)
+
+    def __getitem__(self, name: str) -> SignalTrace:
+        if name in self.traces:
+            return self.traces[name]
+        # Accept a unique suffix such as 'uut.q[3:0]' or 'clk'
+        names = [full for full in self.traces if full.endswith('.' + name)]
+        matches = {id(trace): trace for trace in (self.traces[full] for full in names)}
+        if len(matches) == 1:
+            return next(iter(matches.values()))
+        if matches:
+            raise KeyError(f"'{name}' is ambiguous: " + ", ".join(names))
+        raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def names(self) -> List[str]:
+        return list(self.traces)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(trace.nbytes for trace in {id(t): t for t in self.traces.values()}.values())
+
+    def resample(self, clock: str, names: Optional[Iterable[str]] = None, edge: str = "rising",
+                 start: Optional[int] = None, end: Optional[int] = None
+                 ) -> Tuple[np.ndarray, Dict[str, np.ma.MaskedArray]]:
+        """Sample signals at the edges of a clock, with flip-flop semantics (a
+        change at the edge itself is not seen). Returns (edge times, values per name)."""
+        clock_trace = self[clock]
+        edges = clock_trace.edges(edge)
+        if start is not None:
+            edges = edges[np.searchsorted(edges, start, side='left'):]
+        if end is not None:
+            edges = edges[:np.searchsorted(edges, end, side='right')]
+        names = list(names) if names is not None else [name for name, trace in self.traces.items() if trace is not clock_trace]
+        return edges, {name: self[name].sample(edges, before=True) for name in names}
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Load a VCD or FST waveform into columnar arrays and query it.")
+    arg_parser.add_argument("wave_file", help="Waveform (.vcd or .fst) to load")
+    arg_parser.add_argument("--signal", action="append", default=None,
+                            help="Only load signals whose name contains this (repeatable)")
+    arg_parser.add_argument("--at", type=int, default=None, help="Print every value at this time")
+    arg_parser.add_argument("--clock", default=None, help="Print the values sampled at this clock's rising edges")
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.wave_file):
+        print(f"Error: {args.wave_file} not found.")
+        sys.exit(1)
+    try:
+        store = WaveformStore.open(args.wave_file, args.signal)
+        if args.clock:
+            edges, samples = store.resample(args.clock)
+            for index, time in enumerate(edges):
+                print(f"{time} " + " ".join(f"{name}={samples[name][index]}" for name in samples))
+            return
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    for name in store.names():
+        trace = store[name]
+        if args.at is not None:
+            print(f"{name}: {trace.value_at(args.at)}")
+        else:
+            print(f"{name}: {len(trace)} change(s), {trace.nbytes} bytes")
+
+if __name__ == "__main__":
+    main()
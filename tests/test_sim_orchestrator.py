@@ -0,0 +1,79 @@
+import os
+import sys
+import stat
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from regression_scheduler import RuntimeHistory
+from sim_orchestrator import SimulationJob, run_job, run_regression
+
+# Stand-in for GHDL: analysis creates the work library, the run of a
+# testbench named slow_tb takes long enough to be cancelled.
+FAKE_GHDL = """#!/bin/sh
+workdir=.
+for arg in "$@"; do case "$arg" in --workdir=*) workdir="${arg#--workdir=}";; esac; done
+case "$1" in
+    --version) echo "GHDL 0.0 (test)";;
+    -a) touch "$workdir/work-obj93.cf";;
+    -r) case "$*" in *slow_tb*) exec sleep 30;; esac; echo "ran $*";;
+esac
+exit 0
+"""
+
+TESTBENCH = """entity {name} is
+end {name};
+
+architecture sim of {name} is
+    signal a : bit;
+begin
+    process
+    begin
+        a <= '1';
+        wait for 10 ns;
+        wait;
+    end process;
+end sim;
+"""
+
+def _fake_ghdl(tmp_path) -> str:
+    path = tmp_path / 'ghdl'
+    path.write_text(FAKE_GHDL)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+def _job(tmp_path, name: str) -> SimulationJob:
+    source = tmp_path / f'{name}.vhdl'
+    source.write_text(TESTBENCH.format(name=name))
+    return SimulationJob(testbench=name, sources=[str(source)], wave=None)
+
+def test_run_regression_records_history(tmp_path):
+    ghdl = _fake_ghdl(tmp_path)
+    jobs = [_job(tmp_path, 'first_tb'), _job(tmp_path, 'second_tb')]
+    history_path = str(tmp_path / 'history.json')
+
+    result = run_regression(jobs, str(tmp_path / 'jobs'), workers=2, ghdl=ghdl, history=RuntimeHistory(history_path))
+    assert [job.status for job in result.jobs] == ["passed", "passed"]
+    assert all(job.estimate is not None for job in result.jobs)
+    assert result.predicted_seconds is not None
+
+    history = RuntimeHistory(history_path)
+    for job in result.jobs:
+        assert history.get(job.testbench) == job.seconds
+        assert history.entries[job.testbench]["ports"] == 1
+
+    again = run_regression(jobs, str(tmp_path / 'jobs'), workers=2, ghdl=ghdl, history=RuntimeHistory(history_path))
+    assert [job.estimate for job in again.jobs] == [job.seconds for job in result.jobs]
+    assert all(entry["runs"] == 2 for entry in RuntimeHistory(history_path).entries.values())
+
+def test_cancel_kills_running_step(tmp_path):
+    ghdl = _fake_ghdl(tmp_path)
+    cancel = threading.Event()
+    threading.Timer(0.5, cancel.set).start()
+
+    started = time.monotonic()
+    result = run_job(_job(tmp_path, 'slow_tb'), str(tmp_path / 'slow'), ghdl=ghdl, cancel=cancel)
+    assert result.status == "cancelled"
+    assert result.stage == "run"
+    assert time.monotonic() - started < 10
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from testbench_generator import generate_compact_test_vectors, generate_test_vectors, stimulus_duration
+
+PORTS = [
+    {'name': 'clk', 'direction': 'in', 'data_type': 'std_logic'},
+    {'name': 'enable', 'direction': 'in', 'data_type': 'std_logic'},
+    {'name': 'data_in', 'direction': 'in', 'data_type': 'std_logic_vector',
+     'width': {'left': 'WIDTH-1', 'right': 0, 'direction': 'downto'}},
+    {'name': 'operand', 'direction': 'in', 'data_type': 'unsigned', 'width': [7, 0]},
+    {'name': 'count', 'direction': 'in', 'data_type': 'integer'},
+    {'name': 'result', 'direction': 'out', 'data_type': 'std_logic_vector', 'width': [7, 0]},
+]
+
+def test_compact_vectors_loop_over_pattern_tables():
+    constants = {'width': 8}
+    unrolled = generate_test_vectors(PORTS, 'clk', None, constants)
+    declarations, code = generate_compact_test_vectors(PORTS, 'clk', None, constants)
+
+    assert stimulus_duration(code) == stimulus_duration(unrolled)
+    assert code.count("end loop;") == 4
+    assert "constant tb_operand_patterns : tb_operand_patterns_t" in declarations
+    assert "operand <= tb_operand_patterns(tb_step);" in code
+    assert '"00000001"' not in code
+    assert len(declarations.splitlines()) + len(code.splitlines()) < len(unrolled.splitlines())
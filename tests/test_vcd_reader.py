@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from vcd_reader import VCDReader
+
+HEADER = """$timescale 1 ns $end
+$scope module tb $end
+$var wire 4 ! q [3:0] $end
+$var real 64 " r $end
+$upscope $end
+$enddefinitions $end
+#0
+b0 !
+r0.5 "
+#10
+"""
+
+@pytest.mark.parametrize("tail", ["b101", "r1.5", "sabc"])
+def test_truncated_value_raises_value_error(tmp_path, tail):
+    path = tmp_path / 'cut.vcd'
+    path.write_text(HEADER + tail)
+    with VCDReader(str(path)) as reader:
+        changes = []
+        with pytest.raises(ValueError, match=f"'{tail}' at time 10"):
+            for change in reader:
+                changes.append(change)
+    assert [(change.time, change.id_code) for change in changes] == [(0, '!'), (0, '"')]
+    assert changes[0].value == '0000'
@@ -0,0 +1,30 @@
+import os
+import sys
+import stat
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from parse_cache import FILE_MODE
+from wave_cache import cache_path, load_waveform, open_cache
+
+VCD = """$timescale 1 ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+#5
+1!
+#10
+"""
+
+def test_cache_gets_umask_mode_and_reloads(tmp_path):
+    path = tmp_path / 'clk.vcd'
+    path.write_text(VCD)
+    load_waveform(str(path))
+
+    assert stat.S_IMODE(os.stat(cache_path(str(path))).st_mode) == FILE_MODE
+    cache = open_cache(str(path))
+    assert cache is not None and cache.end_time == 10
+    assert [int(value) for value in cache.store()['clk'].values] == [0, 1]
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from waveform_store import WaveformStore
+
+VCD = """$timescale 1 ns $end
+$scope module tb $end
+$var wire 4 ! q [3:0] $end
+$upscope $end
+$enddefinitions $end
+#0
+b0101 !
+#10
+b-101 !
+#20
+b1_01 !
+#30
+bx01z !
+#40
+b1111 !
+"""
+
+def test_vectors_with_non_binary_digits_stay_raw(tmp_path):
+    path = tmp_path / 'signs.vcd'
+    path.write_text(VCD)
+    trace = WaveformStore.open(str(path))['q[3:0]']
+    assert list(trace.known) == [True, False, False, False, True]
+    assert int(trace.values[0]) == 5 and int(trace.values[4]) == 15
+    assert trace.raw == {1: '-101', 2: '1_01', 3: 'x01z'}